@@ -1,12 +1,24 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
+import secrets
 from datetime import datetime
-import pickle
-import requests
-from streamlit_lottie import st_lottie
+from lottie_assets import load_animations
+from diseases import DISEASES
+from model_registry import ModelLoadError, ModelRegistry
+from report_store import Report, ReportStore
+import dashboard_analytics
+import figures
+import static_theme
+import tracing
+
+# Heavy modules (pandas, numpy, plotly, streamlit_lottie) are imported by the
+# pages (and the figures module) when first used, so a fresh worker only pays
+# for what it renders.
+
+# ======================== TRACING ========================
+# Each rerun is timed per page and section (see tracing.py). The navigation
+# widget already holds this run's page before the script starts.
+tracing.begin_rerun(st.session_state.get("navigation", "🏠 Dashboard").split(" ", 1)[-1])
+tracing.serve()
 
 # ======================== PAGE CONFIG ========================
 st.set_page_config(
@@ -17,93 +29,10 @@ st.set_page_config(
 )
 
 # ======================== CUSTOM CSS ========================
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600;700&display=swap');
-    
-    * {
-        font-family: 'Poppins', sans-serif;
-    }
-    
-    .stApp {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-    }
-    
-    .metric-card {
-        background: black;
-        padding: 20px;
-        border-radius: 15px;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        transition: transform 0.3s ease;
-    }
-    
-    .metric-card:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 8px 12px rgba(0,0,0,0.2);
-    }
-    
-    .risk-box-high {
-        background: linear-gradient(135deg, #ff6b6b, #ee5a6f);
-        color: white;
-        padding: 30px;
-        border-radius: 20px;
-        text-align: center;
-        box-shadow: 0 8px 16px rgba(255,107,107,0.3);
-        margin: 20px 0;
-    }
-    
-    .risk-box-low {
-        background: linear-gradient(135deg, #51cf66, #38d9a9);
-        color: white;
-        padding: 30px;
-        border-radius: 20px;
-        text-align: center;
-        box-shadow: 0 8px 16px rgba(81,207,102,0.3);
-        margin: 20px 0;
-    }
-    
-    .suggestion-card {
-        background: rgba(255,255,255,0.95);
-        padding: 15px;
-        border-radius: 10px;
-        margin: 10px 0;
-        border-left: 4px solid #667eea;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        transition: transform 0.2s ease;
-    }
-    
-    .suggestion-card:hover {
-        transform: translateX(5px);
-    }
-    
-    .tips-section {
-        background: rgba(255,255,255,0.95);
-        padding: 20px;
-        border-radius: 15px;
-        margin: 15px 0;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-    }
-    
-    h1, h2, h3 {
-        color: white !important;
-    }
-    
-    .stButton>button {
-        background: linear-gradient(135deg, #667eea, #764ba2);
-        color: white;
-        border: none;
-        padding: 12px 30px;
-        border-radius: 25px;
-        font-weight: 600;
-        transition: all 0.3s ease;
-    }
-    
-    .stButton>button:hover {
-        transform: scale(1.05);
-        box-shadow: 0 8px 16px rgba(102,126,234,0.4);
-    }
-</style>
-""", unsafe_allow_html=True)
+# The theme is a static file (static/theme.css, fonts self-hosted), so each
+# rerun only sends a versioned <link> tag and the browser caches the rest.
+with tracing.span("css"):
+    st.markdown(static_theme.theme_tag(), unsafe_allow_html=True)
 
 # ======================== DISEASE INFO ========================
 DISEASE_INFO = {
@@ -288,24 +217,22 @@ HEALTH_TIPS = {
 }
 
 # ======================== LOTTIE ANIMATIONS ========================
-def load_lottie_url(url):
-    try:
-        r = requests.get(url)
-        if r.status_code != 200:
-            return None
-        return r.json()
-    except:
-        return None
+# Served from the bundled/cached copies; anything missing is fetched in the
+# background and appears on a later rerun instead of blocking this one.
+with tracing.span("lottie"):
+    lottie = load_animations()
+lottie_dashboard = lottie["dashboard"]
+lottie_diabetes = lottie["diabetes"]
+lottie_heart = lottie["heart"]
+lottie_brain = lottie["brain"]
+lottie_success = lottie["success"]
 
-lottie_dashboard = load_lottie_url("https://assets5.lottiefiles.com/packages/lf20_5njp3vgg.json")
-lottie_diabetes = load_lottie_url("https://assets2.lottiefiles.com/packages/lf20_tll0j4bb.json")
-lottie_heart = load_lottie_url("https://assets9.lottiefiles.com/packages/lf20_abqysclq.json")
-lottie_brain = load_lottie_url("https://assets4.lottiefiles.com/packages/lf20_rwq6ciql.json")
-lottie_success = load_lottie_url("https://assets4.lottiefiles.com/packages/lf20_auzja8ot.json")
+def st_lottie(*args, **kwargs):
+    from streamlit_lottie import st_lottie as _st_lottie
+    with tracing.span("lottie"):
+        return _st_lottie(*args, **kwargs)
 
 # ======================== SESSION STATE ========================
-if 'reports' not in st.session_state:
-    st.session_state.reports = []
 if 'last_prediction' not in st.session_state:
     st.session_state.last_prediction = None
 if 'show_result' not in st.session_state:
@@ -314,54 +241,275 @@ if 'show_patient_form' not in st.session_state:
     st.session_state.show_patient_form = False
 if 'patient_info' not in st.session_state:
     st.session_state.patient_info = {}
+if 'screening_result' not in st.session_state:
+    st.session_state.screening_result = None
+if 'last_inputs' not in st.session_state:
+    st.session_state.last_inputs = None
+if 'export_job_report' not in st.session_state:
+    st.session_state.export_job_report = None
+if 'export_job_history' not in st.session_state:
+    st.session_state.export_job_history = None
+
+# ======================== REPORT STORE ========================
+# Reports are persisted in SQLite under a random owner token kept in a
+# browser cookie (never in the URL, so a shared link doesn't share the
+# history), so the same history comes back after a refresh. Old ?uid= links
+# are honoured once: their history moves to a fresh token and the uid is
+# dropped from the URL. "New Access Token" on My Reports rotates the token.
+REPORTS_PER_PAGE = 10
+OWNER_COOKIE = "report_owner"
+OWNER_COOKIE_MAX_AGE = 365 * 24 * 3600
+
+@st.cache_resource
+def get_report_store():
+    return ReportStore()
+
+def new_owner_token():
+    return secrets.token_urlsafe(32)
+
+def set_owner_cookie(token):
+    """Store the owner token in a first-party cookie (Streamlit can read cookies but not set them)."""
+    import streamlit.components.v1 as components
+
+    components.html(f"""<script>
+    const secure = window.parent.location.protocol === "https:" ? "; Secure" : "";
+    window.parent.document.cookie = "{OWNER_COOKIE}={token}; Max-Age={OWNER_COOKIE_MAX_AGE}; Path=/; SameSite=Strict" + secure;
+    </script>""", height=0)
+
+report_store = get_report_store()
+if 'owner' not in st.session_state:
+    token = st.context.cookies.get(OWNER_COOKIE)
+    if not isinstance(token, str) or not token:  # no browser cookies, e.g. under AppTest
+        token = new_owner_token()
+        if st.query_params.get("uid"):
+            report_store.reassign(st.query_params["uid"], token)
+        st.session_state.owner_cookie_pending = True
+    st.session_state.owner = token
+if "uid" in st.query_params:
+    del st.query_params["uid"]
+if st.session_state.get("owner_cookie_pending"):
+    set_owner_cookie(st.session_state.owner)
+    st.session_state.owner_cookie_pending = False
+owner = st.session_state.owner
 
 # ======================== LOAD MODELS ========================
+# Models live in $DISEASE_MODEL_DIR (default: next to this script) and are
+# loaded by the page that needs them; the registry is shared by all sessions
+# and picks up replaced .sav files on the next rerun.
 @st.cache_resource
 def load_models():
-    models = {}
+    return ModelRegistry()
+
+def predict_risk(disease, values):
+    """Return (at-risk flag, calibrated risk %) for one patient, or None without a model; the flag is risk % > 50."""
+    from risk_calibration import predict_one
+
     try:
-        with open(r"C:\Users\Swathika\Downloads\Multiple-Disease-Prediction-System-main\Multiple-Disease-Prediction-System-main\Multiple Disease Prediction System\diabetes_model.sav", 'rb') as f:
-            models['diabetes'] = pickle.load(f)
-    except:
-        models['diabetes'] = None
-        st.warning("⚠️ Diabetes model not found. Using demo mode.")
+        with tracing.span("load_models"):
+            entry = load_models().entry(disease)
+    except ModelLoadError as e:
+        st.error(f"⚠️ {e}. This prediction uses demo mode.")
+        return None
+    with tracing.span("predict"):
+        prediction, probability = predict_one(entry, values)
+    return prediction, probability * 100
+
+def render_attributions(disease, values):
+    """Chart the features that moved this patient's score most; skipped without a linear model."""
+    import attributions
     
     try:
-        with open(r"C:\Users\Swathika\Downloads\Multiple-Disease-Prediction-System-main\Multiple-Disease-Prediction-System-main\Multiple Disease Prediction System\heart_disease_model.sav", 'rb') as f:
-            models['heart'] = pickle.load(f)
-    except:
-        models['heart'] = None
-        st.warning("⚠️ Heart disease model not found. Using demo mode.")
+        with tracing.span("load_models"):
+            entry = load_models().entry(disease)
+        with tracing.span("attributions"):
+            contributors = attributions.top_contributors(attributions.explain(entry.model, disease, values))
+    except (ModelLoadError, ValueError):
+        return
+    contributors = [(feature_label(disease, feature), value) for feature, value in contributors]
+    with tracing.span("charts"):
+        st.plotly_chart(figures.chart("attribution_bar", contributors), use_container_width=True)
+    st.caption("Each bar is how far that value moved the model's decision score compared with the average patient "
+               "in the training data, in the model's own units (not percentage points of risk): red bars raise the "
+               "risk, green bars lower it.")
+
+# ======================== WHAT-IF ========================
+# Risk over a grid of two inputs with the rest held at the patient's values,
+# scored by sensitivity.surface in one batched call and cached per input
+# vector. It is its own fragment, so changing the axes reruns only this panel.
+WHATIF_AXES = {"diabetes": ("Glucose", "BMI"), "heart": ("chol", "trestbps"), "parkinsons": ("spread1", "PPE")}
+
+def feature_label(disease, feature):
+    return dict(SCREENING_FIELDS[disease]).get(feature, "🎂 Age" if feature.lower() == "age" else feature)
+
+@st.fragment
+@tracing.traced("what_if")
+def render_what_if(disease, values):
+    import sensitivity
     
     try:
-        with open(r"C:\Users\Swathika\Downloads\Multiple-Disease-Prediction-System-main\Multiple-Disease-Prediction-System-main\Multiple Disease Prediction System\parkinsons_model.sav", 'rb') as f:
-            models['parkinsons'] = pickle.load(f)
-    except:
-        models['parkinsons'] = None
-        st.warning("⚠️ Parkinson's model not found. Using demo mode.")
-    
-    return models
+        with tracing.span("load_models"):
+            entry = load_models().entry(disease)
+    except ModelLoadError:
+        return
+    features = DISEASES[disease]["features"]
+    st.markdown("### 🧭 What If?")
+    st.caption("See how the risk would change if two of the values were different, with everything else kept as entered.")
+    col1, col2 = st.columns(2)
+    axes = {}
+    for col, axis, default in zip((col1, col2), ("Horizontal axis", "Vertical axis"), WHATIF_AXES[disease]):
+        with col:
+            axes[axis] = st.selectbox(axis, features, index=features.index(default),
+                                      format_func=lambda f: feature_label(disease, f), key=f"whatif_{axis}_{disease}")
+    x_feature, y_feature = axes.values()
+    if x_feature == y_feature:
+        st.warning("Pick two different values to compare.")
+        return
+    with tracing.span("what_if_surface"):
+        surface = sensitivity.surface(entry, values, x_feature, y_feature)
+    with tracing.span("charts"):
+        patient = (values[features.index(x_feature)], values[features.index(y_feature)])
+        fig = figures.risk_heatmap(surface, feature_label(disease, x_feature), feature_label(disease, y_feature), patient)
+        st.plotly_chart(fig, use_container_width=True)
+
+# ======================== BULK UPLOAD ========================
+# Uploaded files are scored by bulk_jobs on a background pool; the page only
+# submits the job and polls it from a fragment, so other reruns stay fast.
+def render_bulk_upload(disease):
+    import bulk_jobs
+    
+    st.markdown("### 📂 Score a Whole File")
+    st.caption(f"CSV with the columns {', '.join(DISEASES[disease]['features'])}. "
+               "Any other columns (IDs, names) are copied to the scored file.")
+    upload = st.file_uploader("Upload CSV", type="csv", key=f"bulk_file_{disease}")
+    if upload is not None and st.button("🚀 Score File", key=f"bulk_start_{disease}", use_container_width=True):
+        try:
+            st.session_state[f"bulk_job_{disease}"] = bulk_jobs.submit(load_models(), disease, upload, upload.name).id
+        except ModelLoadError as e:
+            st.error(f"⚠️ {e}")
+    
+    job = bulk_jobs.get(st.session_state.get(f"bulk_job_{disease}"))
+    if job is not None:
+        st.fragment(run_every=None if job.done else 1.0)(bulk_job_status)(job, polling=not job.done)
+
+def bulk_job_status(job, polling):
+    if polling and job.done:
+        st.rerun()  # swap the polling fragment for the final panel
+    
+    if not job.done:
+        st.progress(job.progress, text=f"⏳ Scoring {job.file_name}: {job.rows:,} rows so far ({job.progress:.0%})")
+        if st.button("⏹️ Cancel", key=f"bulk_cancel_{job.id}"):
+            job.cancel()
+    elif job.status == "done":
+        st.success(f"✅ Scored {job.rows:,} rows from {job.file_name} in {job.elapsed:.1f}s")
+    elif job.status == "cancelled":
+        st.warning(f"⏹️ Cancelled after {job.rows:,} rows")
+    else:
+        st.error(f"⚠️ Could not score {job.file_name}: {job.error}")
+    
+    if job.rows:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Rows Scored", f"{job.scored_rows:,}")
+        if job.scored_rows:
+            col2.metric("At Risk", f"{job.positives:,}", f"{job.positives / job.scored_rows:.1%}", delta_color="off")
+            col3.metric("Mean Risk", f"{job.mean_probability * 100:.1f}%")
+        if job.invalid_rows:
+            st.warning(f"⚠️ {job.invalid_rows:,} rows had blank or non-numeric values and were left unscored "
+                       "(empty prediction in the scored file).")
+        st.dataframe(job.preview, use_container_width=True, hide_index=True)
+    
+    if job.status == "done":
+        st.download_button("📥 Download Scored CSV", data=job.read_output, file_name=job.output_file_name(),
+                           mime="text/csv", key=f"bulk_download_{job.id}", use_container_width=True)
+
+# ======================== REPORT EXPORT ========================
+# Exports are rendered by report_export on a background process pool; as with
+# bulk scoring, the page polls the job from a fragment and offers each
+# finished part for download while the rest are still rendering.
+def render_export_job(key):
+    import report_export
+    
+    job = report_export.get(st.session_state.get(key))
+    if job is not None:
+        st.fragment(run_every=None if job.done else 1.0)(export_job_status)(job, polling=not job.done)
+
+def export_job_status(job, polling):
+    import functools
+    import report_export
+    
+    if polling and job.done:
+        st.rerun()  # swap the polling fragment for the final panel
+    
+    if not job.done:
+        st.progress(job.progress, text=f"⏳ Exporting {job.total:,} reports: {job.exported:,} done ({job.progress:.0%})")
+        if st.button("⏹️ Cancel", key=f"export_cancel_{job.id}"):
+            job.cancel()
+    elif job.status == "done":
+        st.success(f"✅ Exported {job.exported:,} report{'s' if job.exported != 1 else ''} in {job.elapsed:.1f}s")
+    elif job.status == "cancelled":
+        st.warning(f"⏹️ Export cancelled after {job.exported:,} reports")
+    else:
+        st.error(f"⚠️ Export failed: {job.error}")
+    
+    if job.status == "done":
+        st.download_button(f"📥 Download {job.output_file_name()}", data=functools.partial(report_export.read, job.output_path),
+                           file_name=job.output_file_name(), mime=job.mime, key=f"export_download_{job.id}",
+                           use_container_width=True)
+    parts = job.finished_parts()
+    if len(parts) > 1 or (parts and not job.done):
+        with st.expander(f"📄 Finished parts ({len(parts)})", expanded=not job.done):
+            for index, path, count in parts:
+                st.download_button(f"📥 {job.part_file_name(index)} ({count:,} reports)",
+                                   data=functools.partial(report_export.read, path), file_name=job.part_file_name(index),
+                                   mime=report_export.FORMATS[job.format]["mime"], key=f"export_part_{job.id}_{index}")
+
+# ======================== SCREENING FORM ========================
+# Inputs of the combined screening page, keyed by CSV column; age is asked
+# once and shared by the diabetes and heart models.
+SCREENING_SECTIONS = {"diabetes": "🩸 Diabetes", "heart": "❤️ Heart Disease", "parkinsons": "🧠 Parkinson's"}
+SCREENING_FIELDS = {
+    "diabetes": [
+        ("Pregnancies", "👶 Number of Pregnancies"), ("Glucose", "🧪 Glucose Level (mg/dL)"),
+        ("BloodPressure", "💓 Blood Pressure (mm Hg)"), ("SkinThickness", "🩹 Skin Thickness (mm)"),
+        ("Insulin", "💉 Insulin Level (mu U/ml)"), ("BMI", "⚖️ BMI"),
+        ("DiabetesPedigreeFunction", "📈 Diabetes Pedigree Function")
+    ],
+    "heart": [
+        ("sex", "👤 Sex (0 = Female, 1 = Male)"), ("cp", "💓 Chest Pain Type"),
+        ("trestbps", "🩺 Resting Blood Pressure"), ("chol", "🧪 Cholesterol"),
+        ("fbs", "🍬 Fasting Blood Sugar > 120 (0/1)"), ("restecg", "🫀 Resting ECG"),
+        ("thalach", "💓 Max Heart Rate"), ("exang", "🏃 Exercise Induced Angina (0/1)"),
+        ("oldpeak", "📉 ST Depression"), ("slope", "📈 ST Slope"),
+        ("ca", "🩻 Major Vessels"), ("thal", "🧬 Thalassemia")
+    ],
+    "parkinsons": [(c, f"🎵 {c}") for c in DISEASES["parkinsons"]["features"]]
+}
 
-models = load_models()
-diabetes_model = models['diabetes']
-heart_disease_model = models['heart']
-parkinsons_model = models['parkinsons']
+# ======================== DASHBOARD DATA ========================
+WEBGL_MIN_POINTS = 1000
+
+@st.cache_data(show_spinner=False)
+def load_dashboard_snapshot(source_hash):
+    return dashboard_analytics.load_snapshot(source_hash)
 
 # ======================== SIDEBAR ========================
-with st.sidebar:
+with st.sidebar, tracing.span("sidebar"):
     st.markdown("<h1 style='text-align: center; color: white;'>AI Disease Prediction System🏥 </h1>", unsafe_allow_html=True)
     st.markdown("---")
     
     choice = st.radio(
         "Navigate to:",
-        ["🏠 Dashboard", "🩸 Diabetes", "❤️ Heart Disease", "🧠 Parkinson's", "📊 My Reports", "💡 Health Tips"],
+        ["🏠 Dashboard", "🩸 Diabetes", "❤️ Heart Disease", "🧠 Parkinson's", "🧪 Full Screening", "📊 My Reports", "💡 Health Tips"],
         key="navigation"
     )
     
     st.markdown("---")
     
-    # Patient Information Form
-    if st.session_state.show_patient_form:
+    # Patient Information Form: a fragment, so saving it reruns only the form
+    @st.fragment
+    @tracing.traced("patient_form")
+    def patient_info_panel():
+        if not st.session_state.show_patient_form:
+            return
         st.markdown("<h3 style='text-align: center; color: white;'>👤 Patient Information</h3>", unsafe_allow_html=True)
         
         with st.form("patient_info_form"):
@@ -397,12 +545,9 @@ with st.sidebar:
                 }
                 
                 if st.session_state.last_prediction:
-                    st.session_state.last_prediction["patient_info"] = st.session_state.patient_info
-                    if st.session_state.reports:
-                        st.session_state.reports[-1]["patient_info"] = st.session_state.patient_info
+                    report_store.set_patient_info(owner, st.session_state.last_prediction, st.session_state.patient_info)
                 
                 st.success("✅ Patient information saved!")
-                st.rerun()
         
         if st.session_state.patient_info.get("name"):
             st.markdown("---")
@@ -419,7 +564,22 @@ with st.sidebar:
         
         st.markdown("---")
     
+    patient_info_panel()
+    
     st.markdown(f"<p style='text-align: center; color: white;'>📅 {datetime.now().strftime('%B %d, %Y')}</p>", unsafe_allow_html=True)
+    
+    # Rerun timings of this server process, for whoever has the admin token
+    if tracing.is_admin(st.query_params.get("admin")):
+        with st.expander("🛠️ Performance (admin)"):
+            import pandas as pd
+            
+            rows = tracing.summary()
+            if rows:
+                st.dataframe(pd.DataFrame(rows).round(2), use_container_width=True, hide_index=True)
+            else:
+                st.caption("No reruns timed yet.")
+            st.download_button("📥 Prometheus metrics", data=tracing.prometheus_text(), file_name="metrics.txt",
+                               mime="text/plain", use_container_width=True)
 
 # ======================== DASHBOARD ========================
 if choice == "🏠 Dashboard":
@@ -433,19 +593,11 @@ if choice == "🏠 Dashboard":
     
     st.markdown("---")
     
-    # Generate synthetic dataset
-    np.random.seed(42)
-    n_samples = 500
-    
-    df = pd.DataFrame({
-        "Age": np.random.randint(20, 80, n_samples),
-        "Glucose": np.random.randint(70, 200, n_samples),
-        "BloodPressure": np.random.randint(60, 140, n_samples),
-        "BMI": np.random.uniform(16, 45, n_samples),
-        "Cholesterol": np.random.randint(150, 300, n_samples),
-        "HeartRate": np.random.randint(60, 120, n_samples),
-        "Disease": np.random.choice(["Diabetes", "Heart Disease", "Parkinson's", "Healthy"], n_samples, p=[0.25, 0.25, 0.15, 0.35])
-    })
+    # Statistics from the bundled datasets, precomputed once per CSV version
+    with tracing.span("analytics"):
+        snapshot = load_dashboard_snapshot(dashboard_analytics.source_hash())
+    datasets = snapshot["datasets"]
+    n_samples = sum(d["rows"] for d in datasets.values())
     
     # Metrics Cards
     st.markdown("## 📊 Health Statistics Overview")
@@ -453,7 +605,7 @@ if choice == "🏠 Dashboard":
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        diabetes_count = (df['Disease'] == 'Diabetes').sum()
+        diabetes_count = datasets["diabetes"]["positives"]
         st.markdown(f"""
         <div class='metric-card'>
             <h2 style='color: #ff6b6b; text-align: center;'>🩸</h2>
@@ -464,7 +616,7 @@ if choice == "🏠 Dashboard":
         """, unsafe_allow_html=True)
     
     with col2:
-        heart_count = (df['Disease'] == 'Heart Disease').sum()
+        heart_count = datasets["heart"]["positives"]
         st.markdown(f"""
         <div class='metric-card'>
             <h2 style='color: #ff6b6b; text-align: center;'>❤️</h2>
@@ -475,7 +627,7 @@ if choice == "🏠 Dashboard":
         """, unsafe_allow_html=True)
     
     with col3:
-        parkinsons_count = (df['Disease'] == "Parkinson's").sum()
+        parkinsons_count = datasets["parkinsons"]["positives"]
         st.markdown(f"""
         <div class='metric-card'>
             <h2 style='color: #ff6b6b; text-align: center;'>🧠</h2>
@@ -486,7 +638,7 @@ if choice == "🏠 Dashboard":
         """, unsafe_allow_html=True)
     
     with col4:
-        healthy_count = (df['Disease'] == 'Healthy').sum()
+        healthy_count = n_samples - diabetes_count - heart_count - parkinsons_count
         st.markdown(f"""
         <div class='metric-card'>
             <h2 style='color: #51cf66; text-align: center;'>✅</h2>
@@ -503,29 +655,28 @@ if choice == "🏠 Dashboard":
     col1, col2 = st.columns(2)
     
     with col1:
-        fig_scatter = px.scatter(
-            df, x="Glucose", y="BMI", color="Disease", size="BloodPressure",
-            color_discrete_map={
-                "Diabetes": "#ff6b6b",
-                "Heart Disease": "#4ecdc4",
-                "Parkinson's": "#a29bfe",
-                "Healthy": "#55efc4"
-            },
-            title="🔍 Glucose vs BMI Analysis",
-            template="plotly_white"
-        )
-        st.plotly_chart(fig_scatter, use_container_width=True)
+        with tracing.span("charts"):
+            fig_scatter = figures.chart("glucose_bmi_scatter", snapshot["scatter"], WEBGL_MIN_POINTS)
+            st.plotly_chart(fig_scatter, use_container_width=True)
     
     with col2:
-        disease_counts = df['Disease'].value_counts()
-        fig_pie = px.pie(
-            values=disease_counts.values,
-            names=disease_counts.index,
-            title="🥧 Disease Distribution",
-            color_discrete_sequence=['#55efc4', '#ff6b6b', '#4ecdc4', '#a29bfe'],
-            hole=0.4
-        )
-        st.plotly_chart(fig_pie, use_container_width=True)
+        with tracing.span("charts"):
+            fig_pie = figures.chart("disease_pie", {"Healthy": healthy_count, "Diabetes": diabetes_count,
+                                                    "Heart Disease": heart_count, "Parkinson's": parkinsons_count})
+            st.plotly_chart(fig_pie, use_container_width=True)
+    
+    st.markdown("## 📉 Feature Distributions")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        dataset = st.selectbox("Dataset", ["diabetes", "heart", "parkinsons"],
+            format_func={"diabetes": "🩸 Diabetes", "heart": "❤️ Heart Disease", "parkinsons": "🧠 Parkinson's"}.get)
+    with col2:
+        feature = st.selectbox("Feature", list(snapshot["distributions"][dataset]))
+    
+    with tracing.span("charts"):
+        fig_hist = figures.chart("feature_histogram", feature, snapshot["distributions"][dataset][feature])
+        st.plotly_chart(fig_hist, use_container_width=True)
 
 # ======================== DIABETES PREDICTION ========================
 elif choice == "🩸 Diabetes":
@@ -537,147 +688,153 @@ elif choice == "🩸 Diabetes":
             st_lottie(lottie_diabetes, height=200, key="diabetes_anim")
     
     st.markdown("---")
-    st.markdown("### 📝 Enter Your Health Parameters")
-    
-    colA, colB = st.columns(2)
-    with colA:
-        pregnancies = st.number_input("👶 Number of Pregnancies", 0, 20, 0)
-        glucose = st.number_input("🧪 Glucose Level (mg/dL)", 0, 500, 120)
-        bp = st.number_input("💓 Blood Pressure (mm Hg)", 0, 300, 70)
-        skin = st.number_input("🩹 Skin Thickness (mm)", 0, 100, 20)
-    
-    with colB:
-        insulin = st.number_input("💉 Insulin Level (mu U/ml)", 0, 1000, 80)
-        bmi = st.number_input("⚖️ BMI", 0.0, 80.0, 26.0, format="%.2f")
-        dpf = st.number_input("📈 Diabetes Pedigree Function", 0.0, 5.0, 0.5, format="%.3f")
-        age = st.number_input("🎂 Age", 1, 120, 30)
-    
-    st.markdown("---")
-    
-    col1, col2, col3 = st.columns([1,1,1])
-    with col2:
-        predict_btn = st.button("🔮 Predict Diabetes Risk", use_container_width=True)
-    
-    if predict_btn:
-        # Demo prediction logic
-        risk_score = min(95, max(5, (glucose/200 + bmi/40 + age/100) * 33 + np.random.uniform(-10, 10)))
-        prediction = 1 if risk_score > 50 else 0
+    tab_single, tab_bulk = st.tabs(["📝 Single Patient", "📂 Bulk Upload"])
+    
+    # The single-patient tab and its result panel are fragments: editing an
+    # input or pressing a result button reruns only that part of the page.
+    @st.fragment
+    @tracing.traced("single_patient")
+    def diabetes_single_patient():
+        st.markdown("### 📝 Enter Your Health Parameters")
+        
+        colA, colB = st.columns(2)
+        with colA:
+            pregnancies = st.number_input("👶 Number of Pregnancies", 0, 20, 0)
+            glucose = st.number_input("🧪 Glucose Level (mg/dL)", 0, 500, 120)
+            bp = st.number_input("💓 Blood Pressure (mm Hg)", 0, 300, 70)
+            skin = st.number_input("🩹 Skin Thickness (mm)", 0, 100, 20)
+        
+        with colB:
+            insulin = st.number_input("💉 Insulin Level (mu U/ml)", 0, 1000, 80)
+            bmi = st.number_input("⚖️ BMI", 0.0, 80.0, 26.0, format="%.2f")
+            dpf = st.number_input("📈 Diabetes Pedigree Function", 0.0, 5.0, 0.5, format="%.3f")
+            age = st.number_input("🎂 Age", 1, 120, 30)
         
-        result_text = "At Risk for Diabetes" if prediction == 1 else "Low Risk - Healthy"
-        risk_level = "HIGH RISK" if risk_score > 50 else "LOW RISK"
+        st.markdown("---")
         
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        st.session_state.last_prediction = {
-            "disease": "Diabetes",
-            "result": result_text,
-            "date": now,
-            "score": risk_score,
-            "risk_level": risk_level,
-            "parameters": {
+        col1, col2, col3 = st.columns([1,1,1])
+        with col2:
+            predict_btn = st.button("🔮 Predict Diabetes Risk", use_container_width=True)
+        
+        if predict_btn:
+            st.session_state.last_inputs = [pregnancies, glucose, bp, skin, insulin, bmi, dpf, age]
+            risk = predict_risk("diabetes", st.session_state.last_inputs)
+            if risk is not None:
+                prediction, risk_score = risk
+            else:
+                # Demo mode (model file missing): fixed heuristic
+                risk_score = min(95, max(5, (glucose/200 + bmi/40 + age/100) * 33))
+                prediction = 1 if risk_score > 50 else 0
+        
+            result_text = "At Risk for Diabetes" if prediction == 1 else "Low Risk - Healthy"
+            risk_level = "HIGH RISK" if prediction == 1 else "LOW RISK"
+        
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            st.session_state.last_prediction = Report("Diabetes", result_text, now, risk_score, risk_level, {
                 "Pregnancies": pregnancies, "Glucose": glucose, "Blood Pressure": bp,
                 "Skin Thickness": skin, "Insulin": insulin, "BMI": bmi,
                 "Diabetes Pedigree": dpf, "Age": age
-            }
-        }
-        st.session_state.reports.append(st.session_state.last_prediction)
-        st.session_state.show_result = True
-        st.session_state.show_patient_form = True
-        st.rerun()
-    
-    # Display Results
-    if st.session_state.show_result and st.session_state.last_prediction and st.session_state.last_prediction["disease"] == "Diabetes":
-        st.markdown("---")
-        st.markdown("## 🎯 Prediction Results")
-        
-        pred = st.session_state.last_prediction
-        
-        col1, col2, col3 = st.columns([1,2,1])
-        with col2:
-            if lottie_success:
-                st_lottie(lottie_success, height=150, key="success_diabetes")
+            })
+            report_store.add(owner, st.session_state.last_prediction)
+            st.session_state.export_job_report = None
+            st.session_state.show_result = True
+            if not st.session_state.show_patient_form:
+                st.session_state.show_patient_form = True
+                st.rerun()  # the sidebar patient form appears, which takes a full run
+        
+        # Display Results
+        @st.fragment
+        @tracing.traced("result_panel")
+        def diabetes_result_panel():
+            if not (st.session_state.show_result and st.session_state.last_prediction and st.session_state.last_prediction.disease == "Diabetes"):
+                return
+            st.markdown("---")
+            st.markdown("## 🎯 Prediction Results")
         
-        if pred["risk_level"] == "HIGH RISK":
-            st.markdown(f"""
-            <div class='risk-box-high'>
-                <h2>⚠️ HIGH RISK DETECTED</h2>
-                <h3>Risk Score: {pred['score']:.1f}%</h3>
-                <p>Please consult with a healthcare professional immediately</p>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown(f"""
-            <div class='risk-box-low'>
-                <h2>✅ LOW RISK</h2>
-                <h3>Risk Score: {pred['score']:.1f}%</h3>
-                <p>Maintain your healthy lifestyle!</p>
-            </div>
-            """, unsafe_allow_html=True)
+            pred = st.session_state.last_prediction
         
-        # Risk Gauge
-        fig_gauge = go.Figure(go.Indicator(
-            mode="gauge+number+delta",
-            value=pred['score'],
-            domain={'x': [0, 1], 'y': [0, 1]},
-            title={'text': "Risk Percentage", 'font': {'size': 24}},
-            delta={'reference': 50},
-            gauge={
-                'axis': {'range': [None, 100]},
-                'bar': {'color': "#667eea"},
-                'steps': [
-                    {'range': [0, 30], 'color': '#55efc4'},
-                    {'range': [30, 70], 'color': '#feca57'},
-                    {'range': [70, 100], 'color': '#ff6b6b'}
-                ],
-                'threshold': {'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': 75}
-            }
-        ))
-        st.plotly_chart(fig_gauge, use_container_width=True)
-        
-        # Recommendations
-        st.markdown("---")
-        st.markdown("## 💡 Personalized Recommendations")
+            col1, col2, col3 = st.columns([1,2,1])
+            with col2:
+                if lottie_success:
+                    st_lottie(lottie_success, height=150, key="success_diabetes")
+        
+            if pred.risk_level == "HIGH RISK":
+                st.markdown(f"""
+                <div class='risk-box-high'>
+                    <h2>⚠️ HIGH RISK DETECTED</h2>
+                    <h3>Risk Score: {pred.score:.1f}%</h3>
+                    <p>Please consult with a healthcare professional immediately</p>
+                </div>
+                """, unsafe_allow_html=True)
+            else:
+                st.markdown(f"""
+                <div class='risk-box-low'>
+                    <h2>✅ LOW RISK</h2>
+                    <h3>Risk Score: {pred.score:.1f}%</h3>
+                    <p>Maintain your healthy lifestyle!</p>
+                </div>
+                """, unsafe_allow_html=True)
+        
+            # Risk Gauge
+            with tracing.span("charts"), figures.gauge("diabetes", pred.score) as fig_gauge:
+                st.plotly_chart(fig_gauge, use_container_width=True)
+            render_attributions("diabetes", st.session_state.last_inputs)
+            render_what_if("diabetes", st.session_state.last_inputs)
+        
+            # Recommendations
+            st.markdown("---")
+            st.markdown("## 💡 Personalized Recommendations")
         
-        disease_key = "Diabetes"
+            disease_key = "Diabetes"
         
-        st.markdown("### 🛡️ Essential Precautions")
-        cols = st.columns(2)
-        for i, precaution in enumerate(DISEASE_INFO[disease_key]["precautions"]):
-            with cols[i % 2]:
-                st.markdown(f"<div class='suggestion-card'>{precaution}</div>", unsafe_allow_html=True)
+            st.markdown("### 🛡️ Essential Precautions")
+            cols = st.columns(2)
+            for i, precaution in enumerate(DISEASE_INFO[disease_key]["precautions"]):
+                with cols[i % 2]:
+                    st.markdown(f"<div class='suggestion-card'>{precaution}</div>", unsafe_allow_html=True)
         
-        st.markdown("### ✅ Recommended Foods")
-        cols = st.columns(3)
-        for i, food in enumerate(DISEASE_INFO[disease_key]["good_foods"]):
-            with cols[i % 3]:
-                st.markdown(f"<div class='suggestion-card' style='border-left-color: #51cf66;'>{food}</div>", unsafe_allow_html=True)
+            st.markdown("### ✅ Recommended Foods")
+            cols = st.columns(3)
+            for i, food in enumerate(DISEASE_INFO[disease_key]["good_foods"]):
+                with cols[i % 3]:
+                    st.markdown(f"<div class='suggestion-card' style='border-left-color: #51cf66;'>{food}</div>", unsafe_allow_html=True)
         
-        st.markdown("### ❌ Foods to Avoid")
-        cols = st.columns(3)
-        for i, food in enumerate(DISEASE_INFO[disease_key]["avoid_foods"]):
-            with cols[i % 3]:
-                st.markdown(f"<div class='suggestion-card' style='border-left-color: #ff6b6b;'>{food}</div>", unsafe_allow_html=True)
+            st.markdown("### ❌ Foods to Avoid")
+            cols = st.columns(3)
+            for i, food in enumerate(DISEASE_INFO[disease_key]["avoid_foods"]):
+                with cols[i % 3]:
+                    st.markdown(f"<div class='suggestion-card' style='border-left-color: #ff6b6b;'>{food}</div>", unsafe_allow_html=True)
         
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("### ✅ Do's")
-            for item in DISEASE_INFO[disease_key]["do"]:
-                st.markdown(f"<div class='suggestion-card' style='background: linear-gradient(135deg, rgba(255,107,107,0.01), rgba(255,107,107,0.05));'>{item}</div>", unsafe_allow_html=True)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("### ✅ Do's")
+                for item in DISEASE_INFO[disease_key]["do"]:
+                    st.markdown(f"<div class='suggestion-card' style='background: linear-gradient(135deg, rgba(255,107,107,0.01), rgba(255,107,107,0.05));'>{item}</div>", unsafe_allow_html=True)
         
-        with col2:
-            st.markdown("### ❌ Don'ts")
-            for item in DISEASE_INFO[disease_key]["dont"]:
-                st.markdown(f"<div class='suggestion-card' style='background: linear-gradient(135deg, rgba(255,107,107,0.1), rgba(255,107,107,0.05));'>{item}</div>", unsafe_allow_html=True)
+            with col2:
+                st.markdown("### ❌ Don'ts")
+                for item in DISEASE_INFO[disease_key]["dont"]:
+                    st.markdown(f"<div class='suggestion-card' style='background: linear-gradient(135deg, rgba(255,107,107,0.1), rgba(255,107,107,0.05));'>{item}</div>", unsafe_allow_html=True)
         
-        st.markdown("---")
-        col1, col2, col3 = st.columns([1,1,1])
-        with col2:
-            if st.button("📄 Generate Report", use_container_width=True):
-                st.success("✅ Report generated! Check 'My Reports' section.")
-        with col3:
-            if st.button("🔄 New Prediction", use_container_width=True):
-                st.session_state.show_result = False
-                st.session_state.show_patient_form = False
-                st.rerun()
+            st.markdown("---")
+            col1, col2, col3 = st.columns([1,1,1])
+            with col2:
+                if st.button("📄 Generate Report", use_container_width=True):
+                    import report_export
+                    st.session_state.export_job_report = report_export.export_report(pred).id
+            with col3:
+                if st.button("🔄 New Prediction", use_container_width=True):
+                    st.session_state.show_result = False
+                    st.session_state.show_patient_form = False
+                    st.rerun()  # also hides the sidebar patient form
+            render_export_job("export_job_report")
+        
+        diabetes_result_panel()
+    
+    with tab_single:
+        diabetes_single_patient()
+    with tab_bulk:
+        render_bulk_upload("diabetes")
 
 # ======================== HEART DISEASE PREDICTION ========================
 elif choice == "❤️ Heart Disease":
@@ -689,153 +846,161 @@ elif choice == "❤️ Heart Disease":
             st_lottie(lottie_heart, height=200, key="heart_anim")
     
     st.markdown("---")
-    st.markdown("### 📝 Enter Your Cardiac Parameters")
-    
-    col1, col2, col3 = st.columns(3)
+    tab_single, tab_bulk = st.tabs(["📝 Single Patient", "📂 Bulk Upload"])
     
-    with col1:
-        age = st.number_input("🎂 Age", 1, 120, 45)
-        sex = st.selectbox("👤 Sex", ["0 - Female", "1 - Male"])
-        cp = st.number_input("💓 Chest Pain Type", 0, 3, 1)
-        trestbps = st.number_input("🩺 Resting Blood Pressure", 50, 200, 120)
-    
-    with col2:
-        chol = st.number_input("🧪 Cholesterol", 100, 600, 200)
-        fbs = st.selectbox("🍬 Fasting Blood Sugar > 120?", ["0 - No", "1 - Yes"])
-        restecg = st.number_input("🫀 Resting ECG", 0, 2, 0)
-        thalach = st.number_input("💓 Max Heart Rate", 60, 220, 150)
-    
-    with col3:
-        exang = st.selectbox("🏃 Exercise Induced Angina", ["0 - No", "1 - Yes"])
-        oldpeak = st.number_input("📉 ST Depression", 0.0, 10.0, 1.0, format="%.1f")
-        slope = st.number_input("📈 ST Slope", 0, 2, 1)
-        ca = st.number_input("🩻 Major Vessels", 0, 3, 0)
-    
-    thal = st.number_input("🧬 Thalassemia", 0, 3, 1)
-    
-    st.markdown("---")
-    
-    col1, col2, col3 = st.columns([1,1,1])
-    with col2:
-        predict_btn = st.button("🔮 Predict Heart Disease Risk", use_container_width=True)
-    
-    if predict_btn:
-        risk_score = min(95, max(5, (age/100 + chol/300 + trestbps/200) * 33 + np.random.uniform(-10, 10)))
-        prediction = 1 if risk_score > 50 else 0
-        
-        result_text = "At Risk for Heart Disease" if prediction == 1 else "Low Risk - Healthy Heart"
-        risk_level = "HIGH RISK" if risk_score > 50 else "LOW RISK"
+    # The single-patient tab and its result panel are fragments: editing an
+    # input or pressing a result button reruns only that part of the page.
+    @st.fragment
+    @tracing.traced("single_patient")
+    def heart_single_patient():
+        st.markdown("### 📝 Enter Your Cardiac Parameters")
         
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        st.session_state.last_prediction = {
-            "disease": "Heart",
-            "result": result_text,
-            "date": now,
-            "score": risk_score,
-            "risk_level": risk_level,
-            "parameters": {
-                "Age": age, "Sex": sex, "Chest Pain": cp, "Resting BP": trestbps,
-                "Cholesterol": chol, "Fasting BS": fbs, "Max HR": thalach
-            }
-        }
-        st.session_state.reports.append(st.session_state.last_prediction)
-        st.session_state.show_result = True
-        st.session_state.show_patient_form = True
-        st.rerun()
-    
-    # Display Results
-    if st.session_state.show_result and st.session_state.last_prediction and st.session_state.last_prediction["disease"] == "Heart":
-        st.markdown("---")
-        st.markdown("## 🎯 Prediction Results")
+        col1, col2, col3 = st.columns(3)
         
-        pred = st.session_state.last_prediction
+        with col1:
+            age = st.number_input("🎂 Age", 1, 120, 45)
+            sex = st.selectbox("👤 Sex", ["0 - Female", "1 - Male"])
+            cp = st.number_input("💓 Chest Pain Type", 0, 3, 1)
+            trestbps = st.number_input("🩺 Resting Blood Pressure", 50, 200, 120)
         
-        col1, col2, col3 = st.columns([1,2,1])
         with col2:
-            if lottie_success:
-                st_lottie(lottie_success, height=150, key="success_heart")
+            chol = st.number_input("🧪 Cholesterol", 100, 600, 200)
+            fbs = st.selectbox("🍬 Fasting Blood Sugar > 120?", ["0 - No", "1 - Yes"])
+            restecg = st.number_input("🫀 Resting ECG", 0, 2, 0)
+            thalach = st.number_input("💓 Max Heart Rate", 60, 220, 150)
         
-        if pred["risk_level"] == "HIGH RISK":
-            st.markdown(f"""
-            <div class='risk-box-high'>
-                <h2>⚠️ HIGH RISK DETECTED</h2>
-                <h3>Risk Score: {pred['score']:.1f}%</h3>
-                <p>Immediate consultation with a cardiologist recommended</p>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown(f"""
-            <div class='risk-box-low'>
-                <h2>✅ LOW RISK</h2>
-                <h3>Risk Score: {pred['score']:.1f}%</h3>
-                <p>Keep up with your heart-healthy lifestyle!</p>
-            </div>
-            """, unsafe_allow_html=True)
+        with col3:
+            exang = st.selectbox("🏃 Exercise Induced Angina", ["0 - No", "1 - Yes"])
+            oldpeak = st.number_input("📉 ST Depression", 0.0, 10.0, 1.0, format="%.1f")
+            slope = st.number_input("📈 ST Slope", 0, 2, 1)
+            ca = st.number_input("🩻 Major Vessels", 0, 3, 0)
+        
+        thal = st.number_input("🧬 Thalassemia", 0, 3, 1)
         
-        fig_gauge = go.Figure(go.Indicator(
-            mode="gauge+number+delta",
-            value=pred['score'],
-            domain={'x': [0, 1], 'y': [0, 1]},
-            title={'text': "Cardiac Risk Score", 'font': {'size': 24}},
-            delta={'reference': 50},
-            gauge={
-                'axis': {'range': [None, 100]},
-                'bar': {'color': "#667eea"},
-                'steps': [
-                    {'range': [0, 30], 'color': '#55efc4'},
-                    {'range': [30, 70], 'color': '#feca57'},
-                    {'range': [70, 100], 'color': '#ff6b6b'}
-                ],
-                'threshold': {'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': 75}
-            }
-        ))
-        st.plotly_chart(fig_gauge, use_container_width=True)
-        
-        # Recommendations
         st.markdown("---")
-        st.markdown("## 💡 Personalized Cardiac Care Recommendations")
         
-        disease_key = "Heart"
+        col1, col2, col3 = st.columns([1,1,1])
+        with col2:
+            predict_btn = st.button("🔮 Predict Heart Disease Risk", use_container_width=True)
+        
+        if predict_btn:
+            st.session_state.last_inputs = [age, int(sex[0]), cp, trestbps, chol, int(fbs[0]), restecg, thalach,
+                                            int(exang[0]), oldpeak, slope, ca, thal]
+            risk = predict_risk("heart", st.session_state.last_inputs)
+            if risk is not None:
+                prediction, risk_score = risk
+            else:
+                # Demo mode (model file missing): fixed heuristic
+                risk_score = min(95, max(5, (age/100 + chol/300 + trestbps/200) * 33))
+                prediction = 1 if risk_score > 50 else 0
+        
+            result_text = "At Risk for Heart Disease" if prediction == 1 else "Low Risk - Healthy Heart"
+            risk_level = "HIGH RISK" if prediction == 1 else "LOW RISK"
+        
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            st.session_state.last_prediction = Report("Heart", result_text, now, risk_score, risk_level, {
+                "Age": age, "Sex": sex, "Chest Pain": cp, "Resting BP": trestbps,
+                "Cholesterol": chol, "Fasting BS": fbs, "Max HR": thalach
+            })
+            report_store.add(owner, st.session_state.last_prediction)
+            st.session_state.export_job_report = None
+            st.session_state.show_result = True
+            if not st.session_state.show_patient_form:
+                st.session_state.show_patient_form = True
+                st.rerun()  # the sidebar patient form appears, which takes a full run
+        
+        # Display Results
+        @st.fragment
+        @tracing.traced("result_panel")
+        def heart_result_panel():
+            if not (st.session_state.show_result and st.session_state.last_prediction and st.session_state.last_prediction.disease == "Heart"):
+                return
+            st.markdown("---")
+            st.markdown("## 🎯 Prediction Results")
+        
+            pred = st.session_state.last_prediction
         
-        st.markdown("### 🛡️ Essential Precautions")
-        cols = st.columns(2)
-        for i, precaution in enumerate(DISEASE_INFO[disease_key]["precautions"]):
-            with cols[i % 2]:
-                st.markdown(f"<div class='suggestion-card'>{precaution}</div>", unsafe_allow_html=True)
+            col1, col2, col3 = st.columns([1,2,1])
+            with col2:
+                if lottie_success:
+                    st_lottie(lottie_success, height=150, key="success_heart")
+        
+            if pred.risk_level == "HIGH RISK":
+                st.markdown(f"""
+                <div class='risk-box-high'>
+                    <h2>⚠️ HIGH RISK DETECTED</h2>
+                    <h3>Risk Score: {pred.score:.1f}%</h3>
+                    <p>Immediate consultation with a cardiologist recommended</p>
+                </div>
+                """, unsafe_allow_html=True)
+            else:
+                st.markdown(f"""
+                <div class='risk-box-low'>
+                    <h2>✅ LOW RISK</h2>
+                    <h3>Risk Score: {pred.score:.1f}%</h3>
+                    <p>Keep up with your heart-healthy lifestyle!</p>
+                </div>
+                """, unsafe_allow_html=True)
+        
+            with tracing.span("charts"), figures.gauge("heart", pred.score) as fig_gauge:
+                st.plotly_chart(fig_gauge, use_container_width=True)
+            render_attributions("heart", st.session_state.last_inputs)
+            render_what_if("heart", st.session_state.last_inputs)
+        
+            # Recommendations
+            st.markdown("---")
+            st.markdown("## 💡 Personalized Cardiac Care Recommendations")
         
-        st.markdown("### ✅ Heart-Healthy Foods")
-        cols = st.columns(3)
-        for i, food in enumerate(DISEASE_INFO[disease_key]["good_foods"]):
-            with cols[i % 3]:
-                st.markdown(f"<div class='suggestion-card' style='border-left-color: #51cf66;'>{food}</div>", unsafe_allow_html=True)
+            disease_key = "Heart"
         
-        st.markdown("### ❌ Foods to Avoid")
-        cols = st.columns(3)
-        for i, food in enumerate(DISEASE_INFO[disease_key]["avoid_foods"]):
-            with cols[i % 3]:
-                st.markdown(f"<div class='suggestion-card' style='border-left-color: #ff6b6b;'>{food}</div>", unsafe_allow_html=True)
+            st.markdown("### 🛡️ Essential Precautions")
+            cols = st.columns(2)
+            for i, precaution in enumerate(DISEASE_INFO[disease_key]["precautions"]):
+                with cols[i % 2]:
+                    st.markdown(f"<div class='suggestion-card'>{precaution}</div>", unsafe_allow_html=True)
         
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("### ✅ Do's")
-            for item in DISEASE_INFO[disease_key]["do"]:
-                st.markdown(f"<div class='suggestion-card' style='background: linear-gradient(135deg, rgba(81,207,102,0.1), rgba(81,207,102,0.05));'>{item}</div>", unsafe_allow_html=True)
+            st.markdown("### ✅ Heart-Healthy Foods")
+            cols = st.columns(3)
+            for i, food in enumerate(DISEASE_INFO[disease_key]["good_foods"]):
+                with cols[i % 3]:
+                    st.markdown(f"<div class='suggestion-card' style='border-left-color: #51cf66;'>{food}</div>", unsafe_allow_html=True)
         
-        with col2:
-            st.markdown("### ❌ Don'ts")
-            for item in DISEASE_INFO[disease_key]["dont"]:
-                st.markdown(f"<div class='suggestion-card' style='background: linear-gradient(135deg, rgba(255,107,107,0.1), rgba(255,107,107,0.05));'>{item}</div>", unsafe_allow_html=True)
+            st.markdown("### ❌ Foods to Avoid")
+            cols = st.columns(3)
+            for i, food in enumerate(DISEASE_INFO[disease_key]["avoid_foods"]):
+                with cols[i % 3]:
+                    st.markdown(f"<div class='suggestion-card' style='border-left-color: #ff6b6b;'>{food}</div>", unsafe_allow_html=True)
         
-        st.markdown("---")
-        col1, col2, col3 = st.columns([1,1,1])
-        with col2:
-            if st.button("📄 Generate Report", use_container_width=True):
-                st.success("✅ Report generated! Check 'My Reports' section.")
-        with col3:
-            if st.button("🔄 New Prediction", use_container_width=True):
-                st.session_state.show_result = False
-                st.session_state.show_patient_form = False
-                st.rerun()
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("### ✅ Do's")
+                for item in DISEASE_INFO[disease_key]["do"]:
+                    st.markdown(f"<div class='suggestion-card' style='background: linear-gradient(135deg, rgba(81,207,102,0.1), rgba(81,207,102,0.05));'>{item}</div>", unsafe_allow_html=True)
+        
+            with col2:
+                st.markdown("### ❌ Don'ts")
+                for item in DISEASE_INFO[disease_key]["dont"]:
+                    st.markdown(f"<div class='suggestion-card' style='background: linear-gradient(135deg, rgba(255,107,107,0.1), rgba(255,107,107,0.05));'>{item}</div>", unsafe_allow_html=True)
+        
+            st.markdown("---")
+            col1, col2, col3 = st.columns([1,1,1])
+            with col2:
+                if st.button("📄 Generate Report", use_container_width=True):
+                    import report_export
+                    st.session_state.export_job_report = report_export.export_report(pred).id
+            with col3:
+                if st.button("🔄 New Prediction", use_container_width=True):
+                    st.session_state.show_result = False
+                    st.session_state.show_patient_form = False
+                    st.rerun()  # also hides the sidebar patient form
+            render_export_job("export_job_report")
+        
+        heart_result_panel()
+    
+    with tab_single:
+        heart_single_patient()
+    with tab_bulk:
+        render_bulk_upload("heart")
 
 # ======================== PARKINSON'S PREDICTION ========================
 elif choice == "🧠 Parkinson's":
@@ -847,187 +1012,263 @@ elif choice == "🧠 Parkinson's":
             st_lottie(lottie_brain, height=200, key="parkinsons_anim")
     
     st.markdown("---")
-    st.markdown("### 📝 Enter Voice Analysis Parameters")
-    st.info("ℹ️ These parameters are typically obtained through voice analysis tests")
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        fo = st.number_input("🎵 MDVP:Fo(Hz)", 50.0, 300.0, 150.0, format="%.3f")
-        fhi = st.number_input("🎵 MDVP:Fhi(Hz)", 80.0, 600.0, 200.0, format="%.3f")
-        flo = st.number_input("🎵 MDVP:Flo(Hz)", 50.0, 250.0, 100.0, format="%.3f")
-        jitter_percent = st.number_input("📊 MDVP:Jitter(%)", 0.0, 1.0, 0.005, format="%.5f")
-        jitter_abs = st.number_input("📊 MDVP:Jitter(Abs)", 0.0, 0.01, 0.00003, format="%.8f")
-    
-    with col2:
-        rap = st.number_input("📊 MDVP:RAP", 0.0, 0.1, 0.003, format="%.5f")
-        ppq = st.number_input("📊 MDVP:PPQ", 0.0, 0.1, 0.003, format="%.5f")
-        ddp = st.number_input("📊 Jitter:DDP", 0.0, 0.1, 0.009, format="%.5f")
-        shimmer = st.number_input("📈 MDVP:Shimmer", 0.0, 1.0, 0.03, format="%.5f")
-        shimmer_db = st.number_input("📈 MDVP:Shimmer(dB)", 0.0, 2.0, 0.3, format="%.3f")
-    
-    with col3:
-        apq3 = st.number_input("📈 Shimmer:APQ3", 0.0, 0.1, 0.015, format="%.5f")
-        apq5 = st.number_input("📈 Shimmer:APQ5", 0.0, 0.1, 0.017, format="%.5f")
-        apq = st.number_input("📈 MDVP:APQ", 0.0, 0.2, 0.024, format="%.5f")
-        dda = st.number_input("📈 Shimmer:DDA", 0.0, 0.2, 0.045, format="%.5f")
-        nhr = st.number_input("🔊 NHR", 0.0, 1.0, 0.025, format="%.5f")
-    
-    with col4:
-        hnr = st.number_input("🔊 HNR", 0.0, 50.0, 21.0, format="%.3f")
-        rpde = st.number_input("🌀 RPDE", 0.0, 1.0, 0.5, format="%.6f")
-        dfa = st.number_input("🌀 DFA", 0.0, 1.0, 0.7, format="%.6f")
-        spread1 = st.number_input("📡 Spread1", -10.0, 0.0, -5.0, format="%.6f")
-        spread2 = st.number_input("📡 Spread2", 0.0, 1.0, 0.2, format="%.6f")
-    
-    d2 = st.number_input("🎯 D2", 0.0, 5.0, 2.5, format="%.6f")
-    ppe = st.number_input("🎯 PPE", 0.0, 1.0, 0.2, format="%.6f")
-    
-    st.markdown("---")
+    tab_single, tab_bulk = st.tabs(["📝 Single Patient", "📂 Bulk Upload"])
     
-    col1, col2, col3 = st.columns([1,1,1])
-    with col2:
-        predict_btn = st.button("🔮 Predict Parkinson's Risk", use_container_width=True)
-    
-    if predict_btn:
-        risk_score = min(95, max(5, (jitter_percent*1000 + shimmer*100 + nhr*50) + np.random.uniform(-10, 10)))
-        prediction = 1 if risk_score > 50 else 0
+    # The single-patient tab and its result panel are fragments: editing an
+    # input or pressing a result button reruns only that part of the page.
+    @st.fragment
+    @tracing.traced("single_patient")
+    def parkinsons_single_patient():
+        st.markdown("### 📝 Enter Voice Analysis Parameters")
+        st.info("ℹ️ These parameters are typically obtained through voice analysis tests")
         
-        result_text = "At Risk for Parkinson's Disease" if prediction == 1 else "Low Risk - Healthy"
-        risk_level = "HIGH RISK" if risk_score > 50 else "LOW RISK"
+        col1, col2, col3, col4 = st.columns(4)
         
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        st.session_state.last_prediction = {
-            "disease": "Parkinsons",
-            "result": result_text,
-            "date": now,
-            "score": risk_score,
-            "risk_level": risk_level,
-            "parameters": {
+        with col1:
+            fo = st.number_input("🎵 MDVP:Fo(Hz)", 50.0, 300.0, 150.0, format="%.3f")
+            fhi = st.number_input("🎵 MDVP:Fhi(Hz)", 80.0, 600.0, 200.0, format="%.3f")
+            flo = st.number_input("🎵 MDVP:Flo(Hz)", 50.0, 250.0, 100.0, format="%.3f")
+            jitter_percent = st.number_input("📊 MDVP:Jitter(%)", 0.0, 1.0, 0.005, format="%.5f")
+            jitter_abs = st.number_input("📊 MDVP:Jitter(Abs)", 0.0, 0.01, 0.00003, format="%.8f")
+        
+        with col2:
+            rap = st.number_input("📊 MDVP:RAP", 0.0, 0.1, 0.003, format="%.5f")
+            ppq = st.number_input("📊 MDVP:PPQ", 0.0, 0.1, 0.003, format="%.5f")
+            ddp = st.number_input("📊 Jitter:DDP", 0.0, 0.1, 0.009, format="%.5f")
+            shimmer = st.number_input("📈 MDVP:Shimmer", 0.0, 1.0, 0.03, format="%.5f")
+            shimmer_db = st.number_input("📈 MDVP:Shimmer(dB)", 0.0, 2.0, 0.3, format="%.3f")
+        
+        with col3:
+            apq3 = st.number_input("📈 Shimmer:APQ3", 0.0, 0.1, 0.015, format="%.5f")
+            apq5 = st.number_input("📈 Shimmer:APQ5", 0.0, 0.1, 0.017, format="%.5f")
+            apq = st.number_input("📈 MDVP:APQ", 0.0, 0.2, 0.024, format="%.5f")
+            dda = st.number_input("📈 Shimmer:DDA", 0.0, 0.2, 0.045, format="%.5f")
+            nhr = st.number_input("🔊 NHR", 0.0, 1.0, 0.025, format="%.5f")
+        
+        with col4:
+            hnr = st.number_input("🔊 HNR", 0.0, 50.0, 21.0, format="%.3f")
+            rpde = st.number_input("🌀 RPDE", 0.0, 1.0, 0.5, format="%.6f")
+            dfa = st.number_input("🌀 DFA", 0.0, 1.0, 0.7, format="%.6f")
+            spread1 = st.number_input("📡 Spread1", -10.0, 0.0, -5.0, format="%.6f")
+            spread2 = st.number_input("📡 Spread2", 0.0, 1.0, 0.2, format="%.6f")
+        
+        d2 = st.number_input("🎯 D2", 0.0, 5.0, 2.5, format="%.6f")
+        ppe = st.number_input("🎯 PPE", 0.0, 1.0, 0.2, format="%.6f")
+        
+        st.markdown("---")
+        
+        col1, col2, col3 = st.columns([1,1,1])
+        with col2:
+            predict_btn = st.button("🔮 Predict Parkinson's Risk", use_container_width=True)
+        
+        if predict_btn:
+            st.session_state.last_inputs = [fo, fhi, flo, jitter_percent, jitter_abs, rap, ppq, ddp,
+                                            shimmer, shimmer_db, apq3, apq5, apq, dda, nhr, hnr,
+                                            rpde, dfa, spread1, spread2, d2, ppe]
+            risk = predict_risk("parkinsons", st.session_state.last_inputs)
+            if risk is not None:
+                prediction, risk_score = risk
+            else:
+                # Demo mode (model file missing): fixed heuristic
+                risk_score = min(95, max(5, jitter_percent*1000 + shimmer*100 + nhr*50))
+                prediction = 1 if risk_score > 50 else 0
+        
+            result_text = "At Risk for Parkinson's Disease" if prediction == 1 else "Low Risk - Healthy"
+            risk_level = "HIGH RISK" if prediction == 1 else "LOW RISK"
+        
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            st.session_state.last_prediction = Report("Parkinsons", result_text, now, risk_score, risk_level, {
                 "MDVP:Fo": fo, "MDVP:Fhi": fhi, "MDVP:Flo": flo,
                 "Jitter%": jitter_percent, "Shimmer": shimmer, "HNR": hnr
-            }
-        }
-        st.session_state.reports.append(st.session_state.last_prediction)
-        st.session_state.show_result = True
-        st.session_state.show_patient_form = True
-        st.rerun()
-    
-    # Display Results
-    if st.session_state.show_result and st.session_state.last_prediction and st.session_state.last_prediction["disease"] == "Parkinsons":
-        st.markdown("---")
-        st.markdown("## 🎯 Prediction Results")
+            })
+            report_store.add(owner, st.session_state.last_prediction)
+            st.session_state.export_job_report = None
+            st.session_state.show_result = True
+            if not st.session_state.show_patient_form:
+                st.session_state.show_patient_form = True
+                st.rerun()  # the sidebar patient form appears, which takes a full run
+        
+        # Display Results
+        @st.fragment
+        @tracing.traced("result_panel")
+        def parkinsons_result_panel():
+            if not (st.session_state.show_result and st.session_state.last_prediction and st.session_state.last_prediction.disease == "Parkinsons"):
+                return
+            st.markdown("---")
+            st.markdown("## 🎯 Prediction Results")
         
-        pred = st.session_state.last_prediction
+            pred = st.session_state.last_prediction
         
-        col1, col2, col3 = st.columns([1,2,1])
-        with col2:
-            if lottie_success:
-                st_lottie(lottie_success, height=150, key="success_parkinsons")
+            col1, col2, col3 = st.columns([1,2,1])
+            with col2:
+                if lottie_success:
+                    st_lottie(lottie_success, height=150, key="success_parkinsons")
+        
+            if pred.risk_level == "HIGH RISK":
+                st.markdown(f"""
+                <div class='risk-box-high'>
+                    <h2>⚠️ HIGH RISK DETECTED</h2>
+                    <h3>Risk Score: {pred.score:.1f}%</h3>
+                    <p>Consult a neurologist for comprehensive evaluation</p>
+                </div>
+                """, unsafe_allow_html=True)
+            else:
+                st.markdown(f"""
+                <div class='risk-box-low'>
+                    <h2>✅ LOW RISK</h2>
+                    <h3>Risk Score: {pred.score:.1f}%</h3>
+                    <p>Continue maintaining brain health!</p>
+                </div>
+                """, unsafe_allow_html=True)
+        
+            with tracing.span("charts"), figures.gauge("parkinsons", pred.score) as fig_gauge:
+                st.plotly_chart(fig_gauge, use_container_width=True)
+            render_attributions("parkinsons", st.session_state.last_inputs)
+            render_what_if("parkinsons", st.session_state.last_inputs)
+        
+            # Recommendations
+            st.markdown("---")
+            st.markdown("## 💡 Personalized Neurological Care Recommendations")
         
-        if pred["risk_level"] == "HIGH RISK":
-            st.markdown(f"""
-            <div class='risk-box-high'>
-                <h2>⚠️ HIGH RISK DETECTED</h2>
-                <h3>Risk Score: {pred['score']:.1f}%</h3>
-                <p>Consult a neurologist for comprehensive evaluation</p>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown(f"""
-            <div class='risk-box-low'>
-                <h2>✅ LOW RISK</h2>
-                <h3>Risk Score: {pred['score']:.1f}%</h3>
-                <p>Continue maintaining brain health!</p>
-            </div>
-            """, unsafe_allow_html=True)
+            disease_key = "Parkinsons"
         
-        fig_gauge = go.Figure(go.Indicator(
-            mode="gauge+number+delta",
-            value=pred['score'],
-            domain={'x': [0, 1], 'y': [0, 1]},
-            title={'text': "Neurological Risk Score", 'font': {'size': 24}},
-            delta={'reference': 50},
-            gauge={
-                'axis': {'range': [None, 100]},
-                'bar': {'color': "#a29bfe"},
-                'steps': [
-                    {'range': [0, 30], 'color': '#55efc4'},
-                    {'range': [30, 70], 'color': '#feca57'},
-                    {'range': [70, 100], 'color': '#ff6b6b'}
-                ],
-                'threshold': {'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': 75}
-            }
-        ))
-        st.plotly_chart(fig_gauge, use_container_width=True)
-        
-        # Recommendations
-        st.markdown("---")
-        st.markdown("## 💡 Personalized Neurological Care Recommendations")
+            st.markdown("### 🛡️ Essential Precautions")
+            cols = st.columns(2)
+            for i, precaution in enumerate(DISEASE_INFO[disease_key]["precautions"]):
+                with cols[i % 2]:
+                    st.markdown(f"<div class='suggestion-card'>{precaution}</div>", unsafe_allow_html=True)
+        
+            st.markdown("### ✅ Brain-Healthy Foods")
+            cols = st.columns(3)
+            for i, food in enumerate(DISEASE_INFO[disease_key]["good_foods"]):
+                with cols[i % 3]:
+                    st.markdown(f"<div class='suggestion-card' style='border-left-color: #51cf66;'>{food}</div>", unsafe_allow_html=True)
         
-        disease_key = "Parkinsons"
+            st.markdown("### ❌ Foods to Avoid")
+            cols = st.columns(3)
+            for i, food in enumerate(DISEASE_INFO[disease_key]["avoid_foods"]):
+                with cols[i % 3]:
+                    st.markdown(f"<div class='suggestion-card' style='border-left-color: #ff6b6b;'>{food}</div>", unsafe_allow_html=True)
         
-        st.markdown("### 🛡️ Essential Precautions")
-        cols = st.columns(2)
-        for i, precaution in enumerate(DISEASE_INFO[disease_key]["precautions"]):
-            with cols[i % 2]:
-                st.markdown(f"<div class='suggestion-card'>{precaution}</div>", unsafe_allow_html=True)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("### ✅ Do's")
+                for item in DISEASE_INFO[disease_key]["do"]:
+                    st.markdown(f"<div class='suggestion-card' style='background: linear-gradient(135deg, rgba(81,207,102,0.1), rgba(81,207,102,0.05));'>{item}</div>", unsafe_allow_html=True)
         
-        st.markdown("### ✅ Brain-Healthy Foods")
-        cols = st.columns(3)
-        for i, food in enumerate(DISEASE_INFO[disease_key]["good_foods"]):
-            with cols[i % 3]:
-                st.markdown(f"<div class='suggestion-card' style='border-left-color: #51cf66;'>{food}</div>", unsafe_allow_html=True)
+            with col2:
+                st.markdown("### ❌ Don'ts")
+                for item in DISEASE_INFO[disease_key]["dont"]:
+                    st.markdown(f"<div class='suggestion-card' style='background: linear-gradient(135deg, rgba(255,107,107,0.1), rgba(255,107,107,0.05));'>{item}</div>", unsafe_allow_html=True)
         
-        st.markdown("### ❌ Foods to Avoid")
-        cols = st.columns(3)
-        for i, food in enumerate(DISEASE_INFO[disease_key]["avoid_foods"]):
-            with cols[i % 3]:
-                st.markdown(f"<div class='suggestion-card' style='border-left-color: #ff6b6b;'>{food}</div>", unsafe_allow_html=True)
+            st.markdown("---")
+            col1, col2, col3 = st.columns([1,1,1])
+            with col2:
+                if st.button("📄 Generate Report", use_container_width=True):
+                    import report_export
+                    st.session_state.export_job_report = report_export.export_report(pred).id
+            with col3:
+                if st.button("🔄 New Prediction", use_container_width=True):
+                    st.session_state.show_result = False
+                    st.session_state.show_patient_form = False
+                    st.rerun()  # also hides the sidebar patient form
+            render_export_job("export_job_report")
+        
+        parkinsons_result_panel()
+    
+    with tab_single:
+        parkinsons_single_patient()
+    with tab_bulk:
+        render_bulk_upload("parkinsons")
+
+# ======================== FULL SCREENING ========================
+elif choice == "🧪 Full Screening":
+    from screening import screen
+    
+    st.markdown("<h1 style='text-align: center;'>🧪 Full Health Screening</h1>", unsafe_allow_html=True)
+    st.info("ℹ️ Fill in what you know. Every model whose inputs are complete is scored at once; leave a section blank to skip it.")
+    
+    with st.form("screening_form"):
+        st.markdown("### 👤 General")
+        screening_age = st.number_input("🎂 Age", 1, 120, value=None)
         
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("### ✅ Do's")
-            for item in DISEASE_INFO[disease_key]["do"]:
-                st.markdown(f"<div class='suggestion-card' style='background: linear-gradient(135deg, rgba(81,207,102,0.1), rgba(81,207,102,0.05));'>{item}</div>", unsafe_allow_html=True)
+        for disease, fields in SCREENING_FIELDS.items():
+            with st.expander(SCREENING_SECTIONS[disease], expanded=disease != "parkinsons"):
+                cols = st.columns(3)
+                for i, (column, label) in enumerate(fields):
+                    with cols[i % 3]:
+                        st.number_input(label, value=None, format="%.5f" if disease == "parkinsons" else "%g",
+                                        key=f"screen_{column}")
         
-        with col2:
-            st.markdown("### ❌ Don'ts")
-            for item in DISEASE_INFO[disease_key]["dont"]:
-                st.markdown(f"<div class='suggestion-card' style='background: linear-gradient(135deg, rgba(255,107,107,0.1), rgba(255,107,107,0.05));'>{item}</div>", unsafe_allow_html=True)
+        run_screening = st.form_submit_button("🔮 Run Full Screening", use_container_width=True)
+    
+    if run_screening:
+        record = {column: st.session_state[f"screen_{column}"]
+                  for fields in SCREENING_FIELDS.values() for column, _ in fields}
+        record["Age"] = record["age"] = screening_age
+        result = screen(load_models(), record)
         
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for disease, risk in result.risks.items():
+            report_store.add(owner, Report(
+                risk.label, risk.result, now, risk.probability * 100,
+                "HIGH RISK" if risk.prediction == 1 else "LOW RISK",
+                {c: record[c] for c in DISEASES[disease]["features"]},
+            ))
+        st.session_state.screening_result = result
+    
+    result = st.session_state.screening_result
+    if result is not None:
         st.markdown("---")
-        col1, col2, col3 = st.columns([1,1,1])
-        with col2:
-            if st.button("📄 Generate Report", use_container_width=True):
-                st.success("✅ Report generated! Check 'My Reports' section.")
-        with col3:
-            if st.button("🔄 New Prediction", use_container_width=True):
-                st.session_state.show_result = False
-                st.session_state.show_patient_form = False
-                st.rerun()
+        st.markdown("## 🎯 Screening Results")
+        
+        if result.risks:
+            cols = st.columns(len(result.risks))
+            for col, risk in zip(cols, result.risks.values()):
+                with col:
+                    box = "risk-box-high" if risk.prediction == 1 else "risk-box-low"
+                    st.markdown(f"""
+                    <div class='{box}'>
+                        <h3>{SCREENING_SECTIONS[risk.disease]}</h3>
+                        <h2>{risk.probability * 100:.1f}%</h2>
+                        <p>{risk.result}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+        for disease, missing in result.skipped.items():
+            st.info(f"⏭️ {SCREENING_SECTIONS[disease]} skipped — missing {len(missing)} of {len(DISEASES[disease]['features'])} inputs")
+        for disease, error in result.errors.items():
+            st.error(f"⚠️ {error}")
+        st.caption(f"Scored {len(result.risks)} model(s) in {result.elapsed_ms:.1f} ms")
 
 # ======================== MY REPORTS ========================
 elif choice == "📊 My Reports":
+    import pandas as pd
+    
     st.markdown("<h1 style='text-align: center;'>📊 My Health Reports Dashboard</h1>", unsafe_allow_html=True)
     st.markdown("---")
     
-    if len(st.session_state.reports) == 0:
-        st.info("📭 No reports generated yet. Make a prediction to see your reports here!")
-        col1, col2, col3 = st.columns([1,2,1])
-        with col2:
-            st.image("https://img.icons8.com/clouds/400/000000/empty-box.png", width=300)
-    else:
+    # The report list is a fragment: paging, opening a report and clearing
+    # the history rerun only this part of the page.
+    @st.fragment
+    @tracing.traced("report_list")
+    def report_list():
+        with tracing.span("reports"):
+            total_reports = report_store.count(owner)
+        
+        if total_reports == 0:
+            st.info("📭 No reports generated yet. Make a prediction to see your reports here!")
+            col1, col2, col3 = st.columns([1,2,1])
+            with col2:
+                st.image("https://img.icons8.com/clouds/400/000000/empty-box.png", width=300)
+            return
+        
         # Summary Statistics
         st.markdown("## 📈 Summary Statistics")
         
         col1, col2, col3, col4 = st.columns(4)
         
-        total_reports = len(st.session_state.reports)
-        disease_counts = {}
-        for report in st.session_state.reports:
-            disease = report["disease"]
-            disease_counts[disease] = disease_counts.get(disease, 0) + 1
+        with tracing.span("reports"):
+            disease_counts = {disease: count for disease, (count, _) in report_store.summary(owner).items()}
         
         with col1:
             st.markdown(f"""
@@ -1072,102 +1313,112 @@ elif choice == "📊 My Reports":
         
         with col1:
             if disease_counts:
-                fig_pie = px.pie(
-                    names=list(disease_counts.keys()),
-                    values=list(disease_counts.values()),
-                    title="Tests by Disease Type",
-                    color_discrete_sequence=['#ff6b6b', '#4ecdc4', '#a29bfe']
-                )
-                st.plotly_chart(fig_pie, use_container_width=True)
+                with tracing.span("charts"):
+                    fig_pie = figures.chart("report_pie", disease_counts)
+                    st.plotly_chart(fig_pie, use_container_width=True)
         
         with col2:
-            dates = [r["date"] for r in st.session_state.reports]
-            scores = [r["score"] for r in st.session_state.reports]
-            diseases = [r["disease"] for r in st.session_state.reports]
-            
-            df_timeline = pd.DataFrame({
-                'Date': dates,
-                'Risk Score': scores,
-                'Disease': diseases
-            })
-            
-            fig_timeline = px.line(
-                df_timeline, x='Date', y='Risk Score', color='Disease',
-                title="Risk Score Timeline",
-                markers=True,
-                color_discrete_map={
-                    "Diabetes": "#ff6b6b",
-                    "Heart": "#4ecdc4",
-                    "Parkinsons": "#a29bfe"
-                }
-            )
-            st.plotly_chart(fig_timeline, use_container_width=True)
+            with tracing.span("charts"):
+                fig_timeline = figures.chart("risk_timeline", report_store.timeline(owner))
+                st.plotly_chart(fig_timeline, use_container_width=True)
         
         # Individual Reports
         st.markdown("---")
         st.markdown("## 📋 Individual Reports")
         
-        for i, report in enumerate(reversed(st.session_state.reports)):
-            with st.expander(f"🔍 Report #{len(st.session_state.reports)-i} - {report['disease']} - {report['date']}", expanded=(i==0)):
-                col1, col2 = st.columns([2, 1])
-                
-                with col1:
-                    st.markdown(f"### {report['disease']} Assessment")
-                    st.markdown(f"**Result:** {report['result']}")
-                    st.markdown(f"**Risk Level:** {report['risk_level']}")
-                    st.markdown(f"**Risk Score:** {report['score']:.1f}%")
-                    st.markdown(f"**Date:** {report['date']}")
-                    st.progress(report['score']/100)
-                
-                with col2:
-                    fig_mini = go.Figure(go.Indicator(
-                        mode="gauge+number",
-                        value=report['score'],
-                        domain={'x': [0, 1], 'y': [0, 1]},
-                        gauge={
-                            'axis': {'range': [None, 100]},
-                            'bar': {'color': "#667eea"},
-                            'steps': [
-                                {'range': [0, 50], 'color': '#55efc4'},
-                                {'range': [50, 100], 'color': '#ff6b6b'}
-                            ]
-                        }
-                    ))
-                    fig_mini.update_layout(height=200, margin=dict(l=10, r=10, t=10, b=10))
+        n_pages = (total_reports - 1) // REPORTS_PER_PAGE + 1
+        page_no = st.number_input(f"📄 Page (of {n_pages})", 1, n_pages, 1) if n_pages > 1 else 1
+        offset = (page_no - 1) * REPORTS_PER_PAGE
+        
+        # One table for the page plus the details of a single report keeps the
+        # number of elements flat however long the history gets.
+        with tracing.span("reports"):
+            page_reports = report_store.page(owner, offset, REPORTS_PER_PAGE)
+            st.dataframe(pd.DataFrame({
+                'Report': [f"#{total_reports-offset-i}" for i in range(len(page_reports))],
+                'Disease': [r.disease for r in page_reports],
+                'Date': [r.date for r in page_reports],
+                'Risk Level': [r.risk_level for r in page_reports],
+                'Risk Score': [round(r.score, 1) for r in page_reports]
+            }), use_container_width=True, hide_index=True)
+        
+        selected = st.selectbox(
+            "🔍 Open report", range(len(page_reports)),
+            format_func=lambda i: f"Report #{total_reports-offset-i} - {page_reports[i].disease} - {page_reports[i].date}"
+        )
+        report = page_reports[selected]
+        
+        with st.expander(f"🔍 Report #{total_reports-offset-selected} - {report.disease} - {report.date}", expanded=True):
+            col1, col2 = st.columns([2, 1])
+            
+            with col1:
+                st.markdown(f"### {report.disease} Assessment")
+                st.markdown(f"**Result:** {report.result}")
+                st.markdown(f"**Risk Level:** {report.risk_level}")
+                st.markdown(f"**Risk Score:** {report.score:.1f}%")
+                st.markdown(f"**Date:** {report.date}")
+                st.progress(report.score/100)
+            
+            with col2:
+                with tracing.span("charts"), figures.gauge("report", report.score) as fig_mini:
                     st.plotly_chart(fig_mini, use_container_width=True)
+            
+            if report.values:
+                st.markdown("#### 📊 Test Parameters")
+                params_df = pd.DataFrame({
+                    'Parameter': list(report.parameters.keys()),
+                    'Value': list(report.parameters.values())
+                })
+                st.dataframe(params_df, use_container_width=True)
+            
+            if report.patient:
+                st.markdown("#### 👤 Patient Information")
+                pinfo = report.patient_info
                 
-                if "parameters" in report and report["parameters"]:
-                    st.markdown("#### 📊 Test Parameters")
-                    params_df = pd.DataFrame({
-                        'Parameter': list(report['parameters'].keys()),
-                        'Value': list(report['parameters'].values())
-                    })
-                    st.dataframe(params_df, use_container_width=True)
+                pcol1, pcol2 = st.columns(2)
+                with pcol1:
+                    st.markdown(f"**Name:** {pinfo.get('name', 'N/A')}")
+                    st.markdown(f"**Phone:** {pinfo.get('phone', 'N/A')}")
+                    st.markdown(f"**Place:** {pinfo.get('place', 'N/A')}")
+                with pcol2:
+                    st.markdown(f"**Blood Group:** {pinfo.get('blood_group', 'N/A')}")
+                    st.markdown(f"**Height:** {pinfo.get('height', 'N/A')} cm")
+                    st.markdown(f"**Weight:** {pinfo.get('weight', 'N/A')} kg")
                 
-                if "patient_info" in report and report["patient_info"]:
-                    st.markdown("#### 👤 Patient Information")
-                    pinfo = report["patient_info"]
-                    
-                    pcol1, pcol2 = st.columns(2)
-                    with pcol1:
-                        st.markdown(f"**Name:** {pinfo.get('name', 'N/A')}")
-                        st.markdown(f"**Phone:** {pinfo.get('phone', 'N/A')}")
-                        st.markdown(f"**Place:** {pinfo.get('place', 'N/A')}")
-                    with pcol2:
-                        st.markdown(f"**Blood Group:** {pinfo.get('blood_group', 'N/A')}")
-                        st.markdown(f"**Height:** {pinfo.get('height', 'N/A')} cm")
-                        st.markdown(f"**Weight:** {pinfo.get('weight', 'N/A')} kg")
-                    
-                    st.markdown(f"**Address:** {pinfo.get('address', 'N/A')}")
-        
+                st.markdown(f"**Address:** {pinfo.get('address', 'N/A')}")
+    
+        # Export the whole history
+        st.markdown("---")
+        st.markdown("## 📦 Export Reports")
+        import report_export
+        formats = report_export.available_formats()
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            export_format = st.selectbox("Format", formats, format_func=lambda f: report_export.FORMATS[f]["label"])
+        with col2:
+            st.markdown("<br>", unsafe_allow_html=True)
+            if st.button(f"📦 Export All {total_reports:,} Reports", use_container_width=True):
+                st.session_state.export_job_history = report_export.export_history(report_store, owner, export_format).id
+        render_export_job("export_job_history")
+    
         # Clear reports option
         st.markdown("---")
         col1, col2, col3 = st.columns([1,1,1])
         with col2:
             if st.button("🗑️ Clear All Reports", use_container_width=True):
-                st.session_state.reports = []
+                report_store.clear(owner)
                 st.session_state.last_prediction = None
+                st.rerun(scope="fragment")
+        with col3:
+            if st.button("🔑 New Access Token", use_container_width=True,
+                         help="Move your history to a new token; browsers holding the old one lose access."):
+                token = new_owner_token()
+                report_store.reassign(owner, token)
+                st.session_state.owner = token
+                st.session_state.owner_cookie_pending = True
                 st.rerun()
+    
+    report_list()
 
 # ======================== HEALTH TIPS ========================
 elif choice == "💡 Health Tips":
@@ -1567,4 +1818,6 @@ st.markdown("""
         Made with ❤️ for Better Health | © 2025
     </p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+tracing.finish_rerun()
\ No newline at end of file
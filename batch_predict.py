@@ -0,0 +1,126 @@
+"""Headless batch scoring for the diabetes, heart and Parkinson's models.
+
+Streams a CSV with the same columns as ``diabetes.csv`` / ``heart.csv`` /
+``parkinsons.csv`` through the model in fixed-size chunks and appends the
+results to the output as each chunk finishes, so memory use depends on the
+chunk size rather than on the file size.
+
+Usage:
+    python batch_predict.py diabetes screening.csv -o scored.csv
+    python batch_predict.py parkinsons voices.csv --keep name --chunksize 50000
+    python batch_predict.py heart patients.csv --explain 3   # + top-3 contributing features per row
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from diseases import DISEASES, get_spec
+from model_registry import ModelLoadError, ModelRegistry
+from risk_calibration import assess, get_calibrator
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def iter_scored_chunks(model, disease, source, calibrator, chunksize=DEFAULT_CHUNKSIZE, keep_columns=(), explain=0):
+    """Yield one scored DataFrame per input chunk.
+
+    ``source`` is anything ``pd.read_csv`` accepts (path or file object).
+    Only the model's feature columns plus ``keep_columns`` are parsed; each
+    output frame holds the kept columns followed by ``prediction`` (1 when
+    the calibrated probability is over 50%, as in the app), ``score`` and
+    ``probability``, plus ``top<i>_feature``/``top<i>_contribution`` for the
+    ``explain`` largest ``attributions`` (linear models only). Rows with a
+    blank or non-finite input are kept but left unscored: their prediction,
+    score and probability are empty.
+    """
+    spec = get_spec(disease)
+    features = spec["features"]
+    keep_columns = list(keep_columns)
+    usecols = set(features) | set(keep_columns)
+
+    reader = pd.read_csv(
+        source,
+        chunksize=chunksize,
+        usecols=lambda c: c in usecols,
+        dtype={c: "float64" for c in features},
+        encoding="utf-8-sig",
+    )
+    if explain:
+        import attributions
+    for chunk in reader:
+        missing = [c for c in features + keep_columns if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"{spec['label']} input is missing columns: {', '.join(missing)}")
+        result = assess(model, calibrator, chunk[features])
+        out = chunk[keep_columns].copy() if keep_columns else pd.DataFrame(index=chunk.index)
+        out["prediction"] = pd.array(result.at_risk, dtype="Int64")
+        out.loc[~result.valid, "prediction"] = pd.NA
+        out["score"] = result.scores
+        out["probability"] = result.probabilities
+        if explain:
+            explained = attributions.explain(model, disease, chunk[features])
+            for column, values in attributions.top_k_columns(explained, explain).items():
+                out[column] = values
+                out.loc[~result.valid, column] = None if column.endswith("_feature") else np.nan
+        yield out
+
+
+def score_csv(model, disease, source, output, calibrator, chunksize=DEFAULT_CHUNKSIZE, keep_columns=(), explain=0):
+    """Score ``source`` into the open text stream ``output``; returns ``(rows written, rows left unscored)``."""
+    rows = skipped = 0
+    chunks = iter_scored_chunks(model, disease, source, calibrator, chunksize, keep_columns, explain)
+    for i, scored in enumerate(chunks):
+        scored.to_csv(output, header=(i == 0), index=False, lineterminator="\n")
+        output.flush()
+        rows += len(scored)
+        skipped += int(scored["prediction"].isna().sum())
+    return rows, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("disease", choices=sorted(DISEASES))
+    parser.add_argument("input", help="CSV file to score ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="output CSV (default: stdout)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help=f"rows per chunk (default: {DEFAULT_CHUNKSIZE})")
+    parser.add_argument("--keep", nargs="*", default=None,
+                        help="input columns copied to the output (default: the id columns)")
+    parser.add_argument("--model-dir", default=None,
+                        help="directory holding the .sav models (default: $DISEASE_MODEL_DIR or the app directory)")
+    parser.add_argument("--explain", type=int, default=0, metavar="K",
+                        help="add the K features that moved each row's score most (linear models only)")
+    args = parser.parse_args(argv)
+
+    keep = get_spec(args.disease)["id_columns"] if args.keep is None else args.keep
+    try:
+        entry = ModelRegistry(args.model_dir).entry(args.disease)
+    except ModelLoadError as e:
+        parser.exit(1, f"error: {e}\n")
+    calibrator = get_calibrator(entry)
+    source = sys.stdin if args.input == "-" else args.input
+
+    start = time.perf_counter()
+    try:
+        if args.output == "-":
+            rows, skipped = score_csv(entry.model, args.disease, source, sys.stdout, calibrator, args.chunksize,
+                                      keep, args.explain)
+        else:
+            with open(args.output, "w", newline="", encoding="utf-8") as out:
+                rows, skipped = score_csv(entry.model, args.disease, source, out, calibrator, args.chunksize,
+                                          keep, args.explain)
+    except ValueError as e:
+        parser.exit(2, f"error: {e}\n")
+    elapsed = time.perf_counter() - start
+    print(f"Scored {rows} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)", file=sys.stderr)
+    if skipped:
+        print(f"warning: {skipped} rows had blank or non-finite inputs and were left unscored "
+              "(empty prediction)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
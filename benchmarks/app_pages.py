@@ -0,0 +1,70 @@
+"""Per-page rerun latency of the Streamlit app, driven headlessly by AppTest.
+
+Must be imported before anything imports ``report_store``: it points
+``REPORT_DB_PATH`` at a throwaway database so benchmark reports never land
+in the real history.
+"""
+import os
+import tempfile
+
+os.environ["REPORT_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench-"), "reports.db")
+
+from benchmarks.common import measure, record, traced_peak_mb  # noqa: E402
+
+SUITE = "app"
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Multiple disease predict.py")
+PAGES = ["🏠 Dashboard", "🩸 Diabetes", "❤️ Heart Disease", "🧠 Parkinson's", "🧪 Full Screening", "📊 My Reports", "💡 Health Tips"]
+PREDICTION_PAGES = ["🩸 Diabetes", "❤️ Heart Disease", "🧠 Parkinson's"]
+
+
+def _app(page, owner=None):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    if owner is not None:
+        at.query_params["uid"] = owner
+    at.session_state["navigation"] = page
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"{page} raised: {at.exception[0].value}")
+    return at
+
+
+def seed_reports(owner, n):
+    from report_store import ReportStore
+
+    store = ReportStore(os.environ["REPORT_DB_PATH"], batch_size=1000)
+    diseases = ["Diabetes", "Heart", "Parkinsons"]
+    for i in range(n):
+        score = float(i * 37 % 100)
+        store.add(owner, {
+            "disease": diseases[i % 3],
+            "result": "benchmark",
+            "date": f"2025-01-{1 + i // 1440 % 28:02d} {i // 60 % 24:02d}:{i % 60:02d}:00",
+            "score": score,
+            "risk_level": "HIGH RISK" if score > 50 else "LOW RISK",
+            "parameters": {"Glucose": 120, "BMI": 26.0, "Age": 30},
+            "patient_info": {"name": f"patient-{i % 50}"},
+        })
+    store.close()
+
+
+def run(repeat=10, report_counts=(10, 100, 1000)):
+    results = []
+    for page in PAGES:
+        at = _app(page)
+        results.append(record(SUITE, f"rerun/{page}", **measure(at.run, repeat)))
+
+    for page in PREDICTION_PAGES:
+        at = _app(page)
+        at.button[0].click().run()
+        results.append(record(SUITE, f"rerun/{page} (result shown)", **measure(at.run, repeat)))
+
+    for n in report_counts:
+        owner = f"bench-{n}"
+        seed_reports(owner, n)
+        at = _app("📊 My Reports", owner)
+        results.append(record(SUITE, f"rerun/📊 My Reports ({n} reports)", reports=n, **measure(at.run, repeat)))
+        results.append(record(SUITE, f"rerun/📊 My Reports ({n} reports)/memory", reports=n,
+                              peak_mb=traced_peak_mb(at.run)))
+    return results
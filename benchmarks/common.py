@@ -0,0 +1,41 @@
+"""Timing helpers shared by the benchmark suites."""
+import statistics
+import time
+import tracemalloc
+
+
+def measure(fn, repeat=20, warmup=2):
+    """Call ``fn`` ``warmup + repeat`` times; return timing stats in ms."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "runs": repeat,
+        "min_ms": samples[0],
+        "median_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "max_ms": samples[-1],
+    }
+
+
+def record(suite, name, **values):
+    return {"suite": suite, "name": name, **values}
+
+
+def traced_peak_mb(fn):
+    """Run ``fn`` once under tracemalloc and return its peak allocation in MB.
+
+    Kept separate from ``measure`` because tracing slows allocation-heavy
+    code several-fold and would distort the latency numbers.
+    """
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
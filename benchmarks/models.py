@@ -0,0 +1,65 @@
+"""Model load time and single-row vs batched prediction throughput.
+
+Each model is measured as the pickled estimator and, when one exists, as
+the manifest + ``.npy`` artifact from ``model_artifacts.py convert``.
+"""
+import os
+import pickle
+
+import pandas as pd
+
+from benchmarks.common import measure, record, traced_peak_mb
+import datasets
+import model_artifacts
+from diseases import DISEASES, get_spec, model_path, score_matrix
+
+SUITE = "models"
+
+
+def _load_rows(disease, n_rows):
+    X = datasets.load(disease, get_spec(disease)["features"])
+    reps = -(-n_rows // len(X))
+    return pd.concat([X] * reps, ignore_index=True).iloc[:n_rows]
+
+
+def run(repeat=20, batch_rows=100_000, model_dir=None):
+    import sklearn  # noqa: F401  -- keep the one-off sklearn import out of the load timings
+
+    results = []
+    for disease in DISEASES:
+        sav = model_path(disease, model_dir)
+        with open(sav, "rb") as f:
+            data = f.read()
+        estimator = pickle.loads(data)
+        artifact = model_artifacts.artifact_dir(sav)
+        scorers = {"pickle": estimator}
+        try:
+            scorers["artifact"] = model_artifacts.load(artifact)
+        except (OSError, ValueError):
+            pass
+
+        # Pickle is timed from bytes already in memory, so it is not
+        # charged for the disk read the artifact load includes.
+        results.append(record(SUITE, f"{disease}/load/pickle", model=type(estimator).__name__,
+                              size_bytes=len(data), **measure(lambda: pickle.loads(data), repeat)))
+        if "artifact" in scorers:
+            size = sum(e.stat().st_size for e in os.scandir(artifact))
+            results.append(record(SUITE, f"{disease}/load/artifact", model=type(estimator).__name__,
+                                  size_bytes=size, **measure(lambda: model_artifacts.load(artifact), repeat)))
+
+        X = _load_rows(disease, batch_rows)
+        row_frame = X.iloc[:1]
+        row_array = X.to_numpy()[:1]
+        batch_array = X.to_numpy()
+        for kind, model in scorers.items():
+            single = row_frame if kind == "pickle" else row_array
+            stats = measure(lambda: score_matrix(model, single), repeat * 10)
+            results.append(record(SUITE, f"{disease}/predict_single/{kind}",
+                                  rows_per_s=1000 / stats["median_ms"], **stats))
+            batch = X if kind == "pickle" else batch_array
+            stats = measure(lambda: score_matrix(model, batch), max(3, repeat // 4))
+            results.append(record(SUITE, f"{disease}/predict_batch/{kind}", rows=len(X),
+                                  rows_per_s=len(X) * 1000 / stats["median_ms"], **stats))
+            results.append(record(SUITE, f"{disease}/predict_batch/{kind}/memory",
+                                  peak_mb=traced_peak_mb(lambda: score_matrix(model, batch))))
+    return results
@@ -0,0 +1,98 @@
+"""Run the benchmark suites and write the results as JSON.
+
+Usage:
+    python -m benchmarks.run                         # every suite -> bench_results.json
+    python -m benchmarks.run --suite models --output models.json
+    python -m benchmarks.run --quick                 # fewer repeats, for a smoke check
+
+Each result is a flat record (``suite``, ``name`` and its numbers), so
+files from two releases can be joined on ``(suite, name)`` to spot
+regressions. ``meta`` records the versions and git commit they came from.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+# Imported first so REPORT_DB_PATH is redirected before report_store loads.
+from benchmarks import app_pages  # noqa: I001
+from benchmarks import models, sessions
+
+SUITES = {"app": app_pages.run, "models": models.run, "sessions": sessions.run}
+
+
+def _versions():
+    versions = {"python": platform.python_version()}
+    for name in ("numpy", "pandas", "sklearn", "streamlit", "plotly"):
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            versions[name] = None
+    return versions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(app_pages.APP_PATH)).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _max_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the performance benchmarks.")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="suite(s) to run (default: all)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--quick", action="store_true", help="fewer repeats and smaller inputs")
+    parser.add_argument("--model-dir", default=None, help="models for the models suite (default: the app's)")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name in args.suite or sorted(SUITES):
+        start = time.perf_counter()
+        if args.quick:
+            kwargs = {"app": {"repeat": 3, "report_counts": (10, 100)}, "models": {"repeat": 5, "batch_rows": 10_000},
+                      "sessions": {"sessions": 1_000}}[name]
+        else:
+            kwargs = {}
+        if name == "models":
+            kwargs["model_dir"] = args.model_dir
+        suite_results = SUITES[name](**kwargs)
+        results.extend(suite_results)
+        print(f"{name}: {len(suite_results)} results in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    payload = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "platform": platform.platform(),
+            "git_commit": _git_commit(),
+            "versions": _versions(),
+            "max_rss_mb": _max_rss_mb(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+
+    for r in results:
+        numbers = ", ".join(
+            f"{k}={v:,.3f}" if isinstance(v, float) else f"{k}={v}"
+            for k, v in r.items() if k not in ("suite", "name") and k in ("median_ms", "rows_per_s", "peak_mb", "retained_mb", "bytes_per_session")
+        )
+        print(f"[{r['suite']}] {r['name']}: {numbers}")
+    print(f"wrote {args.output} (max RSS {payload['meta']['max_rss_mb']:.0f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
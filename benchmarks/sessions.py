@@ -0,0 +1,82 @@
+"""Server memory held by per-session reports, at many concurrent sessions.
+
+Each simulated session holds what the app keeps in ``st.session_state``
+after a full screening: its latest report (every model feature as a
+parameter) and the patient details, as the old nested dicts and as a
+``report_store.Report``. Also measured: the same reports queued in a
+``ReportStore`` write buffer.
+"""
+import os
+import random
+import tempfile
+import tracemalloc
+
+from benchmarks.common import record
+from diseases import DISEASES
+from report_store import Report, ReportStore
+
+SUITE = "sessions"
+
+
+def _report(disease, rng, i):
+    spec = DISEASES[disease]
+    score = rng.uniform(0, 100)
+    return {
+        "disease": spec["label"],
+        "result": f"At Risk for {spec['label']}" if score > 50 else "Low Risk - Healthy",
+        "date": f"2025-01-{1 + i % 28:02d} {i // 60 % 24:02d}:{i % 60:02d}:00",
+        "score": score,
+        "risk_level": "HIGH RISK" if score > 50 else "LOW RISK",
+        "parameters": {c: round(rng.uniform(0, 200), 5) for c in spec["features"]},
+    }
+
+
+def _patient(i):
+    return {"name": f"Patient {i}", "phone": f"+1 555 {i:07d}", "address": f"{i} Main Street",
+            "place": "Springfield", "blood_group": "O+", "height": 170, "weight": 70.5}
+
+
+def _retained(build):
+    """Return ``(result, MB it still holds)`` for ``build()``."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        return kept, (tracemalloc.get_traced_memory()[0] - before) / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def run(sessions=10_000, seed=0):
+    results = []
+    for disease in DISEASES:
+        def sessions_as(kind):
+            rng = random.Random(seed)
+            states = []
+            for i in range(sessions):
+                report, patient = _report(disease, rng, i), _patient(i)
+                if kind == "dict":
+                    report["patient_info"] = dict(patient)
+                else:
+                    report = Report.from_dict(dict(report, patient_info=patient))
+                states.append({"last_prediction": report, "patient_info": patient})
+            return states
+
+        for kind in ("dict", "Report"):
+            _, mb = _retained(lambda: sessions_as(kind))
+            results.append(record(SUITE, f"{disease}/{kind}", sessions=sessions, retained_mb=mb,
+                                  bytes_per_session=round(mb * 2**20 / sessions)))
+
+        def buffered():
+            store = ReportStore(os.path.join(tempfile.mkdtemp(prefix="bench-"), "reports.db"),
+                                batch_size=sessions + 1, flush_interval=3600)
+            rng = random.Random(seed)
+            for i in range(sessions):
+                store.add(f"owner-{i}", dict(_report(disease, rng, i), patient_info=_patient(i)))
+            return store
+
+        store, mb = _retained(buffered)
+        store.close()
+        results.append(record(SUITE, f"{disease}/write buffer", sessions=sessions, retained_mb=mb,
+                              bytes_per_session=round(mb * 2**20 / sessions)))
+    return results
@@ -0,0 +1,172 @@
+"""Background bulk scoring of uploaded CSVs for the app's Bulk Upload tabs.
+
+A job copies the upload to a temporary file, then streams it through
+``batch_predict.iter_scored_chunks`` on a small worker pool, appending each
+scored chunk to an output CSV on disk. Scoring holds one chunk in memory at
+a time, and the Streamlit script thread only submits the job and polls its
+counters, so a 500k-row file never blocks a rerun. The upload itself is not
+bounded that way: ``st.file_uploader`` keeps the whole file in memory for as
+long as it stays selected in the session, so each session can hold up to
+``server.maxUploadSize`` (set in ``.streamlit/config.toml``) on top of the
+job. Rows with a blank or non-numeric input are written unscored and
+counted in ``invalid_rows``; the at-risk count and mean risk cover only the
+rows that were scored. Scored files from a
+linear model also get the ``EXPLAIN_TOP_K`` features that moved each
+row's score most (see ``attributions``).
+
+Jobs are kept in a process-wide table by id; finished jobs and their files
+are removed after ``BULK_JOB_TTL`` seconds (default 3600). Work files live
+in ``$BULK_JOB_DIR`` (default: the system temp dir).
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import attributions
+from batch_predict import iter_scored_chunks
+from diseases import get_spec
+from risk_calibration import at_risk, get_calibrator
+
+JOB_DIR = os.environ.get("BULK_JOB_DIR") or os.path.join(tempfile.gettempdir(), "disease-bulk-jobs")
+JOB_TTL = float(os.environ.get("BULK_JOB_TTL", "3600"))
+MAX_WORKERS = int(os.environ.get("BULK_MAX_WORKERS", "2"))
+CHUNKSIZE = 50_000
+PREVIEW_ROWS = 100
+EXPLAIN_TOP_K = 3
+
+_jobs = {}
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="bulk")
+
+
+class BulkJob:
+    def __init__(self, disease, file_name, total_bytes):
+        self.id = uuid.uuid4().hex
+        self.disease = disease
+        self.file_name = file_name
+        self.total_bytes = total_bytes
+        self.status = "queued"  # queued -> running -> done | failed | cancelled
+        self.error = None
+        self.rows = 0
+        self.invalid_rows = 0
+        self.positives = 0
+        self.probability_sum = 0.0
+        self.bytes_read = 0
+        self.preview = None
+        self.started = time.time()
+        self.finished = None
+        self.input_path = os.path.join(JOB_DIR, f"{self.id}.in.csv")
+        self.output_path = os.path.join(JOB_DIR, f"{self.id}.scored.csv")
+        self._cancel = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    @property
+    def progress(self):
+        if self.status == "done":
+            return 1.0
+        return min(1.0, self.bytes_read / self.total_bytes) if self.total_bytes else 0.0
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def scored_rows(self):
+        return self.rows - self.invalid_rows
+
+    @property
+    def mean_probability(self):
+        return self.probability_sum / self.scored_rows if self.scored_rows else None
+
+    def cancel(self):
+        self._cancel.set()
+
+    def output_file_name(self):
+        return f"{os.path.splitext(self.file_name)[0]}_scored.csv"
+
+    def read_output(self):
+        with open(self.output_path, "rb") as f:
+            return f.read()
+
+    def _run(self, upload, entry):
+        import pandas as pd
+
+        self.status = "running"
+        try:
+            with open(self.input_path, "wb") as f:
+                upload.seek(0)
+                shutil.copyfileobj(upload, f, 1 << 20)
+            del upload  # our reference only; the session's uploader widget still holds the bytes
+
+            header = pd.read_csv(self.input_path, nrows=0, encoding="utf-8-sig").columns
+            calibrator = get_calibrator(entry)
+            explain = EXPLAIN_TOP_K if attributions.is_linear(entry.model) else 0
+            with open(self.input_path, "rb") as source, open(self.output_path, "w", newline="", encoding="utf-8") as out:
+                chunks = iter_scored_chunks(entry.model, self.disease, source, calibrator, CHUNKSIZE, header, explain)
+                for i, scored in enumerate(chunks):
+                    if self._cancel.is_set():
+                        self.status = "cancelled"
+                        return
+                    scored.to_csv(out, header=(i == 0), index=False, lineterminator="\n")
+                    probabilities = scored["probability"].to_numpy()
+                    probabilities = probabilities[scored["prediction"].notna().to_numpy()]
+                    self.rows += len(scored)
+                    self.invalid_rows += len(scored) - len(probabilities)
+                    self.positives += int(at_risk(probabilities).sum())
+                    self.probability_sum += float(probabilities.sum())
+                    if self.preview is None or len(self.preview) < PREVIEW_ROWS:
+                        head = scored.head(PREVIEW_ROWS)
+                        self.preview = head if self.preview is None else pd.concat([self.preview, head]).head(PREVIEW_ROWS)
+                    self.bytes_read = source.tell()
+            self.status = "done"
+        except Exception as e:
+            self.error = str(e) or type(e).__name__
+            self.status = "failed"
+        finally:
+            self.finished = time.time()
+            _remove(self.input_path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _expire():
+    now = time.time()
+    with _lock:
+        stale = [j for j in _jobs.values() if j.done and now - j.finished > JOB_TTL]
+        for job in stale:
+            del _jobs[job.id]
+    for job in stale:
+        _remove(job.output_path)
+
+
+def submit(registry, disease, upload, file_name=None):
+    """Start scoring ``upload`` (a binary file object) in the background; returns the job."""
+    get_spec(disease)
+    entry = registry.entry(disease)  # pin the model version for the whole file
+    _expire()
+    os.makedirs(JOB_DIR, exist_ok=True)
+    size = getattr(upload, "size", None)
+    if size is None:
+        upload.seek(0, os.SEEK_END)
+        size = upload.tell()
+    job = BulkJob(disease, file_name or getattr(upload, "name", "upload.csv"), size)
+    with _lock:
+        _jobs[job.id] = job
+    _executor.submit(job._run, upload, entry)
+    return job
+
+
+def get(job_id):
+    return _jobs.get(job_id)
@@ -0,0 +1,5 @@
+"""Lets the tests in ``tests/`` import the app's top-level modules."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
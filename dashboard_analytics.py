@@ -0,0 +1,111 @@
+"""Precomputed dashboard analytics for the bundled datasets.
+
+The dashboard used to chart a synthetic DataFrame rebuilt on every rerun.
+It now reads a snapshot computed once from ``diabetes.csv``, ``heart.csv``
+and ``parkinsons.csv``: case counts per dataset, per-class histograms of a
+few key features and a downsampled Glucose/BMI scatter. Snapshots are
+stored as JSON under ``.cache/analytics`` named by the SHA-256 of the
+source files, so replacing a CSV invalidates them, and nothing is
+recomputed while the files stay the same. File hashes are memoized by
+(mtime, size), so checking for changes doesn't re-read the data, and the
+columns come from the compact ``datasets`` cache rather than the CSVs.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from diseases import BASE_DIR, DISEASES, csv_path, file_sha256, get_spec
+
+CACHE_DIR = os.path.join(BASE_DIR, ".cache", "analytics")
+SNAPSHOT_VERSION = 1
+MAX_SCATTER_POINTS = 5000
+HISTOGRAM_BINS = 20
+
+DISTRIBUTION_FEATURES = {
+    "diabetes": ["Glucose", "BMI", "Age", "BloodPressure"],
+    "heart": ["age", "chol", "thalach", "trestbps"],
+    "parkinsons": ["MDVP:Fo(Hz)", "HNR", "PPE", "spread1"],
+}
+
+_lock = threading.Lock()
+
+
+def source_hash():
+    """Combined hash of the three CSVs and the snapshot format."""
+    digest = hashlib.sha256(f"v{SNAPSHOT_VERSION}".encode())
+    for disease in DISEASES:
+        digest.update(file_sha256(csv_path(disease)).encode())
+    return digest.hexdigest()
+
+
+def _read(disease, columns):
+    import datasets
+
+    df = datasets.load(disease, columns + [get_spec(disease)["target"]])
+    return df.astype({c: "float32" for c in columns})
+
+
+def _histogram(values, labels):
+    import numpy as np
+
+    edges = np.histogram_bin_edges(values, bins=HISTOGRAM_BINS)
+    return {
+        "edges": edges.round(6).tolist(),
+        "counts": {str(k): np.histogram(values[labels == k], bins=edges)[0].tolist() for k in (0, 1)},
+    }
+
+
+def build_snapshot():
+    import numpy as np
+
+    snapshot = {"version": SNAPSHOT_VERSION, "datasets": {}, "distributions": {}, "scatter": {}}
+    for disease in DISEASES:
+        target = get_spec(disease)["target"]
+        df = _read(disease, DISTRIBUTION_FEATURES[disease])
+        labels = df[target].to_numpy()
+        snapshot["datasets"][disease] = {"rows": int(len(df)), "positives": int((labels == 1).sum())}
+        snapshot["distributions"][disease] = {
+            c: _histogram(df[c].to_numpy(), labels) for c in DISTRIBUTION_FEATURES[disease]
+        }
+        if disease == "diabetes":
+            # Fixed-seed downsample so the scatter stays cheap to draw for
+            # production-sized extracts and identical between rebuilds.
+            idx = np.arange(len(df))
+            if len(idx) > MAX_SCATTER_POINTS:
+                idx = np.sort(np.random.default_rng(0).choice(idx, MAX_SCATTER_POINTS, replace=False))
+            snapshot["scatter"] = {
+                "total": int(len(df)),
+                "Glucose": df["Glucose"].to_numpy()[idx].round(3).tolist(),
+                "BMI": df["BMI"].to_numpy()[idx].round(3).tolist(),
+                "BloodPressure": df["BloodPressure"].to_numpy()[idx].round(3).tolist(),
+                "Outcome": labels[idx].astype(int).tolist(),
+            }
+    return snapshot
+
+
+def load_snapshot(key=None):
+    """Return the snapshot for the current CSVs, building and caching it if needed."""
+    key = key or source_hash()
+    path = os.path.join(CACHE_DIR, f"{key}.json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+    with _lock:
+        snapshot = build_snapshot()
+        snapshot["source_hash"] = key
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    return snapshot
+
+
+if __name__ == "__main__":
+    snap = load_snapshot()
+    for name, stats in snap["datasets"].items():
+        print(f"{name}: {stats['positives']}/{stats['rows']} positive")
+    print(f"snapshot {snap['source_hash'][:12]} in {CACHE_DIR}")
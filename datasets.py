@@ -0,0 +1,195 @@
+"""Columnar, dtype-compacted cache of the bundled CSVs.
+
+``diabetes.csv``, ``heart.csv`` and ``parkinsons.csv`` used to be parsed with
+``pd.read_csv`` by every consumer, with every column widened to int64 or
+float64. The first ``load`` now converts a CSV once into
+``.cache/datasets/<disease>-<sha256>/``: a ``schema.json`` plus one ``.npy``
+per column, each stored in the narrowest dtype that holds every value
+exactly:
+
+    integers (or floats that are all whole numbers)  -> int8 / int16 / int32
+    floats that survive a float32 round trip         -> float32
+    anything else numeric                            -> float64
+    text                                             -> fixed-width unicode
+
+The conversion reads the CSV in chunks twice (once to choose dtypes, once
+to fill memory-mapped ``.npy`` files), so it never holds a whole
+production extract in memory. Later loads memory-map only the requested
+columns. The directory is named by the CSV's SHA-256, so replacing a file
+builds a new cache and never serves stale data.
+
+Usage:
+    python datasets.py        # build (or check) the cache for every dataset
+"""
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+
+from diseases import BASE_DIR, DISEASES, csv_path, file_sha256
+
+CACHE_DIR = os.path.join(BASE_DIR, ".cache", "datasets")
+DATASET_VERSION = 2  # 2: string columns sized over every chunk
+CHUNKSIZE = 200_000
+SCHEMA = "schema.json"
+INT_TYPES = (np.int8, np.int16, np.int32, np.int64)
+
+_lock = threading.Lock()
+
+
+def cache_dir(disease):
+    return os.path.join(CACHE_DIR, f"{disease}-v{DATASET_VERSION}-{file_sha256(csv_path(disease))[:16]}")
+
+
+# ======================== DTYPE SELECTION ========================
+class _ColumnStats:
+    """Running facts about one column, enough to pick a lossless dtype."""
+
+    def __init__(self):
+        self.numeric = True
+        self.integral = True
+        self.float32_exact = True
+        self.has_nan = False
+        self.lo, self.hi = np.inf, -np.inf
+        self.max_len = 1
+        self.chunks = 0
+        self.rescan = False  # turned to text after numeric chunks that were never measured
+
+    def update(self, series):
+        import pandas as pd
+
+        if not pd.api.types.is_numeric_dtype(series.dtype):
+            self.rescan |= self.numeric and self.chunks > 0
+            self.numeric = False
+        self.chunks += 1
+        if not self.numeric:
+            self.measure(series)
+            return
+        values = series.to_numpy(dtype=np.float64)
+        finite = values[~np.isnan(values)]
+        self.has_nan |= len(finite) != len(values)
+        if len(finite):
+            self.lo = min(self.lo, finite.min())
+            self.hi = max(self.hi, finite.max())
+            self.integral &= bool(np.all(finite == np.round(finite)))
+            self.float32_exact &= bool(np.all(finite.astype(np.float32).astype(np.float64) == finite))
+
+    def measure(self, series):
+        """Widen ``max_len`` to the longest value of ``series`` written as text."""
+        self.max_len = max(self.max_len, int(series.astype(str).str.len().max() or 1))
+
+    def dtype(self):
+        if not self.numeric:
+            return np.dtype(f"<U{self.max_len}")
+        if self.integral and not self.has_nan:
+            for t in INT_TYPES:
+                info = np.iinfo(t)
+                if info.min <= self.lo and self.hi <= info.max:
+                    return np.dtype(t)
+        return np.dtype(np.float32 if self.float32_exact else np.float64)
+
+
+def _chunks(path, columns=None):
+    import pandas as pd
+
+    return pd.read_csv(path, chunksize=CHUNKSIZE, usecols=columns, encoding="utf-8-sig")
+
+
+# ======================== BUILD / LOAD ========================
+def build(disease):
+    """Convert the disease's CSV into a column cache; returns the cache directory."""
+    path = csv_path(disease)
+    target = cache_dir(disease)
+    stats, rows, columns = {}, 0, None
+    for chunk in _chunks(path):
+        if columns is None:
+            columns = list(chunk.columns)
+            stats = {c: _ColumnStats() for c in columns}
+        for c in columns:
+            stats[c].update(chunk[c])
+        rows += len(chunk)
+    # Text lengths are only measured once a column is text, so a column that
+    # changed part-way needs one more pass over its earlier, numeric chunks.
+    rescan = [c for c in columns if stats[c].rescan]
+    if rescan:
+        for chunk in _chunks(path, rescan):
+            for c in rescan:
+                stats[c].measure(chunk[c])
+    dtypes = {c: stats[c].dtype() for c in columns}
+
+    tmp = f"{target}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    files = {c: f"{i:03d}.npy" for i, c in enumerate(columns)}
+    outputs = {c: np.lib.format.open_memmap(os.path.join(tmp, files[c]), mode="w+", dtype=dtypes[c], shape=(rows,))
+               for c in columns}
+    offset = 0
+    for chunk in _chunks(path):
+        for c in columns:
+            values = chunk[c].astype(str) if dtypes[c].kind == "U" else chunk[c]
+            outputs[c][offset:offset + len(chunk)] = values.to_numpy(dtype=dtypes[c])
+        offset += len(chunk)
+    for array in outputs.values():
+        array.flush()
+    del outputs
+
+    schema = {
+        "version": DATASET_VERSION,
+        "source": os.path.basename(path),
+        "source_sha256": file_sha256(path),
+        "rows": rows,
+        "columns": [{"name": c, "file": files[c], "dtype": dtypes[c].str} for c in columns],
+    }
+    with open(os.path.join(tmp, SCHEMA), "w", encoding="utf-8") as f:
+        json.dump(schema, f, indent=2)
+    try:
+        os.replace(tmp, target)
+    except OSError:  # another process finished first
+        shutil.rmtree(tmp, ignore_errors=True)
+    return target
+
+
+def schema(disease):
+    """Return the cache schema, building the cache first if needed."""
+    directory = cache_dir(disease)
+    try:
+        with open(os.path.join(directory, SCHEMA), encoding="utf-8") as f:
+            return directory, json.load(f)
+    except (OSError, ValueError):
+        pass
+    with _lock:
+        directory = build(disease) if not os.path.exists(os.path.join(directory, SCHEMA)) else directory
+        with open(os.path.join(directory, SCHEMA), encoding="utf-8") as f:
+            return directory, json.load(f)
+
+
+def arrays(disease, columns=None):
+    """Return ``{column: memory-mapped array}`` for ``columns`` (default: all)."""
+    directory, meta = schema(disease)
+    by_name = {c["name"]: c for c in meta["columns"]}
+    missing = [c for c in columns or () if c not in by_name]
+    if missing:
+        raise ValueError(f"{meta['source']} has no column(s): {', '.join(missing)}")
+    return {c: np.load(os.path.join(directory, by_name[c]["file"]), mmap_mode="r", allow_pickle=False)
+            for c in (columns or by_name)}
+
+
+def load(disease, columns=None):
+    """Return the dataset (or just ``columns``) as a compact DataFrame."""
+    import pandas as pd
+
+    return pd.DataFrame({c: np.asarray(a) for c, a in arrays(disease, columns).items()})
+
+
+if __name__ == "__main__":
+    import time
+
+    for disease in DISEASES:
+        start = time.perf_counter()
+        directory, meta = schema(disease)
+        size = sum(os.path.getsize(os.path.join(directory, c["file"])) for c in meta["columns"])
+        dtypes = sorted({c["dtype"] for c in meta["columns"]})
+        print(f"{disease}: {meta['rows']} rows, {len(meta['columns'])} columns, {size / 1024:.0f} KiB"
+              f" ({', '.join(dtypes)}) in {(time.perf_counter() - start) * 1000:.0f} ms -> {directory}")
@@ -0,0 +1,104 @@
+"""Shared disease definitions for the app, the batch scorer and the services.
+
+Feature names and their order match the CSVs the notebooks trained on, so a
+row of ``diabetes.csv``, ``heart.csv`` or ``parkinsons.csv`` (minus the label
+and id columns) can be fed straight to the matching model.
+"""
+import hashlib
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# ======================== DISEASE SPECS ========================
+DISEASES = {
+    "diabetes": {
+        "label": "Diabetes",
+        "model_file": "diabetes_model.sav",
+        "csv_file": "diabetes.csv",
+        "target": "Outcome",
+        "id_columns": [],
+        "features": [
+            "Pregnancies", "Glucose", "BloodPressure", "SkinThickness",
+            "Insulin", "BMI", "DiabetesPedigreeFunction", "Age"
+        ],
+        "results": ["Low Risk - Healthy", "At Risk for Diabetes"]
+    },
+    "heart": {
+        "label": "Heart",
+        "model_file": "heart_disease_model.sav",
+        "csv_file": "heart.csv",
+        "target": "target",
+        "id_columns": [],
+        "features": [
+            "age", "sex", "cp", "trestbps", "chol", "fbs", "restecg",
+            "thalach", "exang", "oldpeak", "slope", "ca", "thal"
+        ],
+        "results": ["Low Risk - Healthy Heart", "At Risk for Heart Disease"]
+    },
+    "parkinsons": {
+        "label": "Parkinsons",
+        "model_file": "parkinsons_model.sav",
+        "csv_file": "parkinsons.csv",
+        "target": "status",
+        "id_columns": ["name"],
+        "features": [
+            "MDVP:Fo(Hz)", "MDVP:Fhi(Hz)", "MDVP:Flo(Hz)", "MDVP:Jitter(%)",
+            "MDVP:Jitter(Abs)", "MDVP:RAP", "MDVP:PPQ", "Jitter:DDP",
+            "MDVP:Shimmer", "MDVP:Shimmer(dB)", "Shimmer:APQ3", "Shimmer:APQ5",
+            "MDVP:APQ", "Shimmer:DDA", "NHR", "HNR", "RPDE", "DFA",
+            "spread1", "spread2", "D2", "PPE"
+        ],
+        "results": ["Low Risk - Healthy", "At Risk for Parkinson's Disease"]
+    }
+}
+
+
+def get_spec(disease):
+    try:
+        return DISEASES[disease]
+    except KeyError:
+        raise ValueError(f"Unknown disease {disease!r}; expected one of {sorted(DISEASES)}") from None
+
+
+def csv_path(disease):
+    return os.path.join(BASE_DIR, get_spec(disease)["csv_file"])
+
+
+def model_path(disease, model_dir=None):
+    return os.path.join(model_dir or BASE_DIR, get_spec(disease)["model_file"])
+
+
+_file_hashes = {}
+
+
+def file_sha256(path):
+    """SHA-256 of a file, memoized by (mtime, size) so unchanged files aren't re-read."""
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _file_hashes.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    _file_hashes[path] = (key, digest.hexdigest())
+    return _file_hashes[path][1]
+
+
+# ======================== VECTORIZED SCORING ========================
+def score_matrix(model, X):
+    """Score a 2-D batch in one call.
+
+    Returns ``(predictions, scores)``. Scores are signed margins from
+    ``decision_function`` for the linear SVC / LogisticRegression models and
+    positive-class probabilities for estimators without one; predictions
+    are derived from the same pass instead of a second ``predict`` call.
+    """
+    if hasattr(model, "decision_function"):
+        scores = model.decision_function(X)
+        predictions = model.classes_[(scores > 0).astype(int)]
+    else:
+        scores = model.predict_proba(X)[:, 1]
+        predictions = model.classes_[(scores > 0.5).astype(int)]
+    return predictions, scores
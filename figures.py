@@ -0,0 +1,315 @@
+"""Cached Plotly figures for the result gauges and the dashboard/report charts.
+
+Building a figure (``go.Figure``/``px.*``) validates every property and is
+one of the slowest steps of a rerun, yet most of the app's charts never
+change between reruns. Two caches avoid it:
+
+* Gauges are built once per style in ``GAUGES``. ``gauge(style, value)``
+  patches only the needle value on the shared template and holds the
+  template's lock while the caller renders it, so sessions never see each
+  other's values.
+* Other charts are built by the functions in ``CHARTS`` and kept in an LRU
+  keyed by the chart kind and a hash of its input data
+  (``FIGURE_CACHE_SIZE`` entries, default 128). Cached figures are never
+  mutated; ``st.plotly_chart`` serializes a copy.
+
+Usage:
+    python figures.py          # time building vs. cached figures
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+MAX_ENTRIES = int(os.environ.get("FIGURE_CACHE_SIZE", "128"))
+
+RISK_STEPS = [
+    {'range': [0, 30], 'color': '#55efc4'},
+    {'range': [30, 70], 'color': '#feca57'},
+    {'range': [70, 100], 'color': '#ff6b6b'}
+]
+GAUGES = {
+    "diabetes": {"title": "Risk Percentage", "bar": "#667eea"},
+    "heart": {"title": "Cardiac Risk Score", "bar": "#667eea"},
+    "parkinsons": {"title": "Neurological Risk Score", "bar": "#a29bfe"},
+    "report": {"title": None, "bar": "#667eea"},
+}
+
+
+# ======================== GAUGES ========================
+def _build_gauge(style):
+    import plotly.graph_objects as go
+
+    spec = GAUGES[style]
+    if spec["title"] is None:  # the compact gauge of a saved report
+        fig = go.Figure(go.Indicator(
+            mode="gauge+number",
+            value=0,
+            domain={'x': [0, 1], 'y': [0, 1]},
+            gauge={
+                'axis': {'range': [None, 100]},
+                'bar': {'color': spec["bar"]},
+                'steps': [
+                    {'range': [0, 50], 'color': '#55efc4'},
+                    {'range': [50, 100], 'color': '#ff6b6b'}
+                ]
+            }
+        ))
+        fig.update_layout(height=200, margin=dict(l=10, r=10, t=10, b=10))
+        return fig
+    return go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=0,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': spec["title"], 'font': {'size': 24}},
+        delta={'reference': 50},
+        gauge={
+            'axis': {'range': [None, 100]},
+            'bar': {'color': spec["bar"]},
+            'steps': RISK_STEPS,
+            'threshold': {'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': 75}
+        }
+    ))
+
+
+_gauges = {}
+_gauges_lock = threading.Lock()
+
+
+@contextmanager
+def gauge(style, value):
+    """Yield the ``style`` gauge showing ``value``; render it inside the ``with`` block."""
+    with _gauges_lock:
+        if style not in _gauges:
+            _gauges[style] = (_build_gauge(style), threading.Lock())
+        fig, lock = _gauges[style]
+    with lock:
+        fig.data[0].value = value
+        yield fig
+
+
+# ======================== CHARTS ========================
+def _glucose_bmi_scatter(scatter, webgl_min_points):
+    import pandas as pd
+    import plotly.express as px
+
+    df = pd.DataFrame({
+        "Glucose": scatter["Glucose"],
+        "BMI": scatter["BMI"],
+        "BloodPressure": scatter["BloodPressure"],
+        "Disease": ["Diabetes" if o == 1 else "Healthy" for o in scatter["Outcome"]]
+    })
+    sample_note = f" ({len(df):,} of {scatter['total']:,} patients)" if scatter["total"] > len(df) else ""
+    return px.scatter(
+        df, x="Glucose", y="BMI", color="Disease", size="BloodPressure",
+        render_mode="webgl" if len(df) > webgl_min_points else "svg",
+        color_discrete_map={
+            "Diabetes": "#ff6b6b",
+            "Heart Disease": "#4ecdc4",
+            "Parkinson's": "#a29bfe",
+            "Healthy": "#55efc4"
+        },
+        title="🔍 Glucose vs BMI Analysis" + sample_note,
+        template="plotly_white"
+    )
+
+
+def _disease_pie(counts):
+    import plotly.express as px
+
+    return px.pie(
+        values=list(counts.values()),
+        names=list(counts.keys()),
+        title="🥧 Disease Distribution",
+        color_discrete_sequence=['#55efc4', '#ff6b6b', '#4ecdc4', '#a29bfe'],
+        hole=0.4
+    )
+
+
+def _feature_histogram(feature, hist):
+    import pandas as pd
+    import plotly.express as px
+
+    edges = hist["edges"]
+    centers = [(lo + hi) / 2 for lo, hi in zip(edges[:-1], edges[1:])]
+    df_hist = pd.DataFrame({
+        feature: centers * 2,
+        "Patients": hist["counts"]["0"] + hist["counts"]["1"],
+        "Outcome": ["Healthy"] * len(centers) + ["Positive"] * len(centers)
+    })
+    fig = px.bar(
+        df_hist, x=feature, y="Patients", color="Outcome", barmode="overlay",
+        color_discrete_map={"Healthy": "#55efc4", "Positive": "#ff6b6b"},
+        title=f"📊 {feature} by Outcome",
+        template="plotly_white"
+    )
+    fig.update_traces(width=edges[1] - edges[0])
+    return fig
+
+
+def _report_pie(disease_counts):
+    import plotly.express as px
+
+    return px.pie(
+        names=list(disease_counts.keys()),
+        values=list(disease_counts.values()),
+        title="Tests by Disease Type",
+        color_discrete_sequence=['#ff6b6b', '#4ecdc4', '#a29bfe']
+    )
+
+
+def _risk_timeline(rows):
+    import pandas as pd
+    import plotly.express as px
+
+    df_timeline = pd.DataFrame(rows, columns=['Date', 'Risk Score', 'Disease'])
+    return px.line(
+        df_timeline, x='Date', y='Risk Score', color='Disease',
+        title="Risk Score Timeline",
+        markers=True,
+        color_discrete_map={
+            "Diabetes": "#ff6b6b",
+            "Heart": "#4ecdc4",
+            "Parkinsons": "#a29bfe"
+        }
+    )
+
+
+def _attribution_bar(contributors):
+    import plotly.graph_objects as go
+
+    contributors = contributors[::-1]  # plotly draws the first bar at the bottom
+    fig = go.Figure(go.Bar(
+        x=[value for _, value in contributors],
+        y=[name for name, _ in contributors],
+        orientation="h",
+        marker_color=["#ff6b6b" if value > 0 else "#55efc4" for _, value in contributors],
+        text=[f"{value:+.2f}" for _, value in contributors],
+        textposition="auto",
+    ))
+    fig.update_layout(
+        title="🔍 What Drove This Score",
+        xaxis_title="Contribution to the model's decision score vs. the average patient",
+        template="plotly_white",
+        height=120 + 40 * len(contributors),
+        margin=dict(l=10, r=10, t=50, b=40),
+    )
+    return fig
+
+
+CHARTS = {
+    "glucose_bmi_scatter": _glucose_bmi_scatter,
+    "disease_pie": _disease_pie,
+    "feature_histogram": _feature_histogram,
+    "report_pie": _report_pie,
+    "risk_timeline": _risk_timeline,
+    "attribution_bar": _attribution_bar,
+}
+
+
+def risk_heatmap(surface, x_label, y_label, patient):
+    """Heatmap of a ``sensitivity.Surface`` with the patient marked; not cached, the surface is."""
+    import numpy as np
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Heatmap(
+        # whole percents as uint8: a quarter of the float32 payload, and plenty for a colour map
+        x=surface.x, y=surface.y, z=np.rint(surface.risk).astype(np.uint8), zmin=0, zmax=100,
+        colorscale=[[0, "#55efc4"], [0.5, "#feca57"], [1, "#ff6b6b"]],
+        colorbar={"title": "Risk %"},
+        hovertemplate=f"{x_label}: %{{x:.3g}}<br>{y_label}: %{{y:.3g}}<br>Risk: %{{z}}%<extra></extra>",
+    ))
+    fig.add_trace(go.Scatter(
+        x=[patient[0]], y=[patient[1]], mode="markers", name="This patient",
+        marker={"symbol": "x", "size": 14, "color": "#2d3436", "line": {"width": 2, "color": "white"}},
+    ))
+    fig.update_layout(
+        title="🧭 Risk If These Two Values Changed",
+        xaxis_title=x_label, yaxis_title=y_label,
+        template="plotly_white", height=480, showlegend=False,
+        margin=dict(l=10, r=10, t=50, b=40),
+    )
+    return fig
+
+
+def data_hash(data):
+    """Stable hash of JSON-like chart inputs. Key order counts: it is the order drawn."""
+    blob = json.dumps(data, separators=(",", ":"), default=str)
+    return hashlib.blake2b(blob.encode(), digest_size=16).hexdigest()
+
+
+class FigureCache:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind, *args):
+        """Return ``CHARTS[kind](*args)``, built once per distinct input data."""
+        key = (kind, data_hash(args))
+        with self._lock:
+            fig = self._figures.get(key)
+            if fig is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return fig
+        fig = CHARTS[kind](*args)  # built outside the lock; a racing duplicate is harmless
+        with self._lock:
+            self.misses += 1
+            self._figures[key] = fig
+            while len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._figures)}
+
+
+default_cache = FigureCache()
+
+
+def chart(kind, *args):
+    return default_cache.get(kind, *args)
+
+
+if __name__ == "__main__":
+    import time
+
+    import plotly.io as pio
+
+    def timed(fn, n=20):
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        return (time.perf_counter() - start) / n * 1000
+
+    def render(fig):
+        pio.to_json(fig.to_dict(), validate=False)  # what st.plotly_chart does with a Figure
+
+    def patched_gauge():
+        with gauge("diabetes", 42.0) as fig:
+            render(fig)
+
+    hist = {"edges": list(range(0, 210, 10)), "counts": {"0": list(range(20)), "1": list(range(20))}}
+    timeline = [(f"2024-01-{d:02d}", d * 3.0, ["Diabetes", "Heart"][d % 2]) for d in range(1, 29)]
+    cases = {
+        "gauge": (lambda: render(_build_gauge("diabetes")), patched_gauge),
+        "disease_pie": (lambda: render(_disease_pie({"Healthy": 900, "Diabetes": 268})),
+                        lambda: render(chart("disease_pie", {"Healthy": 900, "Diabetes": 268}))),
+        "feature_histogram": (lambda: render(_feature_histogram("Glucose", hist)),
+                              lambda: render(chart("feature_histogram", "Glucose", hist))),
+        "risk_timeline": (lambda: render(_risk_timeline(timeline)),
+                          lambda: render(chart("risk_timeline", timeline))),
+    }
+    for name, (build, cached) in cases.items():
+        cached()  # warm
+        print(f"{name:<18} build {timed(build):6.2f} ms   cached {timed(cached):6.2f} ms")
@@ -0,0 +1,73 @@
+"""sklearn-free scorer for the linear diabetes, heart and Parkinson's models.
+
+All three shipped models are linear (``SVC(kernel='linear')`` and
+``LogisticRegression``), so inference is ``X @ coef + intercept``.
+``LinearScorer`` holds those weights (folded through a leading
+``StandardScaler`` if there is one) and mirrors the estimator API the rest
+of the code uses (``decision_function``, ``predict``, ``classes_``), so it
+can stand in for the pickled model anywhere. It is stored on disk as the
+``linear`` kind of ``model_artifacts`` (manifest plus ``coef.npy`` /
+``intercept.npy``); ``python model_artifacts.py convert`` writes it and
+``verify`` checks it against the ``.sav``.
+"""
+import numpy as np
+
+
+def as_matrix(X, feature_names):
+    """``X`` (a row, rows, or a DataFrame) as a float64 matrix with columns in ``feature_names`` order.
+
+    Raises ``ValueError`` for missing (NaN) or infinite values, as sklearn's
+    estimators do, rather than letting them through as a NaN score.
+    """
+    if hasattr(X, "columns") and list(X.columns) != list(feature_names):
+        X = X[list(feature_names)]
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    if X.shape[1] != len(feature_names):
+        raise ValueError(f"expected {len(feature_names)} features, got {X.shape[1]}")
+    finite = np.isfinite(X).all(axis=1)
+    if not finite.all():
+        bad = np.flatnonzero(~finite)
+        raise ValueError(f"input contains missing or infinite values in {len(bad)} row(s), "
+                         f"first at row {bad[0]}")
+    return X
+
+
+class LinearScorer:
+    def __init__(self, coef, intercept, classes, feature_names, source_sha256=""):
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.classes_ = np.asarray(classes)
+        self.feature_names_in_ = np.asarray(feature_names, dtype=str)
+        self.n_features_in_ = len(self.coef)
+        self.source_sha256 = source_sha256
+
+    @classmethod
+    def from_estimator(cls, estimator, source_sha256=""):
+        feature_names = estimator.feature_names_in_
+        mean, scale = 0.0, 1.0
+        if hasattr(estimator, "steps"):
+            # A StandardScaler in front of the model (as train_models.py
+            # builds them) folds into the weights: w·((x - m) / s) = (w / s)·x - (w / s)·m
+            *transforms, (_, estimator) = estimator.steps
+            if len(transforms) != 1 or not hasattr(transforms[0][1], "scale_"):
+                raise ValueError("only a StandardScaler followed by a linear model can be compiled")
+            scaler = transforms[0][1]
+            mean = 0.0 if scaler.mean_ is None else scaler.mean_
+            scale = 1.0 if scaler.scale_ is None else scaler.scale_
+        try:
+            coef = estimator.coef_
+        except AttributeError:
+            raise ValueError(f"{type(estimator).__name__} is not a linear model") from None
+        if len(estimator.classes_) != 2 or coef.shape[0] != 1:
+            raise ValueError("only binary linear models can be compiled")
+        coef = (coef.toarray() if hasattr(coef, "toarray") else coef)[0] / scale
+        intercept = estimator.intercept_[0] - np.sum(coef * mean)
+        return cls(coef, intercept, estimator.classes_, feature_names, source_sha256)
+
+    def decision_function(self, X):
+        return as_matrix(X, self.feature_names_in_) @ self.coef + self.intercept
+
+    def predict(self, X):
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
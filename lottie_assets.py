@@ -0,0 +1,160 @@
+"""Lottie animations for the app, served from disk instead of per-rerun requests.
+
+Lookup order for each animation:
+    1. the in-process memory cache
+    2. the bundled copy in ``assets/lottie/<name>.json`` (shipped with the app)
+    3. the on-disk download cache (``.cache/lottie`` or ``$LOTTIE_CACHE_DIR``)
+
+If all three miss, a background thread fetches every missing animation
+concurrently (with a timeout) and stores validated copies in the cache;
+the caller gets ``None`` straight away and the animation shows up on a
+later rerun. Nothing here ever blocks a page render on the network.
+
+``python lottie_assets.py --sync`` refreshes the bundled copies.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLE_DIR = os.path.join(BASE_DIR, "assets", "lottie")
+CACHE_DIR = os.environ.get("LOTTIE_CACHE_DIR", os.path.join(BASE_DIR, ".cache", "lottie"))
+
+FETCH_TIMEOUT = 5
+RETRY_AFTER = 300
+
+ANIMATIONS = {
+    "dashboard": "https://assets5.lottiefiles.com/packages/lf20_5njp3vgg.json",
+    "diabetes": "https://assets2.lottiefiles.com/packages/lf20_tll0j4bb.json",
+    "heart": "https://assets9.lottiefiles.com/packages/lf20_abqysclq.json",
+    "brain": "https://assets4.lottiefiles.com/packages/lf20_rwq6ciql.json",
+    "success": "https://assets4.lottiefiles.com/packages/lf20_auzja8ot.json",
+}
+
+_loaded = {}
+_failed_at = {}
+_fetching = set()
+_lock = threading.Lock()
+
+
+def is_valid_animation(data):
+    return (
+        isinstance(data, dict)
+        and isinstance(data.get("layers"), list)
+        and "v" in data
+        and isinstance(data.get("w"), (int, float))
+        and isinstance(data.get("h"), (int, float))
+    )
+
+
+def _read(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if is_valid_animation(data) else None
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def fetch_animation(name, timeout=FETCH_TIMEOUT):
+    import requests
+
+    r = requests.get(ANIMATIONS[name], timeout=timeout)
+    r.raise_for_status()
+    data = r.json()
+    if not is_valid_animation(data):
+        raise ValueError(f"{ANIMATIONS[name]} is not a Lottie animation")
+    return data
+
+
+def _fetch_into_cache(name):
+    try:
+        data = fetch_animation(name)
+        _write(os.path.join(CACHE_DIR, f"{name}.json"), data)
+    except Exception:
+        data = None
+    with _lock:
+        _fetching.discard(name)
+        if data is None:
+            _failed_at[name] = time.monotonic()
+        else:
+            _loaded[name] = data
+            _failed_at.pop(name, None)
+
+
+def _fetch_in_background(names):
+    now = time.monotonic()
+    with _lock:
+        names = [
+            n for n in names
+            if n not in _fetching and now - _failed_at.get(n, -RETRY_AFTER) >= RETRY_AFTER
+        ]
+        _fetching.update(names)
+    if not names:
+        return
+
+    def run():
+        with ThreadPoolExecutor(max_workers=len(names)) as pool:
+            list(pool.map(_fetch_into_cache, names))
+
+    threading.Thread(target=run, name="lottie-fetch", daemon=True).start()
+
+
+def get_animation(name):
+    """Return the animation for ``name`` or ``None`` if it is not on disk yet."""
+    return load_animations([name])[name]
+
+
+def load_animations(names=None):
+    """Return ``{name: animation or None}`` without touching the network."""
+    names = list(ANIMATIONS) if names is None else list(names)
+    result, missing = {}, []
+    for name in names:
+        data = _loaded.get(name)
+        if data is None:
+            data = _read(os.path.join(BUNDLE_DIR, f"{name}.json")) or _read(os.path.join(CACHE_DIR, f"{name}.json"))
+            if data is not None:
+                with _lock:
+                    _loaded[name] = data
+            else:
+                missing.append(name)
+        result[name] = data
+    if missing:
+        _fetch_in_background(missing)
+    return result
+
+
+def sync_bundle(timeout=30):
+    """Download every animation into the bundle directory; returns failures."""
+    failures = {}
+
+    def sync(name):
+        try:
+            _write(os.path.join(BUNDLE_DIR, f"{name}.json"), fetch_animation(name, timeout))
+        except Exception as e:
+            failures[name] = str(e)
+
+    with ThreadPoolExecutor(max_workers=len(ANIMATIONS)) as pool:
+        list(pool.map(sync, ANIMATIONS))
+    return failures
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["--sync"]:
+        sys.exit("usage: python lottie_assets.py --sync")
+    failed = sync_bundle()
+    for name, error in failed.items():
+        print(f"{name}: {error}", file=sys.stderr)
+    print(f"Bundled {len(ANIMATIONS) - len(failed)}/{len(ANIMATIONS)} animations in {BUNDLE_DIR}")
+    sys.exit(1 if failed else 0)
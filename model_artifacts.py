@@ -0,0 +1,334 @@
+"""Pickle-free model artifacts: a JSON manifest plus memory-mapped ``.npy`` arrays.
+
+``convert`` turns a ``.sav`` pickle into a directory next to it::
+
+    diabetes_model.model/
+        manifest.json      format version, model kind, feature schema,
+                           classes, source .sav hash, array index
+        coef.npy ...       one plain array per parameter
+
+Loading reads the manifest and opens every array with ``mmap_mode="r"``.
+Nothing is unpickled and sklearn is never imported, the arrays are paged
+in from the OS cache on first use (so worker processes serving the same
+artifact share one copy), and load time does not grow with the number of
+trees the way unpickling a forest does.
+
+Supported kinds:
+    linear        LogisticRegression / linear SVC, optionally behind a StandardScaler
+    trees         DecisionTreeClassifier / RandomForestClassifier (binary)
+    gaussian_nb   GaussianNB
+
+Other models (e.g. an RBF SVC) can't be converted and keep loading from
+the pickle.
+
+Usage:
+    python model_artifacts.py convert     # every .sav in $DISEASE_MODEL_DIR
+    python model_artifacts.py verify      # compare against the pickles on the bundled CSVs
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+
+from diseases import DISEASES, get_spec, model_path
+from linear_scorer import LinearScorer, as_matrix
+
+FORMAT_VERSION = 1
+SUFFIX = ".model"
+MANIFEST = "manifest.json"
+TREE_BLOCK_CELLS = 1 << 14  # rows x trees walked per block; small enough to stay in cache
+
+
+def artifact_dir(sav_path):
+    return os.path.splitext(sav_path)[0] + SUFFIX
+
+
+def manifest_path(sav_path):
+    return os.path.join(artifact_dir(sav_path), MANIFEST)
+
+
+# ======================== SCORERS ========================
+class TreeEnsembleScorer:
+    """NumPy traversal of one or more binary decision trees, averaged like a forest.
+
+    All trees are flattened into shared node arrays; ``roots`` holds each
+    tree's first node. A block of rows walks every tree at once, one level
+    per step, for as many steps as the deepest tree has levels (leaves
+    point at themselves, so walkers that arrive early stay put).
+    """
+
+    kind = "trees"
+
+    def __init__(self, arrays, classes, feature_names, source_sha256=""):
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.positive = arrays["positive"]
+        self.roots = arrays["roots"]
+        self.depth = int(arrays["depth"][0])
+        self.classes_ = np.asarray(classes)
+        self.feature_names_in_ = np.asarray(feature_names, dtype=str)
+        self.n_features_in_ = len(self.feature_names_in_)
+        self.source_sha256 = source_sha256
+
+    @classmethod
+    def from_estimator(cls, estimator, source_sha256=""):
+        trees = getattr(estimator, "estimators_", [estimator])
+        left, right, feature, threshold, positive, roots = [], [], [], [], [], []
+        offset, depth = 0, 0
+        for tree in trees:
+            t = tree.tree_
+            if t.value.shape[1:] != (1, 2):
+                raise ValueError("only binary, single-output trees can be converted")
+            leaf = t.children_left == -1
+            roots.append(offset)
+            # Leaves point at themselves so finished walkers stay put.
+            own = np.arange(offset, offset + t.node_count)
+            left.append(np.where(leaf, own, t.children_left + offset))
+            right.append(np.where(leaf, own, t.children_right + offset))
+            feature.append(np.where(leaf, 0, t.feature))
+            threshold.append(np.where(leaf, np.inf, t.threshold))
+            value = t.value[:, 0, :]
+            positive.append(value[:, 1] / value.sum(axis=1))
+            offset += t.node_count
+            depth = max(depth, t.max_depth)
+        arrays = {
+            "left": np.concatenate(left).astype(np.int32),
+            "right": np.concatenate(right).astype(np.int32),
+            "feature": np.concatenate(feature).astype(np.int32),
+            "threshold": np.concatenate(threshold).astype(np.float64),
+            "positive": np.concatenate(positive).astype(np.float64),
+            "roots": np.asarray(roots, dtype=np.int32),
+            "depth": np.asarray([depth], dtype=np.int32),
+        }
+        return cls(arrays, estimator.classes_, estimator.feature_names_in_, source_sha256)
+
+    def arrays(self):
+        return {"left": self.left, "right": self.right, "feature": self.feature,
+                "threshold": self.threshold, "positive": self.positive, "roots": self.roots,
+                "depth": np.asarray([self.depth], dtype=np.int32)}
+
+    def predict_proba(self, X):
+        # sklearn compares float32 copies of the inputs against the thresholds.
+        X = as_matrix(X, self.feature_names_in_).astype(np.float32)
+        n_trees = len(self.roots)
+        block = max(1, TREE_BLOCK_CELLS // n_trees)
+        positive = np.empty(len(X))
+        for start in range(0, len(X), block):
+            rows = X[start:start + block]
+            flat = rows.ravel()
+            # Offset of each row in ``flat``, so one take() gathers the split feature.
+            base = (np.arange(len(rows), dtype=np.int64) * self.n_features_in_)[:, None]
+            node = np.broadcast_to(self.roots, (len(rows), n_trees)).copy()
+            for _ in range(self.depth):
+                go_left = flat.take(base + self.feature.take(node)) <= self.threshold.take(node)
+                node = np.where(go_left, self.left.take(node), self.right.take(node))
+            positive[start:start + len(rows)] = self.positive.take(node).mean(axis=1)
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+
+class GaussianNBScorer:
+    kind = "gaussian_nb"
+
+    def __init__(self, arrays, classes, feature_names, source_sha256=""):
+        self.theta = arrays["theta"]
+        self.var = arrays["var"]
+        self.log_prior = arrays["log_prior"]
+        self.classes_ = np.asarray(classes)
+        self.feature_names_in_ = np.asarray(feature_names, dtype=str)
+        self.n_features_in_ = len(self.feature_names_in_)
+        self.source_sha256 = source_sha256
+
+    @classmethod
+    def from_estimator(cls, estimator, source_sha256=""):
+        if len(estimator.classes_) != 2:
+            raise ValueError("only binary GaussianNB models can be converted")
+        arrays = {
+            "theta": np.asarray(estimator.theta_, dtype=np.float64),
+            "var": np.asarray(estimator.var_, dtype=np.float64),
+            "log_prior": np.log(np.asarray(estimator.class_prior_, dtype=np.float64)),
+        }
+        return cls(arrays, estimator.classes_, estimator.feature_names_in_, source_sha256)
+
+    def arrays(self):
+        return {"theta": self.theta, "var": self.var, "log_prior": self.log_prior}
+
+    def predict_proba(self, X):
+        X = as_matrix(X, self.feature_names_in_)
+        jll = self.log_prior - 0.5 * np.log(2.0 * np.pi * self.var).sum(axis=1)
+        jll = jll - 0.5 * (((X[:, None, :] - self.theta) ** 2) / self.var).sum(axis=2)
+        jll = jll - jll.max(axis=1, keepdims=True)
+        p = np.exp(jll)
+        return p / p.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def _linear_arrays(scorer):
+    return {"coef": scorer.coef, "intercept": np.asarray([scorer.intercept])}
+
+
+def _linear_from_arrays(arrays, classes, feature_names, source_sha256):
+    return LinearScorer(arrays["coef"], arrays["intercept"][0], classes, feature_names, source_sha256)
+
+
+KINDS = {
+    "linear": (LinearScorer.from_estimator, _linear_arrays, _linear_from_arrays),
+    "trees": (TreeEnsembleScorer.from_estimator, TreeEnsembleScorer.arrays, TreeEnsembleScorer),
+    "gaussian_nb": (GaussianNBScorer.from_estimator, GaussianNBScorer.arrays, GaussianNBScorer),
+}
+
+
+def _kind_of(estimator):
+    final = estimator.steps[-1][1] if hasattr(estimator, "steps") else estimator
+    name = type(final).__name__
+    if hasattr(final, "coef_") and (name != "SVC" or final.kernel == "linear"):
+        return "linear"
+    if name in ("DecisionTreeClassifier", "RandomForestClassifier", "ExtraTreesClassifier"):
+        return "trees"
+    if name == "GaussianNB":
+        return "gaussian_nb"
+    raise ValueError(f"{name} models can't be converted")
+
+
+# ======================== READ / WRITE ========================
+def from_estimator(estimator, source_sha256=""):
+    return KINDS[_kind_of(estimator)][0](estimator, source_sha256)
+
+
+def save(scorer, directory, kind=None):
+    """Write ``scorer`` as a manifest plus arrays, replacing ``directory`` atomically."""
+    kind = kind or getattr(scorer, "kind", "linear")
+    arrays = KINDS[kind][1](scorer)
+    tmp = f"{directory}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    index = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        np.save(os.path.join(tmp, f"{name}.npy"), array, allow_pickle=False)
+        index[name] = {"file": f"{name}.npy", "dtype": array.dtype.str, "shape": list(array.shape)}
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "kind": kind,
+        "features": [{"name": str(n), "dtype": "float64"} for n in scorer.feature_names_in_],
+        "classes": scorer.classes_.tolist(),
+        "source_sha256": scorer.source_sha256,
+        "arrays": index,
+    }
+    with open(os.path.join(tmp, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    old = f"{directory}.{os.getpid()}.old"
+    if os.path.exists(directory):
+        os.replace(directory, old)
+    os.replace(tmp, directory)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"{directory} has artifact format {manifest.get('format_version')}, expected {FORMAT_VERSION}")
+    if manifest.get("kind") not in KINDS:
+        raise ValueError(f"{directory} has unknown model kind {manifest.get('kind')!r}")
+    return manifest
+
+
+def load(directory, mmap=True):
+    """Load an artifact directory; arrays are memory-mapped unless ``mmap`` is False."""
+    manifest = read_manifest(directory)
+    arrays = {}
+    for name, meta in manifest["arrays"].items():
+        array = np.load(os.path.join(directory, meta["file"]), mmap_mode="r" if mmap else None, allow_pickle=False)
+        if array.dtype.str != meta["dtype"] or list(array.shape) != meta["shape"]:
+            raise ValueError(f"{directory}/{meta['file']} doesn't match its manifest entry")
+        arrays[name] = array
+    features = [f["name"] for f in manifest["features"]]
+    return KINDS[manifest["kind"]][2](arrays, manifest["classes"], features, manifest["source_sha256"])
+
+
+def convert_file(sav):
+    """Convert one ``.sav``; returns the artifact directory, or None if the model isn't supported."""
+    import pickle
+
+    with open(sav, "rb") as f:
+        data = f.read()
+    estimator = pickle.loads(data)
+    try:
+        scorer = from_estimator(estimator, hashlib.sha256(data).hexdigest())
+    except ValueError:
+        return None
+    save(scorer, artifact_dir(sav), _kind_of(estimator))
+    return artifact_dir(sav)
+
+
+def convert(model_dir=None):
+    return {disease: convert_file(model_path(disease, model_dir)) for disease in DISEASES}
+
+
+def verify(model_dir=None):
+    """Compare each artifact with its pickle on the bundled CSV.
+
+    Returns ``{disease: (max_abs_score_diff, n_prediction_mismatches)}``, or
+    None for a disease without an up-to-date artifact.
+    """
+    import pickle
+
+    import datasets
+    from diseases import score_matrix
+
+    report = {}
+    for disease in DISEASES:
+        sav = model_path(disease, model_dir)
+        with open(sav, "rb") as f:
+            data = f.read()
+        try:
+            scorer = load(artifact_dir(sav))
+        except (OSError, ValueError):
+            scorer = None
+        if scorer is None or scorer.source_sha256 != hashlib.sha256(data).hexdigest():
+            report[disease] = None
+            continue
+        X = datasets.load(disease, get_spec(disease)["features"])
+        expected, expected_scores = score_matrix(pickle.loads(data), X)
+        actual, actual_scores = score_matrix(scorer, X)
+        report[disease] = (float(np.abs(expected_scores - actual_scores).max()), int((expected != actual).sum()))
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert pickled models to manifest + .npy artifacts.")
+    parser.add_argument("command", choices=["convert", "verify"])
+    parser.add_argument("--model-dir", default=os.environ.get("DISEASE_MODEL_DIR"))
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        for disease, path in convert(args.model_dir).items():
+            print(f"{disease}: {path or 'unsupported model type, kept as pickle only'}")
+        return 0
+
+    failed = False
+    for disease, result in verify(args.model_dir).items():
+        if result is None:
+            print(f"{disease}: no artifact for the current .sav, skipped")
+            continue
+        diff, mismatches = result
+        ok = diff <= args.tolerance and mismatches == 0
+        failed |= not ok
+        print(f"{disease}: max |Δ score| = {diff:.3g}, prediction mismatches = {mismatches} {'OK' if ok else 'FAIL'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Lazy, hot-reloading registry for the disease models.
+
+Artifacts are resolved from ``$DISEASE_MODEL_DIR`` (default: the app
+directory). A model is unpickled the first time it is asked for, so pages
+nobody opens never pay for it. Every ``get`` stats the file: when its
+mtime or size changes, the file is re-read and re-hashed, and only a new
+content hash triggers an unpickle. The entry is swapped in one assignment
+after the new model has loaded, so callers see either the old model or the
+new one, never a half-loaded state. A file that fails to load mid-rollout
+leaves the previous model in service.
+
+When ``model_artifacts.py convert`` has written a ``.model`` directory
+whose source hash matches the ``.sav`` bytes, that NumPy scorer is served
+instead of the pickle, which keeps sklearn out of the process entirely.
+A ``.model`` directory can also be deployed without its ``.sav``; it is
+then loaded on its own and nothing is ever unpickled.
+"""
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import namedtuple
+
+from diseases import BASE_DIR, get_spec, model_path
+
+LoadedModel = namedtuple("LoadedModel", "disease model sha256 path mtime_ns size loaded_at")
+
+
+class ModelLoadError(Exception):
+    pass
+
+
+class ModelRegistry:
+    def __init__(self, model_dir=None, prefer_compiled=True):
+        self.model_dir = model_dir or os.environ.get("DISEASE_MODEL_DIR") or BASE_DIR
+        self.prefer_compiled = prefer_compiled
+        self._entries = {}
+        self._by_hash = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def path(self, disease):
+        """The file whose changes trigger a reload: the ``.sav``, else an artifact manifest."""
+        sav = model_path(disease, self.model_dir)
+        if not os.path.exists(sav):
+            from model_artifacts import manifest_path
+
+            if os.path.exists(manifest_path(sav)):
+                return manifest_path(sav)
+        return sav
+
+    def get(self, disease):
+        return self.entry(disease).model
+
+    def entry(self, disease):
+        """Return the current ``LoadedModel`` for ``disease``, (re)loading if needed."""
+        get_spec(disease)
+        path = self.path(disease)
+        entry = self._entries.get(disease)
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            if entry is not None:
+                return entry
+            raise ModelLoadError(f"{get_spec(disease)['label']} model not found at {path}") from e
+        if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+            return entry
+
+        with self._disease_lock(disease):
+            entry = self._entries.get(disease)
+            if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+                return entry
+            try:
+                entry = self._load(disease, path)
+            except (OSError, ValueError, KeyError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+                if entry is not None:
+                    return entry
+                raise ModelLoadError(f"Could not load {get_spec(disease)['label']} model from {path}: {e}") from e
+            if disease in self._entries:
+                self.reloads += 1
+            self._entries[disease] = entry
+            return entry
+
+    def loaded(self):
+        return dict(self._entries)
+
+    def _disease_lock(self, disease):
+        with self._lock:
+            return self._locks.setdefault(disease, threading.Lock())
+
+    def _load(self, disease, path):
+        if os.path.basename(path) == "manifest.json":
+            import model_artifacts
+
+            stat = os.stat(path)
+            model = model_artifacts.load(os.path.dirname(path))
+            return LoadedModel(disease, model, model.source_sha256, path, stat.st_mtime_ns, stat.st_size, time.time())
+
+        # Hash and unpickle the same bytes so the recorded hash always
+        # describes the model actually in memory.
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            data = f.read()
+        sha256 = hashlib.sha256(data).hexdigest()
+        model = self._by_hash.get(sha256)
+        if model is None:
+            model = self._load_compiled(path, sha256) or pickle.loads(data)
+            self._by_hash[sha256] = model
+        live = {e.sha256 for e in self._entries.values() if e.disease != disease} | {sha256}
+        for stale in set(self._by_hash) - live:
+            del self._by_hash[stale]
+        return LoadedModel(disease, model, sha256, path, stat.st_mtime_ns, stat.st_size, time.time())
+
+    def _load_compiled(self, path, sha256):
+        if not self.prefer_compiled:
+            return None
+        import model_artifacts
+
+        try:
+            scorer = model_artifacts.load(model_artifacts.artifact_dir(path))
+        except (OSError, ValueError, KeyError):
+            return None
+        return scorer if scorer.source_sha256 == sha256 else None
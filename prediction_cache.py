@@ -0,0 +1,152 @@
+"""Process-wide LRU/TTL cache for single-row predictions.
+
+Many screenings submit the same inputs (the form defaults, a patient
+re-checked later, a client retrying). Results are cached per process and
+shared by every Streamlit session and service request, keyed by the model
+version and a canonical form of the feature vector: values are cast to
+float64 and ``-0.0``/NaN payloads are normalised, so ``30``, ``30.0`` and
+``np.int64(30)`` are the same key.
+
+The app's pages go through ``get_or_compute``: identical requests that
+arrive while the first is still being computed wait for it instead of
+computing again. The scoring service looks each row up with ``get`` and
+``put``s the rows its micro-batch had to score, so a repeated request
+skips the model. Hit and miss counters are in ``stats()``, which the
+service reports on ``/health`` and ``tracing`` exports to Prometheus. The cache is bounded by entry
+count and by an approximate byte budget, and entries expire after
+``ttl`` seconds; evicting by either limit drops the least recently used
+entries first.
+
+Limits come from ``PREDICTION_CACHE_SIZE`` (entries, default 4096),
+``PREDICTION_CACHE_TTL`` (seconds, default 3600) and
+``PREDICTION_CACHE_MAX_BYTES`` (default 8 MiB).
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+MAX_ENTRIES = int(os.environ.get("PREDICTION_CACHE_SIZE", "4096"))
+TTL_SECONDS = float(os.environ.get("PREDICTION_CACHE_TTL", "3600"))
+MAX_BYTES = int(os.environ.get("PREDICTION_CACHE_MAX_BYTES", str(8 << 20)))
+
+# Dict slot, OrderedDict links and the entry tuple, roughly.
+ENTRY_OVERHEAD = 200
+
+
+def feature_key(model_version, values):
+    """Cache key for one feature vector scored by ``model_version``."""
+    x = np.ascontiguousarray(values, dtype=np.float64).ravel() + 0.0  # -0.0 -> 0.0
+    x[np.isnan(x)] = np.nan
+    return (model_version, x.tobytes())
+
+
+def _sizeof(obj):
+    if isinstance(obj, (tuple, list)):
+        return sys.getsizeof(obj) + sum(_sizeof(o) for o in obj)
+    if isinstance(obj, np.ndarray) and obj.base is not None:
+        return sys.getsizeof(obj) + obj.nbytes  # getsizeof leaves out a view's data buffer
+    return sys.getsizeof(obj)
+
+
+class PredictionCache:
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for ``key``, calling ``compute()`` once on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                self._remove(key)
+                self.expirations += 1
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._inflight[key]
+            self._store(key, value)
+        future.set_result(value)
+        return value
+
+    def get(self, key):
+        """Return the cached value for ``key``, or None; for callers that batch their own misses."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries), "bytes": self.bytes,
+                "hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+                "evictions": self.evictions, "expirations": self.expirations,
+            }
+
+    def _store(self, key, value):
+        size = _sizeof(key) + _sizeof(value) + ENTRY_OVERHEAD
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, time.monotonic() + self.ttl, size)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        self.bytes -= self._entries.pop(key)[2]
+
+
+default_cache = PredictionCache()
@@ -0,0 +1,377 @@
+"""Background export of prediction reports as PDF, CSV or XLSX.
+
+An export job reads the reports ``PART_SIZE`` at a time (one report, or an
+owner's whole history via ``ReportStore.iter_pages``) and renders each
+part to its own file in a worker process, at most ``EXPORT_MAX_WORKERS``
+at once, so a 5,000-report PDF neither blocks a rerun nor holds the GIL
+the Streamlit server needs. Finished parts can be downloaded while later
+ones are still rendering; once all are done they are joined into one
+file (CSV) or one zip (PDF, XLSX).
+
+The workers are ``python report_export.py render`` processes fed the
+part as JSON on stdin, not a ``multiprocessing`` pool: Streamlit runs the
+app as ``__main__``, and spawn/forkserver workers re-run ``__main__``
+before doing any work (fork is unsafe in the threaded server).
+
+PDFs are written by the small text-only writer below (one A4 page per
+report, standard Helvetica), so no PDF library is needed. XLSX needs the
+optional ``openpyxl`` package and is only offered when it is installed.
+
+Jobs live in a process-wide table like ``bulk_jobs``; their files go to
+``$EXPORT_JOB_DIR`` and are removed ``EXPORT_JOB_TTL`` seconds after they
+finish. ``EXPORT_MAX_WORKERS=0`` renders in the job's thread instead.
+
+Usage:
+    python report_export.py history <owner> --format pdf   # export an owner's history from reports.db
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from report_store import PATIENT_FIELDS
+
+JOB_DIR = os.environ.get("EXPORT_JOB_DIR") or os.path.join(tempfile.gettempdir(), "disease-report-exports")
+JOB_TTL = float(os.environ.get("EXPORT_JOB_TTL", "3600"))
+MAX_WORKERS = int(os.environ.get("EXPORT_MAX_WORKERS", "2"))
+PART_SIZE = 500
+FORMATS = {
+    "pdf": {"label": "PDF", "mime": "application/pdf"},
+    "csv": {"label": "CSV", "mime": "text/csv"},
+    "xlsx": {"label": "Excel (XLSX)", "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+}
+COLUMNS = ("id", "date", "disease", "result", "risk_level", "score") + PATIENT_FIELDS + ("parameters",)
+
+_jobs = {}
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="export")
+_renderers = ThreadPoolExecutor(max_workers=max(MAX_WORKERS, 1), thread_name_prefix="export-render")
+
+
+def available_formats():
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return [f for f in FORMATS if f != "xlsx"]
+    return list(FORMATS)
+
+
+# ======================== PDF ========================
+def _pdf_string(text):
+    data = str(text).encode("cp1252", "replace")  # what /WinAnsiEncoding can show
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def write_pdf(out, pages):
+    """Write a PDF with one A4 page per item of ``pages``, each a list of ``(font_size, bold, text)`` lines."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # the page tree, once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for lines in pages:
+        y, ops = 790, []
+        for size, bold, text in lines:
+            y -= size * 1.5
+            ops.append(b"BT /F%d %d Tf 50 %d Td %s Tj ET" % (2 if bold else 1, size, y, _pdf_string(text)))
+        stream = b"\n".join(ops)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842]"
+                       b" /Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    offsets, position = [], out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    for number, body in enumerate(objects, 1):
+        offsets.append(position)
+        position += out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%EOF\n" % (len(objects) + 1, position))
+
+
+def _report_page(report):
+    lines = [
+        (18, True, f"{report['disease']} Assessment"),
+        (11, False, f"Date: {report['date']}"),
+        (11, False, f"Result: {report['result']}"),
+        (11, False, f"Risk Level: {report['risk_level']}"),
+        (11, False, f"Risk Score: {report['score']:.1f}%"),
+    ]
+    if report["parameters"]:
+        lines.append((13, True, "Test Parameters"))
+        lines.extend((10, False, f"{name}: {value}") for name, value in report["parameters"].items())
+    if report["patient_info"]:
+        lines.append((13, True, "Patient Information"))
+        lines.extend((10, False, f"{field.replace('_', ' ').title()}: {value}")
+                     for field, value in report["patient_info"].items())
+    lines.append((8, False, "Generated by the AI Disease Prediction app. Not a diagnosis; consult a healthcare professional."))
+    return lines
+
+
+# ======================== PARTS ========================
+def _row(report):
+    patient = report["patient_info"]
+    return ([report["id"], report["date"], report["disease"], report["result"], report["risk_level"],
+             round(report["score"], 2)] + [patient.get(f) for f in PATIENT_FIELDS]
+            + [json.dumps(report["parameters"], default=float)])
+
+
+def render_part(fmt, reports, path):
+    """Render a list of report dicts to ``path``."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    if fmt == "pdf":
+        with open(tmp, "wb") as f:
+            write_pdf(f, [_report_page(r) for r in reports])
+    elif fmt == "csv":
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(COLUMNS)
+            writer.writerows(_row(r) for r in reports)
+    else:
+        from openpyxl import Workbook
+
+        book = Workbook(write_only=True)
+        sheet = book.create_sheet("Reports")
+        sheet.append(COLUMNS)
+        for report in reports:
+            sheet.append(_row(report))
+        book.save(tmp)
+    os.replace(tmp, path)
+    return len(reports)
+
+
+def render_in_process(fmt, reports, path, timeout=600):
+    """``render_part`` in a fresh worker process; the calling thread only waits on it."""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "render", fmt, path],
+        input=json.dumps(reports, default=float).encode(), capture_output=True, timeout=timeout,
+    )
+    if result.returncode != 0:
+        lines = result.stderr.decode(errors="replace").strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"export worker exited with {result.returncode}")
+    return len(reports)
+
+
+# ======================== JOBS ========================
+class ExportJob:
+    def __init__(self, fmt, total, name):
+        self.id = uuid.uuid4().hex
+        self.format = fmt
+        self.total = total
+        self.name = name
+        self.status = "queued"  # queued -> running -> done | failed | cancelled
+        self.error = None
+        self.exported = 0
+        self.parts = []  # (index, path, reports), in the order they finished
+        self.output_path = None
+        self.started = time.time()
+        self.finished = None
+        self._cancel = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    @property
+    def progress(self):
+        if self.status == "done":
+            return 1.0
+        return min(1.0, self.exported / self.total) if self.total else 0.0
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def mime(self):
+        if self.output_path and self.output_path.endswith(".zip"):
+            return "application/zip"
+        return FORMATS[self.format]["mime"]
+
+    def cancel(self):
+        self._cancel.set()
+
+    def part_file_name(self, index):
+        return f"{self.name}-part{index + 1:03d}.{self.format}"
+
+    def output_file_name(self):
+        return f"{self.name}{os.path.splitext(self.output_path)[1]}"
+
+    def finished_parts(self):
+        return sorted(self.parts)
+
+    def _path(self, suffix):
+        return os.path.join(JOB_DIR, f"{self.id}.{suffix}")
+
+    def _run(self, pages):
+        self.status = "running"
+        in_flight = deque()
+        status = "cancelled"
+        try:
+            for index, page in enumerate(pages):
+                if self._cancel.is_set():
+                    return
+                path = self._path(f"part{index:03d}.{self.format}")
+                reports = [r.to_dict() for r in page]
+                if MAX_WORKERS <= 0:
+                    self._part_done(index, path, render_part(self.format, reports, path))
+                    continue
+                in_flight.append((index, path, _renderers.submit(render_in_process, self.format, reports, path)))
+                while len(in_flight) > MAX_WORKERS:  # keeps at most a few parts' reports in memory
+                    self._part_done(*self._wait(in_flight.popleft()))
+            while in_flight:
+                if self._cancel.is_set():
+                    return
+                self._part_done(*self._wait(in_flight.popleft()))
+            self.output_path = self._join()
+            status = "done"
+        except Exception as e:
+            self.error = str(e) or type(e).__name__
+            status = "failed"
+        finally:
+            self._discard(in_flight)
+            self.finished = time.time()
+            self.status = status
+
+    @staticmethod
+    def _discard(in_flight):
+        """Drop parts still queued or rendering after a cancel or failure, and delete their files."""
+        wait([future for _, _, future in in_flight if not future.cancel()])
+        for _, path, _ in in_flight:
+            _remove(path)
+
+    @staticmethod
+    def _wait(item):
+        index, path, future = item
+        return index, path, future.result()
+
+    def _part_done(self, index, path, count):
+        self.parts.append((index, path, count))
+        self.exported += count
+
+    def _join(self):
+        parts = self.finished_parts()
+        if len(parts) == 1:
+            return parts[0][1]
+        if not parts:  # an empty history still gets a (header-only) file
+            path = self._path(f"part000.{self.format}")
+            render_part(self.format, [], path)
+            return path
+        if self.format == "csv":
+            target = self._path("csv")
+            with open(target, "wb") as out:
+                for i, (_, path, _) in enumerate(parts):
+                    with open(path, "rb") as f:
+                        if i:
+                            f.readline()  # every part repeats the header
+                        shutil.copyfileobj(f, out, 1 << 20)
+            return target
+        target = self._path("zip")
+        with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as z:
+            for index, path, _ in parts:
+                z.write(path, self.part_file_name(index))
+        return target
+
+
+def _files(job):
+    return [path for _, path, _ in job.parts] + ([job.output_path] if job.output_path else [])
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _expire():
+    now = time.time()
+    with _lock:
+        stale = [j for j in _jobs.values() if j.done and now - j.finished > JOB_TTL]
+        for job in stale:
+            del _jobs[job.id]
+    for job in stale:
+        for path in set(_files(job)):
+            _remove(path)
+
+
+def submit(pages, total, fmt="pdf", name="reports"):
+    """Start exporting ``pages`` (an iterable of lists of ``Report``) in the background; returns the job."""
+    if fmt not in available_formats():
+        raise ValueError(f"unsupported export format: {fmt}")
+    _expire()
+    os.makedirs(JOB_DIR, exist_ok=True)
+    job = ExportJob(fmt, total, name)
+    with _lock:
+        _jobs[job.id] = job
+    _executor.submit(job._run, pages)
+    return job
+
+
+def export_history(store, owner, fmt="pdf"):
+    return submit(store.iter_pages(owner, PART_SIZE), store.count(owner), fmt,
+                  f"reports-{time.strftime('%Y%m%d-%H%M%S')}")
+
+
+def export_report(report, fmt="pdf"):
+    name = f"{report.disease.lower()}-report-{report.date.replace(' ', '_').replace(':', '')}"
+    return submit([[report]], 1, fmt, name)
+
+
+def get(job_id):
+    return _jobs.get(job_id)
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export prediction reports.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    history = commands.add_parser("history", help="export an owner's whole history")
+    history.add_argument("owner", help="the owner token of the history (the report_owner cookie)")
+    history.add_argument("--format", choices=list(FORMATS), default="pdf")
+    history.add_argument("--output", help="where to copy the result (default: print its path)")
+    render = commands.add_parser("render", help="render report dicts (JSON on stdin); used by the workers")
+    render.add_argument("format", choices=list(FORMATS))
+    render.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "render":
+        render_part(args.format, json.load(sys.stdin.buffer), args.path)
+        return 0
+
+    from report_store import ReportStore
+
+    job = export_history(ReportStore(), args.owner, args.format)
+    while not job.done:
+        time.sleep(0.2)
+        print(f"\r{job.exported:,}/{job.total:,} reports ({len(job.parts)} parts)", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    if job.status != "done":
+        print(f"export {job.status}: {job.error}", file=sys.stderr)
+        return 1
+    print(f"{job.exported:,} reports in {job.elapsed:.1f}s", file=sys.stderr)
+    if args.output:
+        shutil.copyfile(job.output_path, args.output)
+    print(args.output or job.output_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""Persistent SQLite store for prediction reports.
+
+Replaces the per-session ``st.session_state.reports`` list. Reports are
+keyed by an ``owner`` token (kept in a browser cookie, so it survives a
+refresh; ``reassign`` rotates it), and indexed by owner/date,
+owner/disease and patient name so the My Reports page can page through
+history and aggregate in SQL instead of looping over every report on each
+rerun.
+
+Writes are buffered and committed in one transaction once ``batch_size``
+reports are pending or ``flush_interval`` seconds have passed; every read
+flushes first, so callers always see their own writes.
+
+Per-owner, per-disease counts and score sums live in ``report_stats`` and
+are bumped in the same transaction as the inserts, so summaries cost one
+small lookup no matter how many reports an owner has.
+
+Reports in memory (a session's latest prediction, the write buffer, a
+page of history) are ``Report`` records rather than nested dicts: slotted
+attributes, numeric parameter values packed in an array next to a label
+tuple shared by every report with the same parameters, and patient
+details as a tuple in ``PATIENT_FIELDS`` order. A session keeps only its latest report; the
+rest of its history is only in the database.
+"""
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from array import array
+
+from diseases import BASE_DIR
+
+DEFAULT_PATH = os.environ.get("REPORT_DB_PATH", os.path.join(BASE_DIR, "reports.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    patient TEXT,
+    disease TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    score REAL NOT NULL,
+    risk_level TEXT NOT NULL,
+    result TEXT NOT NULL,
+    parameters TEXT,
+    patient_info TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_reports_owner_date ON reports (owner, created_at);
+CREATE INDEX IF NOT EXISTS idx_reports_owner_disease ON reports (owner, disease, created_at);
+CREATE INDEX IF NOT EXISTS idx_reports_patient ON reports (patient, created_at);
+CREATE TABLE IF NOT EXISTS report_stats (
+    owner TEXT NOT NULL,
+    disease TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    score_sum REAL NOT NULL,
+    PRIMARY KEY (owner, disease)
+);
+"""
+
+REBUILD_STATS = """
+INSERT INTO report_stats (owner, disease, count, score_sum)
+SELECT owner, disease, COUNT(*), SUM(score) FROM reports GROUP BY owner, disease
+"""
+
+COLUMNS = "id, disease, result, created_at, score, risk_level, parameters, patient_info"
+PATIENT_FIELDS = ("name", "phone", "address", "place", "blood_group", "height", "weight")
+
+_layouts = {}
+
+
+def _layout(parameters):
+    """Shared ``(labels, kinds)`` for a parameter set; ``kinds`` is None unless every value is a number."""
+    labels = tuple(parameters)
+    kinds = None
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in parameters.values()):
+        kinds = "".join("i" if isinstance(v, int) else "f" for v in parameters.values())
+    key = (labels, kinds)
+    return _layouts.setdefault(key, key)
+
+
+# ======================== RECORDS ========================
+class Report:
+    """One prediction report; ``to_dict()`` gives the old nested-dict form.
+
+    Numeric parameters are packed into an ``array('d')`` (8 bytes a value
+    instead of a float object each); ``layout`` remembers which were ints.
+    """
+
+    __slots__ = ("id", "disease", "result", "date", "score", "risk_level", "layout", "values", "patient")
+
+    def __init__(self, disease, result, date, score, risk_level, parameters=None, patient_info=None, id=None):
+        self.id = id
+        self.disease = disease
+        self.result = result
+        self.date = date
+        self.score = float(score)
+        self.risk_level = risk_level
+        parameters = parameters or {}
+        self.layout = _layout(parameters)
+        values = parameters.values()
+        self.values = array("d", values) if self.layout[1] is not None else tuple(values)
+        self.patient = None
+        self.set_patient_info(patient_info)
+
+    @classmethod
+    def from_dict(cls, report):
+        return cls(report["disease"], report["result"], report["date"], report["score"], report["risk_level"],
+                   report.get("parameters"), report.get("patient_info"), report.get("id"))
+
+    @classmethod
+    def from_row(cls, row):
+        report_id, disease, result, date, score, risk_level, parameters, patient_info = row
+        return cls(disease, result, date, score, risk_level,
+                   json.loads(parameters) if parameters else None,
+                   json.loads(patient_info) if patient_info else None, report_id)
+
+    @property
+    def parameters(self):
+        labels, kinds = self.layout
+        if kinds is None:
+            return dict(zip(labels, self.values))
+        return {k: int(v) if kind == "i" else v for k, kind, v in zip(labels, kinds, self.values)}
+
+    @property
+    def patient_info(self):
+        if self.patient is None:
+            return {}
+        return {k: v for k, v in zip(PATIENT_FIELDS, self.patient) if v is not None}
+
+    @property
+    def patient_name(self):
+        return self.patient[0] if self.patient else None
+
+    def set_patient_info(self, patient_info):
+        self.patient = tuple(patient_info.get(k) for k in PATIENT_FIELDS) if patient_info else None
+
+    def to_dict(self):
+        return {"id": self.id, "disease": self.disease, "result": self.result, "date": self.date,
+                "score": self.score, "risk_level": self.risk_level,
+                "parameters": self.parameters, "patient_info": self.patient_info}
+
+
+def _to_json(value):
+    return json.dumps(value, default=float) if value else None
+
+
+class ReportStore:
+    def __init__(self, path=DEFAULT_PATH, batch_size=50, flush_interval=2.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._timer = None
+        self._lock = threading.RLock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        with self._conn:
+            # Databases written before report_stats existed get it backfilled once.
+            if self._conn.execute("SELECT NOT EXISTS (SELECT 1 FROM report_stats)").fetchone()[0]:
+                self._conn.execute(REBUILD_STATS)
+        atexit.register(self.flush)
+
+    # ======================== WRITES ========================
+    def add(self, owner, report):
+        """Queue ``report`` (a ``Report``, or a report dict) for ``owner``; its ``id`` is set when it is written."""
+        if not isinstance(report, Report):
+            report = Report.from_dict(report)
+        with self._lock:
+            self._pending.append((owner, report))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            rows = [(
+                owner, r.patient_name or None, r.disease, r.date, r.score, r.risk_level, r.result,
+                _to_json(r.parameters), _to_json(r.patient_info),
+            ) for owner, r in pending]
+            deltas = {}
+            for row in rows:
+                count, score_sum = deltas.get((row[0], row[2]), (0, 0.0))
+                deltas[(row[0], row[2])] = (count + 1, score_sum + row[4])
+            with self._conn:
+                for (_, report), row in zip(pending, rows):
+                    report.id = self._conn.execute(
+                        "INSERT INTO reports (owner, patient, disease, created_at, score, risk_level, result,"
+                        " parameters, patient_info) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        row,
+                    ).lastrowid
+                self._conn.executemany(
+                    "INSERT INTO report_stats (owner, disease, count, score_sum) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (owner, disease) DO UPDATE SET"
+                    " count = count + excluded.count, score_sum = score_sum + excluded.score_sum",
+                    [(owner, disease, count, score_sum) for (owner, disease), (count, score_sum) in deltas.items()],
+                )
+
+    def set_patient_info(self, owner, report, patient_info):
+        """Attach ``patient_info`` to ``report`` (a ``Report`` passed to ``add``) and its saved row."""
+        with self._lock:
+            report.set_patient_info(patient_info)
+            if report.id is None:
+                return  # still in the write buffer, which is written with the new details
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE reports SET patient = ?, patient_info = ? WHERE id = ? AND owner = ?",
+                    (report.patient_name or None, _to_json(report.patient_info), report.id, owner),
+                )
+
+    def reassign(self, owner, new_owner):
+        """Move ``owner``'s history to ``new_owner`` (a fresh token), e.g. to revoke a leaked token."""
+        with self._lock:
+            self.flush()
+            with self._conn:
+                self._conn.execute("UPDATE reports SET owner = ? WHERE owner = ?", (new_owner, owner))
+                self._conn.execute(
+                    "INSERT INTO report_stats (owner, disease, count, score_sum)"
+                    " SELECT ?, disease, count, score_sum FROM report_stats WHERE owner = ?"
+                    " ON CONFLICT (owner, disease) DO UPDATE SET"
+                    " count = count + excluded.count, score_sum = score_sum + excluded.score_sum",
+                    (new_owner, owner),
+                )
+                self._conn.execute("DELETE FROM report_stats WHERE owner = ?", (owner,))
+
+    def clear(self, owner):
+        with self._lock:
+            self.flush()
+            with self._conn:
+                self._conn.execute("DELETE FROM reports WHERE owner = ?", (owner,))
+                self._conn.execute("DELETE FROM report_stats WHERE owner = ?", (owner,))
+
+    # ======================== READS ========================
+    def _query(self, sql, params):
+        with self._lock:
+            self.flush()
+            return self._conn.execute(sql, params).fetchall()
+
+    def count(self, owner, disease=None):
+        summary = self.summary(owner)
+        if disease is None:
+            return sum(count for count, _ in summary.values())
+        return summary.get(disease, (0, None))[0]
+
+    def summary(self, owner):
+        """Return ``{disease: (count, mean_score)}`` from the running totals."""
+        rows = self._query(
+            "SELECT disease, count, score_sum FROM report_stats WHERE owner = ? AND count > 0", (owner,)
+        )
+        return {disease: (count, score_sum / count) for disease, count, score_sum in rows}
+
+    def page(self, owner, offset=0, limit=10, disease=None):
+        """Return one page of reports, newest first."""
+        where, params = "owner = ?", [owner]
+        if disease is not None:
+            where, params = where + " AND disease = ?", params + [disease]
+        rows = self._query(
+            f"SELECT {COLUMNS} FROM reports WHERE {where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        )
+        return [Report.from_row(r) for r in rows]
+
+    def iter_pages(self, owner, size=500):
+        """Yield the owner's whole history, newest first, as lists of up to ``size`` reports.
+
+        Pages are fetched by keyset (the last page's date and id), so each
+        one costs an index range scan however deep into the history it is.
+        """
+        rows = self._query(
+            f"SELECT {COLUMNS} FROM reports WHERE owner = ? ORDER BY created_at DESC, id DESC LIMIT ?",
+            (owner, size),
+        )
+        while rows:
+            yield [Report.from_row(r) for r in rows]
+            last_id, last_date = rows[-1][0], rows[-1][3]
+            rows = self._query(
+                f"SELECT {COLUMNS} FROM reports WHERE owner = ? AND (created_at, id) < (?, ?)"
+                " ORDER BY created_at DESC, id DESC LIMIT ?",
+                (owner, last_date, last_id, size),
+            )
+
+    def timeline(self, owner, limit=500):
+        """Return the latest ``limit`` ``(date, score, disease)`` points, oldest first."""
+        rows = self._query(
+            "SELECT created_at, score, disease FROM reports WHERE owner = ?"
+            " ORDER BY created_at DESC, id DESC LIMIT ?",
+            (owner, limit),
+        )
+        return rows[::-1]
+
+    def by_patient(self, patient, limit=100):
+        rows = self._query(
+            f"SELECT {COLUMNS} FROM reports WHERE patient = ? ORDER BY created_at DESC LIMIT ?",
+            (patient, limit),
+        )
+        return [Report.from_row(r) for r in rows]
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+        atexit.unregister(self.flush)
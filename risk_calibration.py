@@ -0,0 +1,238 @@
+"""Calibrated risk percentages from the models' decision scores.
+
+The prediction pages used to show an ad-hoc formula plus random noise as
+the risk score. The score now comes from the real model: its
+``decision_function`` margin is mapped to a probability by a calibration
+curve fitted once on the bundled CSV (Platt scaling by default, isotonic
+regression on request) and stored as a small interpolation table, so
+scoring a row is a binary search plus one linear interpolation and the
+same inputs always give the same score.
+
+Tables are written to ``.cache/calibration`` and named by the SHA-256 of
+the model file and of the CSV, so retraining a model or replacing a
+dataset refits the curve on next use and nothing else ever does.
+
+Usage:
+    python risk_calibration.py fit [--method isotonic]
+"""
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+import datasets
+from diseases import BASE_DIR, DISEASES, csv_path, file_sha256, get_spec, score_matrix
+from prediction_cache import default_cache, feature_key
+
+CALIBRATION_DIR = os.path.join(BASE_DIR, ".cache", "calibration")
+CALIBRATION_VERSION = 1
+DEFAULT_METHOD = "platt"
+TABLE_SIZE = 129
+RISK_THRESHOLD = 0.5  # where the gauges turn from green to red
+
+Assessment = namedtuple("Assessment", "valid scores probabilities at_risk")
+
+_calibrators = {}
+_lock = threading.Lock()
+
+
+# ======================== FITTING ========================
+def fit_platt(scores, labels, iterations=100):
+    """Fit ``p = 1 / (1 + exp(a * s + b))`` by Newton's method (Platt, 1999).
+
+    Uses Platt's smoothed targets so a perfectly separable training set
+    doesn't push the curve to exactly 0 and 1.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    labels = np.asarray(labels) == 1
+    n_pos, n_neg = labels.sum(), (~labels).sum()
+    t = np.where(labels, (n_pos + 1.0) / (n_pos + 2.0), 1.0 / (n_neg + 2.0))
+    a, b = 0.0, np.log((n_neg + 1.0) / (n_pos + 1.0))
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(np.clip(a * scores + b, -500, 500)))
+        d = t - p
+        w = np.maximum(p * (1.0 - p), 1e-12)
+        grad = np.array([(d * scores).sum(), d.sum()])
+        hess = np.array([[(w * scores * scores).sum(), (w * scores).sum()],
+                         [(w * scores).sum(), w.sum()]]) + 1e-12 * np.eye(2)
+        step = np.linalg.solve(hess, grad)
+        a, b = a - step[0], b - step[1]
+        if np.abs(step).max() < 1e-10:
+            break
+    return a, b
+
+
+def fit_isotonic(scores, labels):
+    """Pool-adjacent-violators fit; returns the block centres and their rates."""
+    order = np.argsort(scores, kind="mergesort")
+    x = np.asarray(scores, dtype=np.float64)[order]
+    y = (np.asarray(labels)[order] == 1).astype(np.float64)
+    blocks = []  # [sum_x, sum_y, count]
+    for xi, yi in zip(x, y):
+        blocks.append([xi, yi, 1])
+        while len(blocks) > 1 and blocks[-2][1] / blocks[-2][2] >= blocks[-1][1] / blocks[-1][2]:
+            sx, sy, n = blocks.pop()
+            blocks[-1][0] += sx
+            blocks[-1][1] += sy
+            blocks[-1][2] += n
+    centres = np.array([sx / n for sx, _, n in blocks])
+    rates = np.array([sy / n for _, sy, n in blocks])
+    return centres, rates
+
+
+# ======================== LOOKUP TABLE ========================
+class RiskCalibrator:
+    """Monotone score → probability table, evaluated by linear interpolation."""
+
+    def __init__(self, x, y, method, model_sha256, data_sha256):
+        self.x = np.ascontiguousarray(x, dtype=np.float64)
+        self.y = np.ascontiguousarray(y, dtype=np.float64)
+        self.method = method
+        self.model_sha256 = model_sha256
+        self.data_sha256 = data_sha256
+
+    @classmethod
+    def fit(cls, scores, labels, method=DEFAULT_METHOD, model_sha256="", data_sha256=""):
+        scores = np.asarray(scores, dtype=np.float64)
+        if method == "platt":
+            a, b = fit_platt(scores, labels)
+            # Tabulate a little past the observed range; beyond it the lookup
+            # clamps to the end values, which are already near 0 or 1.
+            lo, hi = scores.min(), scores.max()
+            pad = 0.25 * (hi - lo)
+            x = np.linspace(lo - pad, hi + pad, TABLE_SIZE)
+            y = 1.0 / (1.0 + np.exp(a * x + b))
+        elif method == "isotonic":
+            x, y = fit_isotonic(scores, labels)
+        else:
+            raise ValueError(f"Unknown calibration method {method!r}; expected 'platt' or 'isotonic'")
+        return cls(x, y, method, model_sha256, data_sha256)
+
+    def probability(self, scores):
+        """Calibrated positive-class probability for each score (vectorized)."""
+        return np.interp(scores, self.x, self.y)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != CALIBRATION_VERSION:
+                raise ValueError(f"{path} has calibration version {int(data['version'])}")
+            return cls(data["x"], data["y"], str(data["method"]),
+                       str(data["model_sha256"]), str(data["data_sha256"]))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, x=self.x, y=self.y, method=self.method, version=CALIBRATION_VERSION,
+                 model_sha256=self.model_sha256, data_sha256=self.data_sha256)
+        os.replace(tmp, path)
+
+
+def _training_scores(disease, model):
+    spec = get_spec(disease)
+    df = datasets.load(disease, spec["features"] + [spec["target"]])
+    _, scores = score_matrix(model, df[spec["features"]])
+    return scores, df[spec["target"]].to_numpy()
+
+
+def table_path(disease, model_sha256, data_sha256, method=DEFAULT_METHOD):
+    return os.path.join(CALIBRATION_DIR, f"{disease}-{method}-{model_sha256[:16]}-{data_sha256[:16]}.npz")
+
+
+def get_calibrator(entry, method=DEFAULT_METHOD):
+    """Return the calibrator for a registry ``LoadedModel``, fitting it on first use."""
+    data_sha256 = file_sha256(csv_path(entry.disease))
+    key = (entry.disease, method, entry.sha256, data_sha256)
+    calibrator = _calibrators.get(key)
+    if calibrator is not None:
+        return calibrator
+    with _lock:
+        calibrator = _calibrators.get(key)
+        if calibrator is not None:
+            return calibrator
+        path = table_path(entry.disease, entry.sha256, data_sha256, method)
+        try:
+            calibrator = RiskCalibrator.load(path)
+        except (OSError, ValueError, KeyError):
+            scores, labels = _training_scores(entry.disease, entry.model)
+            calibrator = RiskCalibrator.fit(scores, labels, method, entry.sha256, data_sha256)
+            calibrator.save(path)
+        _calibrators[key] = calibrator
+        return calibrator
+
+
+def at_risk(probabilities):
+    """1 where the calibrated probability is over ``RISK_THRESHOLD``, else 0.
+
+    The risk level shown to a patient comes from this rather than from the
+    sign of the decision score: the calibration curve doesn't pass through
+    50% at score 0, so the two can disagree near the boundary.
+    """
+    return (np.asarray(probabilities) > RISK_THRESHOLD).astype(int)
+
+
+def assess(model, calibrator, X):
+    """Score a batch and read each row's risk level from its calibrated probability.
+
+    This is the one place every interface (app, screening, service, batch
+    CSVs, bulk uploads) turns model output into a label, so the same
+    inputs get the same answer everywhere. Rows with a missing or
+    non-finite input are not scored: ``valid`` is False for them and their
+    score and probability are NaN.
+    """
+    values = np.asarray(X, dtype=np.float64)
+    valid = np.isfinite(values).all(axis=1)
+    if not hasattr(X, "columns"):
+        X = values  # a DataFrame is passed on as is, keeping its column names for sklearn
+    scores = np.full(len(values), np.nan)
+    if valid.any():
+        _, scores[valid] = score_matrix(model, X if valid.all() else X[valid])
+    probabilities = calibrator.probability(scores)
+    return Assessment(valid, scores, probabilities, at_risk(probabilities))
+
+
+def risk_scores(entry, X, method=DEFAULT_METHOD):
+    """Score a batch with a registry entry; returns an ``Assessment``."""
+    return assess(entry.model, get_calibrator(entry, method), X)
+
+
+def cache_key(entry, calibrator, values):
+    """Prediction-cache key for one row; cached values are ``(at_risk, score, probability)``."""
+    version = (entry.disease, entry.sha256, calibrator.data_sha256, calibrator.method)
+    return feature_key(version, values)
+
+
+def predict_one(entry, values, method=DEFAULT_METHOD, cache=default_cache):
+    """Score one row through the shared prediction cache; returns ``(at_risk, probability)``."""
+    calibrator = get_calibrator(entry, method)
+
+    def compute():
+        result = assess(entry.model, calibrator, [values])
+        if not result.valid[0]:
+            raise ValueError("every input must be a finite number")
+        return int(result.at_risk[0]), float(result.scores[0]), float(result.probabilities[0])
+
+    flag, _, probability = cache.get_or_compute(cache_key(entry, calibrator, values), compute)
+    return flag, probability
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from model_registry import ModelRegistry
+
+    parser = argparse.ArgumentParser(description="Fit (or refit) the risk calibration tables.")
+    parser.add_argument("command", choices=["fit"])
+    parser.add_argument("--method", choices=["platt", "isotonic"], default=DEFAULT_METHOD)
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    for disease in DISEASES:
+        entry = registry.entry(disease)
+        scores, labels = _training_scores(disease, entry.model)
+        calibrator = get_calibrator(entry, args.method)
+        p = calibrator.probability(scores)
+        brier = np.mean((p - labels) ** 2)
+        print(f"{disease}: {len(calibrator.x)} knots, Brier score {brier:.4f} on {len(labels)} rows")
+    print(f"tables in {CALIBRATION_DIR}")
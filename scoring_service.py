@@ -0,0 +1,256 @@
+"""ASGI scoring service for the diabetes, heart and Parkinson's models.
+
+Endpoints:
+    POST /predict/diabetes     {"features": {"Glucose": 120, ...}}
+    POST /predict/heart        {"features": [63, 1, 3, ...]}
+    POST /predict/parkinsons
+    GET  /health
+
+``features`` is either a mapping keyed by the CSV column names or a list in
+the CSV column order. Concurrent requests for the same model are coalesced
+into one matrix call: the first request opens a batch, and the batch is
+scored once it holds ``max_batch_size`` rows or ``max_wait_ms`` has passed.
+Each response carries the calibrated ``probability`` and the at-risk
+``prediction`` from ``risk_calibration.assess``, the same numbers the app
+and ``batch_predict`` show, plus the raw decision ``score``. Rows already
+in the process-wide ``prediction_cache`` are answered from it and only the
+rest of a batch reaches the model; ``/health`` reports the cache counters.
+
+Models come from ``model_registry``, so replacing a ``.sav`` file in
+``$DISEASE_MODEL_DIR`` takes effect on the next batch without a restart.
+
+Run with any ASGI server, e.g. ``uvicorn scoring_service:app --port 8001``,
+or ``python scoring_service.py``.
+"""
+import asyncio
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from diseases import DISEASES, get_spec
+from model_registry import ModelLoadError, ModelRegistry
+from prediction_cache import default_cache
+from risk_calibration import assess, cache_key, get_calibrator
+
+MAX_BATCH_SIZE = int(os.environ.get("SCORING_MAX_BATCH", "64"))
+MAX_WAIT_MS = float(os.environ.get("SCORING_MAX_WAIT_MS", "2"))
+
+
+class BadRequest(Exception):
+    pass
+
+
+# ======================== MICRO-BATCHING ========================
+class MicroBatcher:
+    """Coalesce single-row requests for one model into batched calls."""
+
+    def __init__(self, disease, registry, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS, cache=default_cache):
+        self.disease = disease
+        self.registry = registry
+        self.cache = cache
+        self.features = get_spec(disease)["features"]
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = None
+        self._wakeup = None
+        self._worker = None
+        self.batches = 0
+        self.rows = 0
+
+    async def submit(self, row):
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((row, future))
+        self._wakeup.set()
+        return await future
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            try:
+                # Scoring runs off the event loop so new requests keep queueing
+                # (and form the next batch) while this one is in sklearn.
+                results = await loop.run_in_executor(None, self._score, [row for row, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.rows += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def _score(self, rows):
+        """Return ``(at_risk, score, probability)`` per row, scoring only the cache misses."""
+        entry = self.registry.entry(self.disease)
+        calibrator = get_calibrator(entry)
+        keys = [cache_key(entry, calibrator, row) for row in rows]
+        results = [self.cache.get(key) for key in keys]
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            X = pd.DataFrame(np.vstack([rows[i] for i in misses]), columns=self.features)
+            scored = assess(entry.model, calibrator, X)
+            for i, flag, score, probability in zip(misses, scored.at_risk, scored.scores, scored.probabilities):
+                results[i] = (int(flag), float(score), float(probability))
+                self.cache.put(keys[i], results[i])
+        return results
+
+
+def parse_features(disease, payload):
+    features = get_spec(disease)["features"]
+    values = payload.get("features") if isinstance(payload, dict) else None
+    if isinstance(values, dict):
+        missing = [c for c in features if c not in values]
+        if missing:
+            raise BadRequest(f"missing features: {', '.join(missing)}")
+        values = [values[c] for c in features]
+    if not isinstance(values, list) or len(values) != len(features):
+        raise BadRequest(f"'features' must be an object or a list of {len(features)} numbers")
+    try:
+        row = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise BadRequest("features must be numeric") from None
+    if not np.isfinite(row).all():
+        raise BadRequest("features must be finite numbers")
+    return row
+
+
+# ======================== ASGI APP ========================
+class ScoringService:
+    def __init__(self, model_dir=None, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.registry = ModelRegistry(model_dir)
+        self.batchers = {d: MicroBatcher(d, self.registry, max_batch_size, max_wait_ms) for d in DISEASES}
+        self.load_errors = {}
+
+    def load_models(self):
+        """Warm the registry and calibrators so the first request doesn't pay for them."""
+        for disease in DISEASES:
+            try:
+                get_calibrator(self.registry.entry(disease))
+                self.load_errors.pop(disease, None)
+            except ModelLoadError as e:
+                self.load_errors[disease] = str(e)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.load_models()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for batcher in self.batchers.values():
+                    await batcher.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        path = scope["path"].rstrip("/")
+        if path == "/health":
+            body = {
+                "models": {d: e.sha256 for d, e in self.registry.loaded().items()},
+                "errors": self.load_errors,
+                "batches": {d: b.batches for d, b in self.batchers.items()},
+                "rows": {d: b.rows for d, b in self.batchers.items()},
+                "cache": default_cache.stats(),
+            }
+            return await _respond(send, 200, body)
+
+        prefix, _, disease = path.rpartition("/")
+        if prefix != "/predict" or disease not in DISEASES:
+            return await _respond(send, 404, {"error": "not found"})
+        if scope["method"] != "POST":
+            return await _respond(send, 405, {"error": "method not allowed"})
+        try:
+            payload = json.loads(await _read_body(receive) or b"{}")
+            row = parse_features(disease, payload)
+        except (ValueError, BadRequest) as e:
+            return await _respond(send, 400, {"error": str(e)})
+
+        try:
+            prediction, score, probability = await self.batchers[disease].submit(row)
+        except ModelLoadError as e:
+            return await _respond(send, 503, {"error": str(e)})
+        await _respond(send, 200, {
+            "disease": get_spec(disease)["label"],
+            "prediction": prediction,
+            "result": get_spec(disease)["results"][prediction],
+            "score": score,
+            "probability": probability,
+        })
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def _respond(send, status, body):
+    data = json.dumps(body).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(data)).encode())],
+    })
+    await send({"type": "http.response.body", "body": data})
+
+
+app = ScoringService()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the disease models over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port)
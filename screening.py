@@ -0,0 +1,65 @@
+"""One-shot screening of a patient record against every disease model.
+
+A record is a mapping keyed by the CSV column names (``Glucose``, ``chol``,
+``MDVP:Fo(Hz)``, ...). Each model whose features are all present is scored
+on a shared thread pool, so the whole screening takes about as long as the
+slowest model rather than the sum of three page round-trips. Models with
+missing inputs are skipped and listed with what they were missing.
+"""
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from diseases import DISEASES, get_spec
+from model_registry import ModelLoadError
+from risk_calibration import predict_one
+
+DiseaseRisk = namedtuple("DiseaseRisk", "disease label prediction probability result")
+ScreeningResult = namedtuple("ScreeningResult", "risks skipped errors elapsed_ms")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=len(DISEASES), thread_name_prefix="screening")
+        return _executor
+
+
+def missing_features(disease, record):
+    return [c for c in get_spec(disease)["features"] if record.get(c) is None]
+
+
+def _score(registry, disease, record):
+    spec = get_spec(disease)
+    prediction, probability = predict_one(registry.entry(disease), [record[c] for c in spec["features"]])
+    return DiseaseRisk(disease, spec["label"], prediction, probability, spec["results"][prediction])
+
+
+def screen(registry, record, diseases=None):
+    """Score ``record`` against every model it has inputs for.
+
+    Returns a ``ScreeningResult``: ``risks`` maps disease to ``DiseaseRisk``,
+    ``skipped`` maps disease to its missing feature names, and ``errors``
+    maps disease to the message of a model that failed to load.
+    """
+    start = time.perf_counter()
+    skipped, futures = {}, {}
+    for disease in diseases or DISEASES:
+        missing = missing_features(disease, record)
+        if missing:
+            skipped[disease] = missing
+        else:
+            futures[disease] = _pool().submit(_score, registry, disease, record)
+
+    risks, errors = {}, {}
+    for disease, future in futures.items():
+        try:
+            risks[disease] = future.result()
+        except ModelLoadError as e:
+            errors[disease] = str(e)
+    return ScreeningResult(risks, skipped, errors, (time.perf_counter() - start) * 1000)
@@ -0,0 +1,125 @@
+"""Cold-start profiling for the Streamlit app.
+
+Each measurement starts a fresh interpreter with ``-X importtime``, imports
+Streamlit's AppTest harness (already loaded in a real server process, so
+not counted), then times the first script run on one page. The import
+lines logged during that run show what the page pulled in.
+
+Usage:
+    python startup_profile.py report                      # import report for every page
+    python startup_profile.py report --page "💡 Health Tips" --top 30
+    python startup_profile.py check --budget-ms 1500      # exit 1 if any page is over budget
+
+``check`` is the regression gate: it takes the best of ``--runs`` fresh
+processes per page and fails when that exceeds the budget (default
+``$STARTUP_BUDGET_MS`` or 1500 ms). ``tests/test_startup_budget.py`` runs
+the same check under pytest; set ``SKIP_STARTUP_BUDGET=1`` to skip it on
+slow CI machines.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(BASE_DIR, "Multiple disease predict.py")
+PAGES = ["🏠 Dashboard", "🩸 Diabetes", "❤️ Heart Disease", "🧠 Parkinson's", "🧪 Full Screening", "📊 My Reports", "💡 Health Tips"]
+DEFAULT_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "1500"))
+MARKER = "@@startup-profile@@"
+
+_CHILD = r"""
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+app_path, page = sys.argv[1], sys.argv[2]
+at = AppTest.from_file(app_path, default_timeout=120)
+at.session_state["navigation"] = page
+sys.stderr.write("{marker}\n")
+sys.stderr.flush()
+start = time.perf_counter()
+at.run()
+elapsed = (time.perf_counter() - start) * 1000
+sys.stderr.write("{marker}\n")
+print(json.dumps({{"page": page, "ms": elapsed, "exceptions": [e.value for e in at.exception]}}))
+""".format(marker=MARKER)
+
+
+def parse_importtime(stderr):
+    """Return ``[(module, self_us, cumulative_us, depth)]`` logged between the markers."""
+    rows, recording = [], False
+    for line in stderr.splitlines():
+        if line == MARKER:
+            if recording:
+                break
+            recording = True
+            continue
+        if not recording or not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue  # the header row
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((name.strip(), self_us, cumulative_us, depth))
+    return rows
+
+
+def profile_page(page, app_path=APP_PATH):
+    """Cold-start one page in a fresh process; returns ``(result, import_rows)``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD, app_path, page],
+        capture_output=True, text=True, cwd=os.path.dirname(app_path),
+        env={**os.environ, "PYTHONIOENCODING": "utf-8"},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"profiling {page!r} failed:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result, parse_importtime(proc.stderr)
+
+
+def report(pages, top):
+    for page in pages:
+        result, rows = profile_page(page)
+        top_level = sorted((r for r in rows if r[3] == 0), key=lambda r: -r[2])
+        total_import_ms = sum(r[2] for r in top_level) / 1000
+        print(f"\n{page}: first run {result['ms']:.0f} ms, imports {total_import_ms:.0f} ms")
+        for name, _, cumulative_us, _ in top_level[:top]:
+            print(f"  {cumulative_us / 1000:9.1f} ms  {name}")
+        for exc in result["exceptions"]:
+            print(f"  ! {exc}")
+
+
+def best_first_run_ms(page, runs=3):
+    """The fastest first run of ``page`` over ``runs`` fresh processes."""
+    return min(profile_page(page)[0]["ms"] for _ in range(runs))
+
+
+def check(pages, budget_ms, runs):
+    failed = False
+    for page in pages:
+        best = best_first_run_ms(page, runs)
+        over = best > budget_ms
+        failed |= over
+        print(f"{'FAIL' if over else 'ok  '} {page}: {best:.0f} ms (budget {budget_ms:.0f} ms)")
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile cold start of the Streamlit app.")
+    parser.add_argument("command", choices=["report", "check"])
+    parser.add_argument("--page", action="append", choices=PAGES, help="page(s) to profile (default: all)")
+    parser.add_argument("--top", type=int, default=15, help="modules listed per page in the report")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per page; the fastest counts")
+    args = parser.parse_args(argv)
+
+    pages = args.page or PAGES
+    if args.command == "report":
+        report(pages, args.top)
+        return 0
+    return check(pages, args.budget_ms, args.runs)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""Self-hosted, precompressed theme for the Streamlit app.
+
+The app's CSS lives in ``static/theme.css`` and the Poppins font in
+``static/fonts/``. Streamlit serves that folder at ``app/static/`` (see
+``.streamlit/config.toml``), so a rerun only sends a ``<link>`` tag
+instead of the whole ``<style>`` block, and the browser fetches the
+stylesheet and fonts once. The link carries ``?v=<content hash>``, so the
+files can be cached for a year and a new theme is still picked up at once.
+
+Streamlit's own static route sends no cache headers and never compresses.
+``serve`` is a small static server that does both: it answers with the
+``.br``/``.gz`` variant written by ``build`` when the browser accepts it,
+and marks versioned files immutable. Put it (or a proxy serving the same
+files, e.g. nginx ``gzip_static``) at ``$THEME_URL``. ``THEME_INLINE=1``
+falls back to inlining the CSS.
+
+Usage:
+    python static_theme.py fonts              # download Poppins and its licence into static/fonts (once, needs network)
+    python static_theme.py build              # write theme.css.gz (and .br with the brotli package)
+    python static_theme.py serve --port 8502  # serve static/ with cache headers
+    python static_theme.py measure            # bytes per rerun: inline <style> vs <link>
+"""
+import argparse
+import gzip
+import os
+import sys
+import urllib.request
+
+from diseases import BASE_DIR, file_sha256
+
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+THEME_FILE = "theme.css"
+THEME_URL = os.environ.get("THEME_URL", "app/static").rstrip("/")
+INLINE = os.environ.get("THEME_INLINE") == "1"
+MAX_AGE = 365 * 24 * 3600
+FONT_WEIGHTS = (300, 400, 600, 700)
+FONT_URL = "https://cdn.jsdelivr.net/fontsource/fonts/poppins@latest/latin-{weight}-normal.woff2"
+FONT_LICENSE_URL = "https://raw.githubusercontent.com/google/fonts/main/ofl/poppins/OFL.txt"
+FONT_LICENSE = "OFL.txt"  # Poppins is under the SIL Open Font License, which must ship with the fonts
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))  # in order of preference
+
+_tags = {}
+
+
+def theme_path():
+    return os.path.join(STATIC_DIR, THEME_FILE)
+
+
+def theme_tag():
+    """The markup a rerun sends for the theme: a versioned ``<link>``, or the CSS with THEME_INLINE=1."""
+    path = theme_path()
+    version = file_sha256(path)[:12]  # memoized by (mtime, size)
+    if version not in _tags:
+        if INLINE:
+            with open(path, encoding="utf-8") as f:
+                css = f.read().replace("url('fonts/", f"url('{THEME_URL}/fonts/")
+            _tags[version] = f"<style>\n{css}</style>"
+        else:
+            _tags[version] = f'<link rel="stylesheet" href="{THEME_URL}/{THEME_FILE}?v={version}">'
+    return _tags[version]
+
+
+# ======================== BUILD ========================
+def _compressors():
+    compressors = {"gzip": lambda data: gzip.compress(data, 9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        pass  # .br variants need the optional brotli package
+    else:
+        compressors["br"] = lambda data: brotli.compress(data, quality=11)
+    return compressors
+
+
+def build(static_dir=STATIC_DIR):
+    """Precompress every text asset; returns ``{file: {encoding: bytes}}``."""
+    compressors = _compressors()
+    sizes = {}
+    for root, _, names in os.walk(static_dir):
+        for name in names:
+            if not name.endswith((".css", ".js", ".svg", ".json")):
+                continue  # fonts and images are already compressed
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            sizes[os.path.relpath(path, static_dir)] = entry = {"identity": len(data)}
+            for encoding, suffix in ENCODINGS:
+                if encoding not in compressors:
+                    continue
+                packed = compressors[encoding](data)
+                tmp = f"{path}{suffix}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(packed)
+                os.replace(tmp, path + suffix)
+                entry[encoding] = len(packed)
+    return sizes
+
+
+def font_files(static_dir=STATIC_DIR):
+    """Paths of the woff2 files ``theme.css`` references, by weight."""
+    return {w: os.path.join(static_dir, "fonts", f"poppins-latin-{w}-normal.woff2") for w in FONT_WEIGHTS}
+
+
+def fetch_fonts(static_dir=STATIC_DIR, timeout=20):
+    font_dir = os.path.join(static_dir, "fonts")
+    os.makedirs(font_dir, exist_ok=True)
+    downloads = [(FONT_URL.format(weight=w), target) for w, target in font_files(static_dir).items()]
+    downloads.append((FONT_LICENSE_URL, os.path.join(font_dir, FONT_LICENSE)))
+    for url, target in downloads:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            data = response.read()
+        if target.endswith(".woff2") and data[:4] != b"wOF2":
+            raise ValueError(f"{url} did not return a woff2 font")
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, target)
+        print(f"{target} ({len(data) / 1024:.0f} KiB)")
+
+
+# ======================== SERVE ========================
+def _variant(path, accept_encoding):
+    """Pick the precompressed file to send; a variant older than its source is ignored."""
+    accepted = {e.split(";")[0].strip() for e in accept_encoding.split(",")}
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and os.path.exists(path + suffix) \
+                and os.path.getmtime(path + suffix) >= os.path.getmtime(path):
+            return path + suffix, encoding
+    return path, None
+
+
+def make_server(port, host="0.0.0.0", static_dir=STATIC_DIR):
+    import mimetypes
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import unquote, urlsplit
+
+    root = os.path.realpath(static_dir)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self, head=False):
+            url = urlsplit(self.path)
+            path = os.path.realpath(os.path.join(root, unquote(url.path).lstrip("/")))
+            if not path.startswith(root + os.sep) or not os.path.isfile(path):
+                self.send_error(404)
+                return
+            body_path, encoding = _variant(path, self.headers.get("Accept-Encoding", ""))
+            stat = os.stat(body_path)
+            etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            not_modified = self.headers.get("If-None-Match") == etag
+            versioned = "v=" in url.query or path.endswith(".woff2")
+            self.send_response(304 if not_modified else 200)
+            self.send_header("Content-Type", mimetypes.guess_type(path)[0] or "application/octet-stream")
+            self.send_header("Cache-Control", f"public, max-age={MAX_AGE}, immutable" if versioned else "no-cache")
+            self.send_header("Vary", "Accept-Encoding")
+            self.send_header("ETag", etag)
+            self.send_header("Access-Control-Allow-Origin", "*")  # fonts are fetched cross-origin
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", "0" if not_modified else str(stat.st_size))
+            self.end_headers()
+            if not (not_modified or head):
+                with open(body_path, "rb") as f:
+                    self.wfile.write(f.read())
+
+        def do_HEAD(self):
+            self.do_GET(head=True)
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+# ======================== MEASURE ========================
+def measure(inline_css):
+    """Bytes one rerun sends for the theme, as a markdown ForwardMsg (raw and deflated)."""
+    import zlib
+
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    def sizes(body):
+        msg = ForwardMsg()
+        msg.delta.new_element.markdown.body = body
+        msg.delta.new_element.markdown.allow_html = True
+        msg.metadata.delta_path[:] = [0, 0]
+        data = msg.SerializeToString()
+        return len(data), len(zlib.compress(data, 6)) - 6  # websocket permessage-deflate drops the zlib framing
+
+    return {"inline": sizes(inline_css), "link": sizes(theme_tag())}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and serve the app's static theme.")
+    parser.add_argument("command", choices=["fonts", "build", "serve", "measure"])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--reruns", type=int, default=1000, help="reruns to extrapolate to in measure")
+    args = parser.parse_args(argv)
+
+    if args.command == "fonts":
+        fetch_fonts()
+    elif args.command == "build":
+        for name, entry in build().items():
+            print(f"{name}: " + ", ".join(f"{k} {v:,} B" for k, v in entry.items()))
+    elif args.command == "serve":
+        build()
+        print(f"serving {STATIC_DIR} on http://{args.host}:{args.port}/")
+        make_server(args.port, args.host).serve_forever()
+    else:
+        with open(theme_path(), encoding="utf-8") as f:
+            inline = f"<style>\n{f.read()}</style>"
+        result = measure(inline)
+        for name, (raw, deflated) in result.items():
+            print(f"{name:<7} {raw:6,} B per rerun ({deflated:,} B deflated)")
+        saved = result["inline"][0] - result["link"][0]
+        print(f"saved   {saved:6,} B per rerun, {saved * args.reruns / 1024:,.0f} KiB per {args.reruns:,} reruns")
+        for name, entry in build().items():
+            print(f"once:   {name} " + ", ".join(f"{k} {v:,} B" for k, v in entry.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
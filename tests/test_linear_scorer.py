@@ -0,0 +1,47 @@
+"""The compiled linear scorers must reproduce the pickled models on the bundled CSVs."""
+import hashlib
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import datasets
+import model_artifacts
+from diseases import DISEASES, get_spec, model_path
+from linear_scorer import LinearScorer
+
+TOLERANCE = 1e-6  # libsvm sums over support vectors, so expect ~1e-8
+
+
+@pytest.mark.parametrize("disease", list(DISEASES))
+def test_compiled_scorer_matches_pickle(disease):
+    sav = model_path(disease)
+    with open(sav, "rb") as f:
+        data = f.read()
+    estimator = pickle.loads(data)
+    scorer = model_artifacts.load(model_artifacts.artifact_dir(sav))
+    assert isinstance(scorer, LinearScorer)
+    assert scorer.source_sha256 == hashlib.sha256(data).hexdigest(), "artifact is stale; rerun model_artifacts.py convert"
+
+    X = datasets.load(disease, get_spec(disease)["features"])
+    np.testing.assert_allclose(scorer.decision_function(X), estimator.decision_function(X), rtol=0, atol=TOLERANCE)
+    np.testing.assert_array_equal(scorer.predict(X), estimator.predict(X))
+
+
+def test_blank_cell_is_rejected(tmp_path):
+    scorer = model_artifacts.load(model_artifacts.artifact_dir(model_path("diabetes")))
+    row = datasets.load("diabetes", get_spec("diabetes")["features"]).iloc[:2].to_numpy(np.float64)
+    row[1, 1] = np.nan
+    with pytest.raises(ValueError, match="missing or infinite"):
+        scorer.decision_function(row)
+
+    import batch_predict
+
+    path = tmp_path / "blank.csv"
+    path.write_text("Pregnancies,Glucose,BloodPressure,SkinThickness,Insulin,BMI,DiabetesPedigreeFunction,Age\n"
+                    "6,148,72,35,0,33.6,0.627,50\n1,,66,29,0,26.6,0.351,31\n")
+    assert batch_predict.main(["diabetes", str(path), "-o", str(tmp_path / "out.csv")]) == 0
+    scored = pd.read_csv(tmp_path / "out.csv")
+    assert scored["prediction"].notna().tolist() == [True, False]
+    assert scored["probability"].notna().tolist() == [True, False]
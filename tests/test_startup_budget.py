@@ -0,0 +1,15 @@
+"""Every page's cold first run must stay within the startup budget (see startup_profile.py)."""
+import os
+
+import pytest
+
+from startup_profile import DEFAULT_BUDGET_MS, PAGES, best_first_run_ms
+
+pytestmark = pytest.mark.skipif(os.environ.get("SKIP_STARTUP_BUDGET") == "1",
+                                reason="SKIP_STARTUP_BUDGET=1 (timings aren't meaningful on this machine)")
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_first_run_within_budget(page):
+    best = best_first_run_ms(page, runs=int(os.environ.get("STARTUP_BUDGET_RUNS", "3")))
+    assert best <= DEFAULT_BUDGET_MS, f"{page} first run took {best:.0f} ms (budget {DEFAULT_BUDGET_MS:.0f} ms)"
@@ -0,0 +1,26 @@
+"""Assets the app serves from disk so air-gapped hosts never need the network."""
+import os
+
+import pytest
+
+import lottie_assets
+import static_theme
+
+
+@pytest.mark.parametrize("name", list(lottie_assets.ANIMATIONS))
+def test_lottie_animation_is_bundled(name):
+    path = os.path.join(lottie_assets.BUNDLE_DIR, f"{name}.json")
+    assert lottie_assets._read(path) is not None, f"{path} is missing or invalid; run python lottie_assets.py --sync"
+
+
+@pytest.mark.parametrize("weight", static_theme.FONT_WEIGHTS)
+def test_font_is_bundled(weight):
+    path = static_theme.font_files()[weight]
+    assert os.path.exists(path), f"{path} is missing; run python static_theme.py fonts"
+    with open(path, "rb") as f:
+        assert f.read(4) == b"wOF2", f"{path} is not a woff2 font"
+
+
+def test_font_license_is_bundled():
+    path = os.path.join(static_theme.STATIC_DIR, "fonts", static_theme.FONT_LICENSE)
+    assert os.path.exists(path), f"{path} is missing; run python static_theme.py fonts"
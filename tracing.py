@@ -0,0 +1,269 @@
+"""Lightweight timing spans for the app's hot paths.
+
+Sections of a rerun are wrapped in ``with tracing.span("charts"):``; each
+span adds its duration to a histogram keyed by (page, section), where the
+page is whatever ``begin_rerun`` set for the current script thread. A
+whole rerun is recorded as the ``rerun`` section by ``finish_rerun``. A
+span costs two ``perf_counter`` calls, a bisect and a lock, about a
+microsecond, so tracing is on by default (``TRACING_ENABLED=0`` turns it
+off).
+
+The histograms, and the hit/miss counters of the shared
+``prediction_cache`` once a page has used it, are exported in the
+Prometheus text format:
+
+    TRACING_METRICS_PORT=9464    serve GET /metrics from the app process
+    TRACING_METRICS_FILE=...     rewrite a file (for node_exporter's textfile
+                                 collector) at most every
+                                 TRACING_EXPORT_INTERVAL seconds (default 15)
+
+With ``TRACING_ADMIN_TOKEN`` set, opening the app with ``?admin=<token>``
+shows a debug panel with the same numbers in the sidebar.
+
+Usage:
+    python tracing.py              # time the span overhead
+"""
+import bisect
+import contextvars
+import functools
+import hmac
+import os
+import sys
+import threading
+import time
+
+ENABLED = os.environ.get("TRACING_ENABLED", "1") != "0"
+METRICS_FILE = os.environ.get("TRACING_METRICS_FILE")
+METRICS_PORT = int(os.environ.get("TRACING_METRICS_PORT") or 0)
+EXPORT_INTERVAL = float(os.environ.get("TRACING_EXPORT_INTERVAL", "15"))
+ADMIN_TOKEN = os.environ.get("TRACING_ADMIN_TOKEN")
+METRIC = "disease_app_section_seconds"
+CACHE_METRIC = "disease_app_prediction_cache"
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_page = contextvars.ContextVar("tracing_page", default="-")
+_rerun_start = contextvars.ContextVar("tracing_rerun_start", default=None)
+_histograms = {}
+_lock = threading.Lock()
+_last_export = 0.0
+_server = None
+
+
+# ======================== RECORDING ========================
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile (the Prometheus estimate, without interpolation)."""
+        rank, seen = q * self.count, 0
+        for bound, n in zip(BUCKETS + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+def observe(section, seconds, page=None):
+    key = (page or _page.get(), section)
+    index = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.counts[index] += 1
+        histogram.sum += seconds
+        histogram.count += 1
+
+
+class span:
+    """``with span("section"):`` records how long the block took."""
+
+    __slots__ = ("section", "start")
+
+    def __init__(self, section):
+        self.section = section
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if ENABLED:
+            observe(self.section, time.perf_counter() - self.start)
+        return False
+
+
+def traced(section):
+    """Decorator timing every call as ``section``; meant for ``st.fragment`` functions.
+
+    A fragment rerun skips the top of the script, so the page is the one the
+    function was defined on rather than whatever the thread last saw.
+    """
+    page = _page.get()
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            token = _page.set(page)
+            try:
+                with span(section):
+                    return fn(*args, **kwargs)
+            finally:
+                _page.reset(token)
+        return wrapper
+    return decorate
+
+
+def begin_rerun(page):
+    """Mark the start of a script run on ``page``; later spans are filed under it."""
+    _page.set(page)
+    _rerun_start.set(time.perf_counter())
+
+
+def finish_rerun():
+    """Record the whole rerun and export the metrics file if one is due.
+
+    Runs cut short by ``st.rerun()`` or ``st.stop()`` never get here, so
+    they are missing from ``rerun`` but their finished sections still count.
+    """
+    start = _rerun_start.get()
+    if start is not None and ENABLED:
+        observe("rerun", time.perf_counter() - start)
+    _rerun_start.set(None)
+    if METRICS_FILE and time.monotonic() - _last_export >= EXPORT_INTERVAL:
+        export_file()
+
+
+def snapshot():
+    """Return ``{(page, section): Histogram}`` copies, safe to read without the lock."""
+    with _lock:
+        copies = {}
+        for key, h in _histograms.items():
+            c = copies[key] = Histogram()
+            c.counts, c.sum, c.count = list(h.counts), h.sum, h.count
+        return copies
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def summary():
+    """One row per (page, section) for the debug panel, slowest total first."""
+    rows = [{
+        "page": page,
+        "section": section,
+        "calls": h.count,
+        "mean_ms": h.sum / h.count * 1000,
+        "p50_ms": h.quantile(0.5) * 1000,
+        "p95_ms": h.quantile(0.95) * 1000,
+        "total_s": h.sum,
+    } for (page, section), h in snapshot().items()]
+    return sorted(rows, key=lambda r: -r["total_s"])
+
+
+# ======================== EXPORT ========================
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def prometheus_text():
+    lines = [
+        f"# HELP {METRIC} Time spent in instrumented sections of an app rerun.",
+        f"# TYPE {METRIC} histogram",
+    ]
+    for (page, section), h in sorted(snapshot().items()):
+        labels = f'page="{_label(page)}",section="{_label(section)}"'
+        cumulative = 0
+        for bound, n in zip(BUCKETS + ("+Inf",), h.counts):
+            cumulative += n
+            lines.append(f'{METRIC}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{METRIC}_sum{{{labels}}} {h.sum:.6f}")
+        lines.append(f"{METRIC}_count{{{labels}}} {h.count}")
+    return "\n".join(lines + _cache_lines()) + "\n"
+
+
+def _cache_lines():
+    # Looked up rather than imported: pages that never predict don't load
+    # prediction_cache (or numpy), and then there is nothing to report.
+    module = sys.modules.get("prediction_cache")
+    if module is None:
+        return []
+    stats = module.default_cache.stats()
+    lines = []
+    for name in ("hits", "misses", "coalesced", "evictions", "expirations"):
+        lines.append(f"# TYPE {CACHE_METRIC}_{name}_total counter")
+        lines.append(f"{CACHE_METRIC}_{name}_total {stats[name]}")
+    for name in ("entries", "bytes"):
+        lines.append(f"# TYPE {CACHE_METRIC}_{name} gauge")
+        lines.append(f"{CACHE_METRIC}_{name} {stats[name]}")
+    return lines
+
+
+def export_file(path=None):
+    global _last_export
+    path = path or METRICS_FILE
+    _last_export = time.monotonic()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(prometheus_text())
+        os.replace(tmp, path)
+    except OSError:
+        pass  # metrics must never break a rerun
+    return path
+
+
+def serve(port=None, host="0.0.0.0"):
+    """Serve ``GET /metrics`` on a daemon thread; once per process, later calls are no-ops."""
+    global _server
+    port = port or METRICS_PORT
+    if not port:
+        return None
+    with _lock:
+        if _server is not None:
+            return _server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0].rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer((host, port), Handler)
+        except OSError:  # another worker already holds the port
+            return None
+        threading.Thread(target=_server.serve_forever, name="tracing-metrics", daemon=True).start()
+        return _server
+
+
+def is_admin(token):
+    return bool(ADMIN_TOKEN and token) and hmac.compare_digest(str(token), ADMIN_TOKEN)
+
+
+if __name__ == "__main__":
+    n = 200_000
+    begin_rerun("overhead")
+    start = time.perf_counter()
+    for _ in range(n):
+        with span("noop"):
+            pass
+    per_span = (time.perf_counter() - start) / n
+    print(f"{per_span * 1e6:.2f} µs per span ({n:,} spans)")